@@ -0,0 +1,248 @@
+"""
+Benchmarks hors-ligne des fonctions analytiques lourdes, sur données synthétiques seedées.
+
+Fonctions mesurées (temps = meilleur de N runs, mémoire = pic tracemalloc sur un run) :
+- load_snapshot          (avec --snapshot : ouverture du snapshot local et décodage des decks)
+- calculate_lift_scores  (etl_script_synergy)
+- featurize_decks        (calculate_archetypal_decks)
+- cluster_decks          (plus gros archétype)
+- build_archetype_skeleton (plus gros archétype, sans découpage)
+
+Les résultats sont comparés à une baseline JSON : une régression de temps ou de mémoire
+au-delà de la tolérance fait sortir le script en erreur (code 1). Les sorties sont vérifiées aussi :
+invariants (squelette de 40 cartes, terme de synergie non nul...) à chaque run, et résumé
+(nombre de paires, tailles des variantes...) identique à celui de la baseline.
+
+Usage:
+    python backend/benchmark_analytics.py                          # 1k et 10k decks
+    python backend/benchmark_analytics.py --decks 1000 100000 --functions calculate_lift_scores
+    python backend/benchmark_analytics.py --save-baseline          # Enregistre la baseline
+    python backend/benchmark_analytics.py --snapshot ECL PremierDraft   # Vrais decks du snapshot local (snapshot_store.py), sans réseau
+"""
+
+import io
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import contextlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+import calculate_archetypal_decks as cad
+import etl_script_synergy as synergy
+from snapshot_store import load_snapshot
+from synthetic_trophy_decks import generate_dataset, REFERENCE_NOW
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+
+DECK_SCALES = [1000, 10000]
+SEED = 1
+REPEAT = 3
+TOLERANCE = 0.25  # +25% de temps ou de mémoire = régression
+MIN_DELTA_SECONDS = 0.02  # En dessous, un écart de temps est du bruit de mesure
+
+BASELINE_PATH = Path(__file__).parent / "benchmark_baseline.json"
+
+# (set, format) : mesures sur le snapshot local au lieu des données synthétiques
+SNAPSHOT = None
+
+# ==============================================================================
+# 2. MESURES
+# ==============================================================================
+
+def measure(fn, repeat=REPEAT):
+    """(meilleur temps en secondes, pic mémoire en Ko, sortie) d'un appel sans argument, sorties console masquées"""
+    best = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        # Mémoire mesurée à part : tracemalloc ralentit l'exécution
+        gc.collect()
+        tracemalloc.start()
+        output = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return best, peak / 1024, output
+
+def check_output(name, output):
+    """(résumé stable de la sortie, comparé à la baseline ; invariants non respectés)"""
+    errors = []
+    if name == "calculate_lift_scores":
+        summary = {"pairs": len(output)}
+        if not output: errors.append("aucune paire de synergie")
+    elif name == "cluster_decks":
+        groups, centroids, _ = output
+        summary = {"variants": [len(g) for g in groups]}
+        if centroids is not None and len(centroids) != len(groups): errors.append("un centroïde par variante attendu")
+    elif name == "build_archetype_skeleton":
+        summary = {
+            "cards": len(output["deck_list"]),
+            "with_synergy": sum(card["synergy_score"] > 0 for card in output["importance_cards"]),
+        }
+        if summary["cards"] != 40: errors.append(f"squelette de {summary['cards']} cartes au lieu de 40")
+        if not summary["with_synergy"]: errors.append("terme de synergie nul pour toutes les importance_cards")
+    else: # featurize_decks, load_snapshot
+        summary = {"decks": len(output)}
+        if not output: errors.append("aucun deck")
+    return summary, errors
+
+def build_cases(n_decks, seed=SEED):
+    """Jeu de données synthétique + fonctions à mesurer, préparées une fois par échelle"""
+    dataset = generate_dataset(n_decks, seed)
+    return make_cases(dataset["trophy_decks"], dataset["cards"], dataset["synergy_scores"], REFERENCE_NOW)
+
+def build_snapshot_cases(set_code, fmt):
+    """Mêmes mesures sur les decks et cartes du snapshot local (synergies recalculées depuis les decks)"""
+    snapshot = load_snapshot(set_code, fmt)
+    if snapshot is None:
+        print(f"❌ Pas de snapshot pour {set_code} ({fmt}) : lancer snapshot_store.py --sets {set_code}")
+        sys.exit(1)
+    decks = snapshot.deck_rows()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cards = cad.merge_card_meta(snapshot.card_list_rows(), snapshot.card_stats_rows("Global"))
+        synergy_scores = synergy.synergy_rows(synergy.calculate_lift_scores(decks, cards))
+    cases, arch_size = make_cases(decks, cards, synergy_scores, datetime.now(timezone.utc))
+    return {"load_snapshot": lambda: load_snapshot(set_code, fmt).deck_rows(), **cases}, arch_size
+
+def make_cases(decks, cards, synergy_scores, now):
+    """Fonctions à mesurer sur un jeu de decks (lignes trophy_decks), préparées une fois"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctx = cad.FormatContext(cards)
+        features = cad.featurize_decks(decks, ctx, now=now)
+        synergy_index = cad.build_synergy_index(synergy_scores, ctx)
+
+    by_arch = {}
+    for f in features:
+        by_arch.setdefault(f.deck['archetype'], []).append(f)
+    arch, arch_decks = max(by_arch.items(), key=lambda x: len(x[1]))
+
+    return {
+        "calculate_lift_scores": lambda: synergy.calculate_lift_scores(decks, cards),
+        "featurize_decks": lambda: cad.featurize_decks(decks, ctx, now=now),
+        "cluster_decks": lambda: cad.cluster_decks(arch_decks, ctx),
+        "build_archetype_skeleton": lambda: cad.build_archetype_skeleton(
+            arch, arch_decks, ctx, synergy_index, "SYN", "PremierDraft", now=now
+        ),
+    }, len(arch_decks)
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Affiche l'écart à la baseline (temps, mémoire, résumé des sorties), retourne la liste des régressions"""
+    regressions = []
+    for key, current in results.items():
+        ref = baseline.get(key)
+        if not ref:
+            print(f"   🆕 {key}: pas de baseline")
+            continue
+        time_ratio = current["seconds"] / ref["seconds"] if ref["seconds"] else 1.0
+        mem_ratio = current["peak_kb"] / ref["peak_kb"] if ref["peak_kb"] else 1.0
+        slower = time_ratio > 1 + tolerance and current["seconds"] - ref["seconds"] > MIN_DELTA_SECONDS
+        changed = "output" in ref and current["output"] != ref["output"]
+        flag = "✅"
+        if slower or mem_ratio > 1 + tolerance or changed:
+            flag = "❌"
+            regressions.append(key)
+        print(f"   {flag} {key}: temps x{time_ratio:.2f}, mémoire x{mem_ratio:.2f}")
+        if changed:
+            print(f"      sortie {current['output']} au lieu de {ref['output']}")
+    return regressions
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+
+def parse_arguments():
+    """Parse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Benchmark analytics functions on synthetic trophy decks')
+    parser.add_argument(
+        '--decks', '-n',
+        type=int,
+        nargs='+',
+        default=None,
+        help=f'Nombres de decks à tester (défaut: {DECK_SCALES})'
+    )
+    parser.add_argument(
+        '--functions', '-f',
+        type=str,
+        nargs='+',
+        default=None,
+        help='Fonctions à mesurer (défaut: toutes)'
+    )
+    parser.add_argument('--seed', type=int, default=None, help=f'Seed du générateur (défaut: {SEED})')
+    parser.add_argument('--repeat', '-r', type=int, default=None, help=f'Runs par mesure, meilleur temps retenu (défaut: {REPEAT})')
+    parser.add_argument('--baseline', type=str, default=None, help=f'Fichier de baseline (défaut: {BASELINE_PATH.name})')
+    parser.add_argument('--save-baseline', action='store_true', help='Enregistre les résultats comme nouvelle baseline')
+    parser.add_argument('--snapshot', type=str, nargs=2, default=None, metavar=('SET', 'FORMAT'), help='Mesure sur le snapshot local de ce set/format')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    # Override des configs
+    if args.decks:
+        DECK_SCALES = list(args.decks)
+    if args.seed is not None:
+        SEED = args.seed
+    if args.repeat:
+        REPEAT = args.repeat
+    if args.baseline:
+        BASELINE_PATH = Path(args.baseline)
+    if args.snapshot:
+        SNAPSHOT = tuple(args.snapshot)
+
+    print(f"⏱️ Benchmarks analytiques - seed={SEED}, échelles={f'snapshot {SNAPSHOT[0]} ({SNAPSHOT[1]})' if SNAPSHOT else DECK_SCALES}, meilleur de {REPEAT}")
+
+    results = {}
+    failures = []
+    scales = [f"{SNAPSHOT[0]}-{SNAPSHOT[1]}"] if SNAPSHOT else DECK_SCALES
+    for scale in scales:
+        cases, arch_size = build_snapshot_cases(*SNAPSHOT) if SNAPSHOT else build_cases(scale, SEED)
+        print(f"\n📦 {scale}{' (snapshot)' if SNAPSHOT else ' decks'} (plus gros archétype: {arch_size} decks)")
+        for name, fn in cases.items():
+            if args.functions and name not in args.functions: continue
+            seconds, peak_kb, output = measure(fn, REPEAT)
+            summary, errors = check_output(name, output)
+            results[f"{name}@{scale}"] = {"seconds": round(seconds, 4), "peak_kb": round(peak_kb, 1), "output": summary}
+            print(f"   {name:<26} {seconds:>9.3f}s  {peak_kb / 1024:>8.1f} Mo  {summary}")
+            for error in errors:
+                print(f"      ❌ {error}")
+                failures.append(f"{name}@{scale}: {error}")
+
+    if failures:
+        print(f"\n❌ {len(failures)} sortie(s) invalide(s): {failures}")
+        sys.exit(1)
+
+    env = {"python": platform.python_version(), "machine": platform.machine(), "seed": SEED}
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({"env": env, "results": results}, f, indent=2, sort_keys=True)
+        print(f"\n💾 Baseline enregistrée: {BASELINE_PATH}")
+        sys.exit(0)
+
+    if not BASELINE_PATH.exists():
+        print(f"\n⚠️ Pas de baseline ({BASELINE_PATH.name}), lancer avec --save-baseline pour en créer une.")
+        sys.exit(0)
+
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    if baseline.get("env") != env:
+        print(f"\n⚠️ Baseline mesurée dans un autre environnement: {baseline.get('env')}")
+
+    print(f"\n📊 Comparaison à la baseline (tolérance +{TOLERANCE:.0%})")
+    regressions = compare(results, baseline.get("results", {}))
+    if regressions:
+        print(f"\n❌ {len(regressions)} régression(s): {regressions}")
+        sys.exit(1)
+    print("\n✅ Aucune régression.")
@@ -2,12 +2,22 @@ import requests
 import os
 import time
 import json
+import argparse
+import hashlib
 import statistics
-from collections import Counter
-from datetime import datetime, timedelta, timezone
+from array import array
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 import random
 from dotenv import load_dotenv
 from pathlib import Path
+from supabase_fetch import fetch_all, FetchError
+from trophy_rollups import get_daily_rollups, parse_trophy_time, rollup_frequencies, rollups_from_decks
+from snapshot_store import load_snapshot
+import profiling
+from profiling import phase, add_profile_argument, start_profiling
+from card_names import CardNameResolver, is_basic_land
 
 # ==============================================================================
 # 1. CONFIGURATION
@@ -16,6 +26,42 @@ from pathlib import Path
 TARGET_SET_CODES = ["ECL"]
 TARGET_FORMATS = ["PremierDraft", "TradDraft"]
 
+# Colonnes chargées depuis card_list (pas de select=*)
+CARD_LIST_COLUMNS = ["card_name", "colors", "card_cmc", "card_cost", "rarity", "card_type"]
+
+# --- CLUSTERING DES VARIANTES D'ARCHÉTYPE ---
+MIN_DECKS_FOR_CLUSTERING = 40  # En dessous, pas de découpage
+MAX_VARIANTS = 4               # k testés : 2..MAX_VARIANTS (k=1 si aucun n'est validé)
+MIN_CLUSTER_DECKS = 20         # Taille minimale d'une variante
+MIN_CLUSTER_SHARE = 0.15       # Part minimale d'une variante dans l'archétype
+MAX_PILLAR_OVERLAP = 9         # Piliers communs max entre deux variantes (9/15 = 60%)
+MIN_SILHOUETTE = 0.05          # Silhouette minimale pour accepter un découpage
+KMEDOIDS_RESTARTS = 5          # Initialisations testées par k (on garde le coût minimal)
+MAX_KMEDOIDS_ITER = 20
+MAX_ASSIGNMENT_DRIFT = 0.10    # Part max de decks qui changent de variante en warm start avant re-clustering complet
+MAX_UNSPLIT_CHANGE = 0.10      # Archétype non découpé : variation max du nombre de decks depuis la dernière recherche avant de la relancer
+
+# Ignore les centroïdes du run précédent et relance la recherche complète des variantes
+FULL_RECLUSTER = False
+
+# Nombre de processus pour le calcul des archétypes (1 = séquentiel)
+MAX_WORKERS = os.cpu_count() or 1
+
+# Version de l'algorithme, incluse dans l'empreinte : à incrémenter quand le calcul change
+SKELETON_VERSION = 4
+
+# Recalcule tous les archétypes même si leur empreinte n'a pas changé
+FORCE_REBUILD = False
+
+# Decks, métadonnées et stats lus dans le snapshot local (snapshot_store.py) au lieu de Supabase
+USE_SNAPSHOT = False
+
+# Date de calcul "as-of" (None = aujourd'hui, ou "YYYY-MM-DD" : decks avec trophy_time <= ce jour)
+AS_OF_DATE = None
+
+# Produit l'historique jour par jour (jusqu'à AS_OF_DATE ou au dernier jour) dans archetypal_skeletons_history
+HISTORY_MODE = False
+
 # --- ENVIRONNEMENT ---
 current_dir = Path(__file__).parent
 root_dir = current_dir.parent
@@ -36,49 +82,42 @@ HEADERS_SUPABASE = {
 # 2. DATA FETCHING
 # ==============================================================================
 
-def fetch_data(table, params="select=*"):
-    """Récupère toutes les données d'une table avec pagination automatique"""
-    all_data = []
-    offset = 0
-    page_size = 1000
-
-    while True:
-        url = f"{SUPABASE_URL}/rest/v1/{table}?{params}&limit={page_size}&offset={offset}"
-        resp = requests.get(url, headers=HEADERS_SUPABASE)
-        if resp.status_code != 200:
-            print(f"❌ Erreur {table}: {resp.text}")
-            break
-
-        data = resp.json()
-        if not data:
-            break
-
-        all_data.extend(data)
-
-        if len(data) < page_size:
-            break  # Dernière page
-
-        offset += page_size
-        print(f"   📄 {len(all_data)} lignes chargées...")
+def get_cards_metadata(set_code, fmt):
+    """Charge les métadonnées de card_list et les stats de card_stats, et construit le FormatContext"""
+    return FormatContext(get_card_meta(set_code, fmt))
 
-    return all_data
+@phase("fetch")
+def get_card_meta(set_code, fmt):
+    """Métadonnées de card_list jointes aux stats globales de card_stats : {nom: ligne}, dans l'ordre de card_list"""
+    snapshot = load_snapshot(set_code, fmt) if USE_SNAPSHOT else None
+    if snapshot is not None:
+        print(f"🗄️ Métadonnées et stats de {set_code} ({fmt}) lues dans le snapshot local")
+        return merge_card_meta(snapshot.card_list_rows(), snapshot.card_stats_rows("Global"))
 
-def get_cards_metadata(set_code, fmt):
-    """Charge toutes les métadonnées de card_list et les stats de card_stats"""
     print(f"🔍 Chargement des métadonnées (card_list) pour {set_code}...")
-    metadata_rows = fetch_data("card_list", f"set_code=eq.{set_code}&select=*")
+    metadata_rows = fetch_all("card_list", f"set_code=eq.{set_code}", columns=CARD_LIST_COLUMNS, key="card_name")
     
     print(f"📊 Chargement des stats (card_stats) pour {set_code} ({fmt})...")
     # On filtre IMPÉRATIVEMENT sur filter_context=Global pour avoir les stats globales de la carte
     # (Confirmé par etl_script.py:220)
-    stats_rows = fetch_data("card_stats", f"set_code=eq.{set_code}&format=eq.{fmt}&filter_context=eq.Global&select=card_name,alsa,gih_wr")
-    
-    stats_map = {s['card_name']: s for s in stats_rows}
+    stats_rows = fetch_all("card_stats", f"set_code=eq.{set_code}&format=eq.{fmt}&filter_context=eq.Global", columns=["card_name", "alsa", "gih_wr"], key="card_name")
+    return merge_card_meta(metadata_rows, stats_rows)
+
+def merge_card_meta(metadata_rows, stats_rows):
+    """Jointure card_list / card_stats (Global) : {nom: ligne card_list + alsa, gih_wr}"""
+    # Jointure sur les IDs : les noms 17lands (face avant, sans accents) rejoignent ceux de card_list
+    resolver = CardNameResolver(card['card_name'] for card in metadata_rows)
+    stats_by_id = {}
+    for s in stats_rows:
+        card_id = resolver.resolve(s['card_name'])
+        if card_id is None: continue
+        if card_id not in stats_by_id or s['card_name'] == resolver.names[card_id]:
+            stats_by_id[card_id] = s
     
     merged_data = {}
-    for card in metadata_rows:
+    for card_id, card in enumerate(metadata_rows):
         name = card['card_name']
-        stats = stats_map.get(name, {})
+        stats = stats_by_id.get(card_id, {})
         
         merged_data[name] = {
             **card,
@@ -90,39 +129,245 @@ def get_cards_metadata(set_code, fmt):
     return merged_data
 
 def get_trophy_decks(set_code, fmt):
+    snapshot = load_snapshot(set_code, fmt) if USE_SNAPSHOT else None
+    if snapshot is not None:
+        print(f"🗄️ {snapshot.n_decks} trophy decks de {set_code} ({fmt}) lus dans le snapshot local")
+        return snapshot.deck_rows()
     print(f"🏆 Chargement des trophy decks pour {set_code} ({fmt})...")
-    return fetch_data("trophy_decks", f"set_code=eq.{set_code}&format=eq.{fmt}&select=*")
+    return fetch_all(
+        "trophy_decks", f"set_code=eq.{set_code}&format=eq.{fmt}",
+        columns=["aggregate_id", "archetype", "trophy_time", "cardlist"], key="aggregate_id", parallel=True
+    )
 
-def get_archetype_synergies(set_code, fmt):
-    """Charge les scores de synergie significatifs"""
-    print("🔗 Chargement des scores de synergie...")
+@phase("fetch")
+def get_existing_skeletons(set_code, fmt):
+    """
+    État stocké par archétype :
+    - empreintes (ensemble des empreintes de ses lignes principal + variantes)
+    - centroïdes des variantes (listes de noms de cartes, dans l'ordre des variant_index ; un seul si non découpé)
+    - nombre de decks lors de la dernière recherche complète des variantes
+    """
+    rows = fetch_all(
+        "archetypal_skeletons", f"set_code=eq.{set_code}&format=eq.{fmt}",
+        columns=["archetype_name", "variant_index", "fingerprint", "centroid_cards", "searched_decks"],
+        key=("archetype_name", "variant_index")
+    )
+    fingerprints = {}
+    centroids = {}
+    searched = {}
+    for row in sorted(rows, key=lambda r: (r['archetype_name'], r.get('variant_index') or 0)):
+        fingerprints.setdefault(row['archetype_name'], set()).add(row.get('fingerprint'))
+        centroids.setdefault(row['archetype_name'], []).append(row.get('centroid_cards'))
+        if row.get('searched_decks'):
+            searched[row['archetype_name']] = row['searched_decks']
+
+    # Warm start possible seulement si chaque variante a son centroïde
+    centroids = {arch: c for arch, c in centroids.items() if all(c)}
+    return fingerprints, centroids, searched
+
+def load_daily_rollups(set_code, fmt, features):
+    """Rollups quotidiens (trophy_rollups.py), recalculés depuis les decks en mémoire si les tables sont illisibles"""
+    try:
+        return get_daily_rollups(set_code, fmt)
+    except FetchError as e:
+        print(f"   ⚠️ Rollups quotidiens illisibles ({e}), recalcul depuis les trophy decks")
+        return rollups_from_decks([f.deck for f in features])
+
+@phase("fetch")
+def get_synergy_rows(set_code, fmt, as_of=None):
+    """Scores de synergie significatifs (ceux calculés à la date as_of si fournie)"""
+    print(f"🔗 Chargement des scores de synergie{f' (as-of {as_of})' if as_of else ''}...")
     # On ne prend que les synergies positives pour ne pas biaiser négativement
-    return fetch_data("synergy_scores", f"set_code=eq.{set_code}&format=eq.{fmt}&synergy_score=gt.0&select=card_a,card_b,synergy_score")
+    table, filters = "synergy_scores", f"set_code=eq.{set_code}&format=eq.{fmt}&synergy_score=gt.0"
+    if as_of:
+        table, filters = "synergy_scores_history", f"{filters}&as_of=eq.{as_of}"
+    return fetch_all(table, filters, columns=["card_a", "card_b", "synergy_score"], key=("card_a", "card_b"))
+
+def get_archetype_synergies(set_code, fmt, ctx, as_of=None):
+    """Charge les scores de synergie et les indexe par ID de carte"""
+    rows = get_synergy_rows(set_code, fmt, as_of)
+    index = build_synergy_index(rows, ctx)
+    print(f"   ✅ {len(rows)} paires indexées sur {len(index)} cartes.")
+    return index
+
+def build_synergy_index(synergy_rows, ctx):
+    """
+    Index d'adjacence ID de carte -> [(ID partenaire, score)], construit une fois par (set, format).
+    Seules les cartes de card_list sont indexées (les seules candidates d'un squelette).
+    """
+    index = {}
+    resolve, n_known = ctx.resolve, ctx.n_known
+    for syn in synergy_rows:
+        ca, cb, score = resolve(syn['card_a']), resolve(syn['card_b']), float(syn['synergy_score'])
+        if ca is None or cb is None or ca >= n_known or cb >= n_known: continue
+        index.setdefault(ca, []).append((cb, score))
+        index.setdefault(cb, []).append((ca, score))
+    return index
+
+def synergy_generation(synergy_index):
+    """Empreinte du contenu de l'index de synergies (indépendante de l'ordre de chargement)"""
+    edges = sorted((card, partner, score) for card, adj in synergy_index.items() for partner, score in adj)
+    return hashlib.sha1(json.dumps(edges).encode()).hexdigest()[:16]
 
 # ==============================================================================
 # 3. HELPERS POUR ANALYSE AVANCÉE
 # ==============================================================================
 
-def get_trophy_weight(trophy_time):
-    """Calcule le poids d'un trophy deck selon son ancienneté (Meta-Shift)"""
-    if not trophy_time:
+class FormatContext:
+    """
+    Valeurs constantes d'un set/format, calculées une seule fois dans get_cards_metadata.
+    Les tableaux sont indexés par ID de carte : les IDs < n_known suivent l'ordre de card_list,
+    les noms inconnus rencontrés dans les trophy decks reçoivent les IDs suivants (intern).
+    Les autres écritures d'une carte de card_list (face avant, accents) reçoivent son ID.
+    """
+
+    def __init__(self, card_meta):
+        self.meta = card_meta
+        self.resolver = CardNameResolver(card_meta)
+        self.names = self.resolver.names # Partagée : intern y ajoute les noms inconnus
+        self.n_known = len(self.names)
+        # Version des métadonnées (card_list + stats), utilisée dans les empreintes d'archétype
+        self.version = hashlib.sha1(json.dumps(card_meta, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+        self.is_land = []
+        self.is_basic = []
+        self.is_creature = []
+        self.cmc = []      # CMC plafonné à 7 (0 pour les terrains)
+        self.pips = []     # parse_mana_pips(card_cost)
+        self.alsa = []
+        self.gih_wr = []
+        self.is_common = []
+        for name in self.names:
+            meta = card_meta[name]
+            c_type = meta.get('card_type') or ''
+            is_land = 'Land' in c_type
+            self.is_land.append(is_land)
+            self.is_basic.append('Basic' in c_type or is_basic_land(name))
+            self.is_creature.append('Creature' in c_type)
+            self.cmc.append(0 if is_land else min(int(meta.get('card_cmc') or 0), 7))
+            self.pips.append(parse_mana_pips(meta.get('card_cost')))
+            self.alsa.append(meta.get('alsa'))
+            self.gih_wr.append(meta.get('gih_wr'))
+            self.is_common.append(meta.get('rarity') == 'common')
+
+        # Moyennes du format
+        all_alsas = [a for a in self.alsa if a is not None]
+        self.avg_alsa = statistics.mean(all_alsas) if all_alsas else 4.0
+        print(f"   📊 ALSA moyen du format: {self.avg_alsa:.2f} (sur {len(all_alsas)} cartes)")
+
+        all_wrs = [wr for wr in self.gih_wr if wr]
+        self.avg_gih_wr = statistics.mean(all_wrs) if all_wrs else 55.0
+        print(f"   📊 GIH WR moyen du format: {self.avg_gih_wr:.2f}% (sur {len(all_wrs)} cartes)")
+
+    def resolve(self, name):
+        """ID d'une carte (nom exact ou alias), None si elle n'a jamais été vue"""
+        return self.resolver.resolve(name)
+
+    def intern(self, name):
+        """ID d'une carte, en ajoutant les noms inconnus de card_list à la suite"""
+        return self.resolver.intern(name)
+
+def get_trophy_weight(dt, now):
+    """
+    Calcule le poids d'un trophy deck selon son ancienneté (Meta-Shift).
+    Ancienneté en jours calendaires UTC : même poids pour tous les decks d'un jour, donc identique
+    au poids des rollups quotidiens (rollup_frequencies) utilisés pour la fréquence des cartes.
+    """
+    if dt is None:
         return 0.5
     
-    try:
-        if trophy_time.endswith('Z'):
-            trophy_time = trophy_time[:-1] + '+00:00'
-        dt = datetime.fromisoformat(trophy_time)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-            
-        now = datetime.now(timezone.utc)
-        age_days = (now - dt).days
-        
-        if age_days <= 7: return 1.0    # Semaine en cours
-        if age_days <= 14: return 0.75 # J-7 à J-14
-        return 0.5                     # Plus de 14 jours
-    except:
-        return 0.5
+    age_days = (now.date() - dt.date()).days
+    
+    if age_days <= 7: return 1.0    # Semaine en cours
+    if age_days <= 14: return 0.75 # J-7 à J-14
+    return 0.5                     # Plus de 14 jours
+
+# Enregistrement compact d'un deck, calculé une seule fois par set/format
+DeckFeatures = namedtuple('DeckFeatures', [
+    'deck',         # Ligne trophy_decks d'origine
+    'weight',       # Poids Meta-Shift (get_trophy_weight)
+    'time',         # trophy_time parsé (datetime UTC ou None)
+    'total_cards',  # Nombre total de cartes (y compris inconnues)
+    'lands',        # Terrains (cartes connues)
+    'creatures',    # Créatures (cartes connues)
+    'curve',        # Sorts par CMC 0..7 (cartes connues, hors terrains)
+    'card_ids',     # IDs des cartes (ordre de la cardlist)
+    'quantities',   # Quantités alignées sur card_ids
+])
+
+@phase("parse")
+def featurize_decks(decks, ctx, now=None):
+    """
+    Pré-calcule les DeckFeatures de tous les decks d'un set/format (un seul parsing par deck).
+    Les noms sont résolus une fois en IDs (alias compris) ; bilan du matching avec card_list affiché une fois.
+    """
+    now = now or datetime.now(timezone.utc)
+    n_known, intern = ctx.n_known, ctx.resolver.intern
+    is_land, is_creature, cmc = ctx.is_land, ctx.is_creature, ctx.cmc
+
+    features = []
+    seen = set()
+    for d in decks:
+        dt = parse_trophy_time(d.get('trophy_time'))
+        card_ids = []
+        quantities = []
+        lands = 0
+        creatures = 0
+        curve = [0] * 8
+        for name, qty in d.get('cardlist', {}).items():
+            card_id = intern(name)
+            card_ids.append(card_id)
+            quantities.append(qty)
+
+            if card_id >= n_known: continue
+            if is_land[card_id]:
+                lands += qty
+            else:
+                curve[cmc[card_id]] += qty
+                if is_creature[card_id]:
+                    creatures += qty
+
+        seen.update(card_ids)
+        if len(set(card_ids)) < len(card_ids):
+            # Deux écritures de la même carte dans un deck ("Fire" et "Fire // Ice") : quantités cumulées
+            merged = {}
+            for card_id, qty in zip(card_ids, quantities):
+                merged[card_id] = merged.get(card_id, 0) + qty
+            card_ids, quantities = list(merged), list(merged.values())
+        features.append(DeckFeatures(
+            d, get_trophy_weight(dt, now), dt, sum(quantities),
+            lands, creatures, tuple(curve), tuple(card_ids), tuple(quantities)
+        ))
+
+    matched = sum(1 for card_id in seen if card_id < n_known)
+    aliased = len(ctx.resolver.ids) - len(ctx.names)
+    print(f"   🔍 Matching: {matched}/{len(seen)} cartes des trophy decks trouvées dans card_list ({aliased} écritures par alias)")
+    unknown = sorted(ctx.names[card_id] for card_id in seen if card_id >= n_known and not is_basic_land(ctx.names[card_id]))
+    if unknown:
+        print(f"      ⚠️ {len(unknown)} cartes hors card_list (exclues des squelettes) : {unknown[:10]}")
+
+    return features
+
+def sparse_vecmat(row_weights, rows):
+    """
+    Produit vecteur × matrice creuse : Σ_i row_weights[i] · rows[i], avec rows[i] = (indices, valeurs).
+    Les lignes de poids nul sont ignorées ; l'ordre des colonnes suit leur première apparition.
+    """
+    acc = {}
+    for w, (indices, values) in zip(row_weights, rows):
+        if not w: continue
+        for col, value in zip(indices, values):
+            acc[col] = acc.get(col, 0) + w * value
+    return acc
+
+def dense_vecmat(row_weights, rows, width):
+    """Produit vecteur × matrice dense (lignes de largeur fixe), lignes de poids nul ignorées"""
+    acc = [0] * width
+    for w, row in zip(row_weights, rows):
+        if not w: continue
+        for col in range(width):
+            acc[col] += row[col] * w
+    return acc
 
 def parse_mana_pips(mana_cost):
     """Extrait le nombre de symboles colorés d'un coût de mana (ex: {1}{W}{U} -> {'W':1, 'U':1})"""
@@ -134,202 +379,389 @@ def parse_mana_pips(mana_cost):
         pips[symbol] = mana_cost.count(f"{{{symbol}}}")
     return pips
 
-def jaccard_sim(s1, s2):
-    """Calcule la similarité de Jaccard entre deux ensembles."""
-    u = s1 | s2
-    if not u: return 0
-    return len(s1 & s2) / len(u)
-
-def cluster_decks(decks):
-    """Sépare les decks en deux clusters si pertinent (Jaccard Similarity + K-means itératif)"""
-    if len(decks) < 40: # Pas assez de données pour clusteriser proprement
-        return decks, []
-
-    # Seed fixe pour résultats reproductibles (même données → même clustering)
-    random.seed(42)
+def encode_deck_bitsets(decks, card_names):
+    """
+    Encode chaque deck (DeckFeatures) en bitset (int) sur le vocabulaire de cartes de l'archétype (sans basics).
+    Retourne (bitsets, positions des cartes par deck, vocabulaire card_id -> position).
+    """
+    vocab = {}
+    excluded = set()
+    bitsets = []
+    deck_card_ids = []
+
+    for f in decks:
+        bits = 0
+        ids = []
+        for card_id in f.card_ids:
+            pos = vocab.get(card_id)
+            if pos is None:
+                if card_id in excluded: continue
+                # Filtre basics évalué une seule fois par carte
+                if is_basic_land(card_names[card_id]):
+                    excluded.add(card_id)
+                    continue
+                pos = vocab[card_id] = len(vocab)
+            bits |= 1 << pos
+            ids.append(pos)
+        bitsets.append(bits)
+        deck_card_ids.append(ids)
+
+    return bitsets, deck_card_ids, vocab
+
+def jaccard_bits(a, b, size_a, size_b):
+    """Similarité de Jaccard entre deux bitsets dont on connaît déjà le popcount."""
+    inter = (a & b).bit_count()
+    union = size_a + size_b - inter
+    if not union: return 0
+    return inter / union
+
+def pairwise_jaccard_distances(deck_bits):
+    """Matrice (n x n) des distances de Jaccard, calculée une seule fois par archétype"""
+    n = len(deck_bits)
+    sizes = [b.bit_count() for b in deck_bits]
+    rows = [array('d', bytes(8 * n)) for _ in range(n)]
+    for i in range(n):
+        bits_i, size_i, row_i = deck_bits[i], sizes[i], rows[i]
+        for j in range(i + 1, n):
+            dist = 1 - jaccard_bits(bits_i, deck_bits[j], size_i, sizes[j])
+            row_i[j] = dist
+            rows[j][i] = dist
+    return rows
+
+def init_medoids(dist, k, rng):
+    """Initialisation k-medoids++ : deck le plus central, puis tirage proportionnel à D²"""
+    n = len(dist)
+    first = min(range(n), key=lambda i: sum(dist[i]))
+    medoids = [first]
+    nearest = list(dist[first])
+
+    while len(medoids) < k:
+        total = sum(d * d for d in nearest)
+        if total == 0: break # Tous les decks sont identiques à un medoid
+        target = rng.random() * total
+        acc = 0
+        pick = None
+        for i, d in enumerate(nearest):
+            if d <= 0: continue
+            pick = i
+            acc += d * d
+            if acc >= target: break
+        medoids.append(pick)
+        nearest = [min(a, b) for a, b in zip(nearest, dist[pick])]
+
+    return medoids
+
+def k_medoids(dist, k, rng):
+    """
+    K-medoids (itération alternée) sur une matrice de distances précalculée.
+    Retourne (membres de chaque cluster, coût total = somme des distances au medoid).
+    """
+    n = len(dist)
+    medoids = init_medoids(dist, k, rng)
+    members = [list(range(n))]
+
+    for iteration in range(MAX_KMEDOIDS_ITER):
+        # Assign : chaque deck au medoid le plus proche (égalité -> plus petit index)
+        medoid_rows = [dist[m] for m in medoids]
+        members = [[] for _ in medoids]
+        for i in range(n):
+            best_c, best_d = 0, medoid_rows[0][i]
+            for c in range(1, len(medoid_rows)):
+                d = medoid_rows[c][i]
+                if d < best_d:
+                    best_c, best_d = c, d
+            members[best_c].append(i)
+
+        # Update : le medoid devient le membre qui minimise la somme des distances du cluster
+        changed = False
+        for c, group in enumerate(members):
+            if not group: continue
+            best_m = medoids[c]
+            best_cost = sum(map(dist[best_m].__getitem__, group))
+            for i in group:
+                cost = sum(map(dist[i].__getitem__, group))
+                if cost < best_cost:
+                    best_m, best_cost = i, cost
+            if best_m != medoids[c]:
+                medoids[c] = best_m
+                changed = True
+
+        if not changed:
+            break
 
-    # 1. Représentation des decks par sets de noms de cartes (sans basics)
-    deck_sets = []
-    for d in decks:
-        s = set(name for name in d.get('cardlist', {}).keys() if 'Island' not in name and 'Plains' not in name and 'Swamp' not in name and 'Mountain' not in name and 'Forest' not in name)
-        deck_sets.append(s)
-
-    # 2. Seed selection sur échantillon (évite le biais des premiers decks)
-    sample_size = min(50, len(deck_sets))
-    sample_indices = random.sample(range(len(deck_sets)), sample_size)
-
-    c1_idx, c2_idx = 0, 1
-    max_dist = 0
-    for i in sample_indices:
-        for j in sample_indices:
-            if i >= j: continue
-            dist = 1 - jaccard_sim(deck_sets[i], deck_sets[j])
-            if dist > max_dist:
-                max_dist, c1_idx, c2_idx = dist, i, j
-
-    # 3. K-means itératif (3 itérations pour stabiliser)
-    assignments = [0] * len(deck_sets)
-    centroids = [deck_sets[c1_idx], deck_sets[c2_idx]]
-
-    for iteration in range(3):
-        # Assign : chaque deck au centroïde le plus proche
-        for i, s in enumerate(deck_sets):
-            sim1 = jaccard_sim(s, centroids[0])
-            sim2 = jaccard_sim(s, centroids[1])
-            assignments[i] = 0 if sim1 >= sim2 else 1
-
-        # Update centroids : union des cartes présentes dans >50% du cluster
-        for c_id in [0, 1]:
-            cluster_indices = [i for i, a in enumerate(assignments) if a == c_id]
-            if not cluster_indices:
-                continue
-            card_counts = Counter()
-            for idx in cluster_indices:
-                card_counts.update(deck_sets[idx])
-            threshold = len(cluster_indices) * 0.5
-            centroids[c_id] = set(card for card, cnt in card_counts.items() if cnt >= threshold)
-
-    cluster1 = [decks[i] for i, a in enumerate(assignments) if a == 0]
-    cluster2 = [decks[i] for i, a in enumerate(assignments) if a == 1]
-
-    # 4. Vérification des seuils (15% et >= 20 trophées)
+    cost = sum(sum(map(dist[m].__getitem__, group)) for m, group in zip(medoids, members))
+    return members, cost
+
+def silhouette_score(dist, members):
+    """Silhouette moyenne d'un partitionnement (réutilise la matrice de distances)"""
+    groups = [g for g in members if g]
+    if len(groups) < 2: return -1
+
+    total = 0.0
+    for own, group in enumerate(groups):
+        size = len(group)
+        if size == 1: continue # s(i) = 0 pour un singleton
+        for i in group:
+            row = dist[i]
+            a = sum(map(row.__getitem__, group)) / (size - 1)
+            b = min(sum(map(row.__getitem__, other)) / len(other) for c, other in enumerate(groups) if c != own)
+            denom = max(a, b)
+            if denom > 0:
+                total += (b - a) / denom
+
+    return total / sum(len(g) for g in groups)
+
+def get_top_spells(group, deck_card_ids, top_n=15):
+    """Piliers d'un cluster : les cartes (hors basics) présentes dans le plus de decks"""
+    counts = Counter()
+    for idx in group:
+        counts.update(deck_card_ids[idx])
+    return set(card_id for card_id, _ in counts.most_common(top_n))
+
+def check_split(members, total, deck_card_ids):
+    """
+    Validation métier d'un découpage : taille des variantes puis overlap des piliers.
+    Retourne l'overlap max entre variantes, ou None si le découpage est rejeté.
+    """
+    k = len(members)
+
+    # Vérification des seuils (15% et >= 20 trophées par variante)
+    smallest = min(len(g) for g in members)
+    if smallest < MIN_CLUSTER_DECKS or smallest / total < MIN_CLUSTER_SHARE:
+        print(f"      ⚠️ k={k} : cluster trop petit ({smallest} decks, {100*smallest/total:.0f}%)")
+        return None
+
+    # Vérification de la différenciation par overlap des piliers
+    # C'est le vrai test métier : les groupes ont-ils des cartes clés différentes ?
+    tops = [get_top_spells(g, deck_card_ids) for g in members]
+    overlap = max(len(tops[a] & tops[b]) for a in range(k) for b in range(a + 1, k))
+    if overlap > MAX_PILLAR_OVERLAP:
+        print(f"      ⚠️ k={k} : trop similaire ({overlap}/15 piliers communs, seuil={MAX_PILLAR_OVERLAP})")
+        return None
+    return overlap
+
+def group_centroid(group, deck_card_ids):
+    """Centroïde d'un groupe : ses cartes les plus fréquentes, autant que la taille médiane de ses decks"""
+    size = int(statistics.median(len(deck_card_ids[idx]) for idx in group))
+    return get_top_spells(group, deck_card_ids, top_n=max(size, 1))
+
+def assign_to_centroids(deck_bits, deck_sizes, centroids):
+    """Affecte chaque deck au centroïde (bits, taille) le plus similaire (égalité -> plus petit index)"""
+    labels = []
+    for bits, size in zip(deck_bits, deck_sizes):
+        best_c, best_s = 0, -1
+        for c, (c_bits, c_size) in enumerate(centroids):
+            sim = jaccard_bits(bits, c_bits, size, c_size)
+            if sim > best_s:
+                best_c, best_s = c, sim
+        labels.append(best_c)
+    return labels
+
+def warm_start_clusters(deck_bits, deck_card_ids, centroids):
+    """
+    K-means sur Jaccard initialisé sur les centroïdes du run précédent (bits, taille) : O(n x k) par
+    itération, sans matrice de distances. Retourne (membres, drift = part des decks dont la
+    variante finale diffère de leur affectation initiale aux anciens centroïdes).
+    """
+    n, k = len(deck_bits), len(centroids)
+    sizes = [b.bit_count() for b in deck_bits]
+    initial = labels = assign_to_centroids(deck_bits, sizes, centroids)
+
+    for iteration in range(MAX_KMEDOIDS_ITER):
+        members = [[] for _ in range(k)]
+        for i, label in enumerate(labels):
+            members[label].append(i)
+        if not all(members): break # Variante vidée : le re-clustering complet tranchera
+
+        centroids = []
+        for group in members:
+            positions = group_centroid(group, deck_card_ids)
+            centroids.append((sum(1 << pos for pos in positions), len(positions)))
+        new_labels = assign_to_centroids(deck_bits, sizes, centroids)
+        if new_labels == labels: break
+        labels = new_labels
+
+    members = [[] for _ in range(k)]
+    for i, label in enumerate(labels):
+        members[label].append(i)
+    drift = sum(a != b for a, b in zip(initial, labels)) / n
+    return members, drift
+
+@phase("compute")
+def cluster_decks(decks, ctx, previous_centroids=None, searched_decks=None):
+    """
+    Découpe un archétype en variantes.
+    - Archétype non découpé au run précédent (un seul centroïde) : pas de nouvelle recherche tant que
+      son nombre de decks a varié de moins de MAX_UNSPLIT_CHANGE depuis la dernière (searched_decks).
+    - Warm start : si le run précédent a laissé des centroïdes de variantes, les decks y sont réaffectés
+      (ordre des variantes conservé) ; re-clustering complet si le drift ou la validation échoue.
+    - Sinon : k-medoids sur distances de Jaccard, k choisi par silhouette, le plus grand groupe en premier.
+    Retourne (groupes de decks, centroïdes en noms de cartes ou None sous MIN_DECKS_FOR_CLUSTERING,
+    nombre de decks de la dernière recherche complète).
+    """
     total = len(decks)
-    smaller, larger = (cluster1, cluster2) if len(cluster1) < len(cluster2) else (cluster2, cluster1)
-
-    if len(smaller) >= 20 and len(smaller) / total >= 0.15:
-        # 5. Vérification de la différenciation par overlap des piliers
-        # C'est le vrai test métier : les deux groupes ont-ils des cartes clés différentes ?
-        def get_top_spells(group):
-            counts = Counter()
-            for d in group:
-                for name in d.get('cardlist', {}).keys():
-                    if 'Island' not in name and 'Plains' not in name and 'Swamp' not in name and 'Mountain' not in name and 'Forest' not in name:
-                        counts[name] += 1
-            return set(name for name, _ in counts.most_common(15))
-
-        top1 = get_top_spells(larger)
-        top2 = get_top_spells(smaller)
-
-        overlap = len(top1 & top2)
-        if overlap <= 9: # Moins de 60% d'overlap sur les piliers (9/15)
-            print(f"      ✅ Clustering validé : {len(smaller)} decks alternatifs, overlap={overlap}/15 piliers")
-            return larger, smaller
-        else:
-            print(f"      ⚠️ Archétype alternatif rejeté : trop similaire ({overlap}/15 piliers communs, seuil=9)")
-    elif len(smaller) >= 20:
-        print(f"      ⚠️ Cluster trop petit : {len(smaller)} decks ({100*len(smaller)/total:.0f}% < 15%)")
+    if total < MIN_DECKS_FOR_CLUSTERING: # Pas assez de données pour clusteriser proprement
+        return [decks], None, None
+
+    # 1. Représentation des decks par bitsets (sans basics)
+    deck_bits, deck_card_ids, vocab = encode_deck_bitsets(decks, ctx.names)
+    card_by_pos = list(vocab)
+
+    def names_of(group):
+        return sorted(ctx.names[card_by_pos[pos]] for pos in group_centroid(group, deck_card_ids))
+
+    # 2. Non découpé au run précédent et peu de decks ajoutés : la recherche O(n²) est sautée
+    if previous_centroids and len(previous_centroids) == 1 and searched_decks:
+        change = abs(total - searched_decks) / searched_decks
+        if change <= MAX_UNSPLIT_CHANGE:
+            print(f"      ♻️ Non découpé au run précédent ({searched_decks} -> {total} decks) : recherche des variantes sautée")
+            return [decks], [names_of(range(total))], searched_decks
+        print(f"      🔄 {searched_decks} -> {total} decks depuis la dernière recherche ({100*change:.0f}% > {100*MAX_UNSPLIT_CHANGE:.0f}%), nouvelle recherche")
+
+    # 3. Warm start depuis les centroïdes précédents
+    members = None
+    if previous_centroids and len(previous_centroids) >= 2 and total >= len(previous_centroids) * MIN_CLUSTER_DECKS:
+        centroids = []
+        for names in previous_centroids:
+            bits, size = 0, 0
+            for name in set(names):
+                pos = vocab.get(ctx.resolve(name))
+                if pos is not None: bits |= 1 << pos
+                size += 1 # Une carte absente des decks compte quand même dans l'union
+            centroids.append((bits, size))
+
+        warm_members, drift = warm_start_clusters(deck_bits, deck_card_ids, centroids)
+        k = len(warm_members)
+        if drift > MAX_ASSIGNMENT_DRIFT:
+            print(f"      🔄 k={k} : drift {100*drift:.0f}% > {100*MAX_ASSIGNMENT_DRIFT:.0f}%, re-clustering complet")
+        elif all(warm_members) and check_split(warm_members, total, deck_card_ids) is not None:
+            members = warm_members
+            print(f"      ♻️ Warm start validé : {k} variantes {[len(g) for g in members]}, drift={100*drift:.0f}%")
+
+    # 4. Recherche complète : distances calculées une seule fois, essai de chaque k, sélection par silhouette
+    if members is None:
+        dist = pairwise_jaccard_distances(deck_bits)
+        best = None
+        for k in range(2, MAX_VARIANTS + 1):
+            if total < k * MIN_CLUSTER_DECKS: break
+
+            # Seed fixe pour résultats reproductibles (même données → même clustering)
+            rng = random.Random(42)
+            candidate, _ = min((k_medoids(dist, k, rng) for _ in range(KMEDOIDS_RESTARTS)), key=lambda r: r[1])
+
+            overlap = check_split(candidate, total, deck_card_ids)
+            if overlap is None: continue
+
+            score = silhouette_score(dist, candidate)
+            print(f"      🔎 k={k} : silhouette={score:.3f}, overlap max={overlap}/15 piliers")
+            if score > MIN_SILHOUETTE and (best is None or score > best[0]):
+                best = (score, k, candidate)
+
+        searched_decks = total
+        if best is None:
+            # Centroïde unique conservé : le prochain run saute la recherche si l'archétype a peu bougé
+            return [decks], [names_of(range(total))], searched_decks
+
+        score, k, members = best
+        members = sorted(members, key=len, reverse=True)
+        print(f"      ✅ Clustering validé : {k} variantes {[len(g) for g in members]}, silhouette={score:.3f}")
+
+    # 5. Centroïdes finaux (noms de cartes), point de départ du prochain run
+    centroids = [names_of(g) for g in members]
+    return [[decks[i] for i in g] for g in members], centroids, searched_decks or total
 
-    return decks, []
 
 # ==============================================================================
 # 4. ALGORITHME DE CALCUL DES SQUELETTES
 # ==============================================================================
 
-def build_archetype_skeleton(archetype, decks, card_meta, synergy_data, set_code, format_name, is_alternative=False, format_avg_wr=55.0):
+def representative_deck_id(decks, skeleton_ids, ctx):
+    """
+    aggregate_id du trophy deck le plus proche du squelette (Jaccard sur les cartes hors terrains de base),
+    point d'entrée du front vers les decks similaires précalculés (trophy_deck_neighbors).
+    """
+    def non_basic(card_ids):
+        return {
+            card_id for card_id in card_ids
+            if not (ctx.is_basic[card_id] if card_id < ctx.n_known else is_basic_land(ctx.names[card_id]))
+        }
+
+    target = non_basic(skeleton_ids)
+    scored = []
+    for f in decks:
+        agg_id = f.deck.get('aggregate_id')
+        if agg_id is None: continue
+        cards = non_basic(f.card_ids)
+        union = len(cards | target)
+        scored.append((-(len(cards & target) / union if union else 0), agg_id))
+    return min(scored)[1] if scored else None
+
+@phase("compute")
+def build_archetype_skeleton(archetype, decks, ctx, synergy_index, set_code, format_name, variant_index=0, frequencies=None, now=None):
     """
-    Calcule le squelette pour un archétype donné, pondéré par la synergie.
+    Calcule le squelette pour un archétype donné (liste de DeckFeatures), pondéré par la synergie.
+    frequencies : fréquences issues des rollups quotidiens (rollup_frequencies), utilisées à la place
+    du parcours des decks pour les scores de fréquence et le trending quand elles sont fournies.
+    now : date de référence du trending (calcul "as-of"), maintenant par défaut.
     """
     if not decks: return None
 
-    # Debug: Vérifier le matching des noms de cartes
-    all_deck_cards = set()
-    for d in decks:
-        all_deck_cards.update(d.get('cardlist', {}).keys())
-    matched = sum(1 for c in all_deck_cards if c in card_meta)
-    print(f"      🔍 Matching: {matched}/{len(all_deck_cards)} cartes trouvées dans card_stats")
-
-    # 1. Analyse des stats de base (Fréquence, Courbe, Ratio, Terrains)
-    all_cards_in_decks = []
-    curves = []
-    creature_counts = []
-    land_counts = []
-    
-    for d in decks:
-        weight = get_trophy_weight(d.get('trophy_time'))
-        cardlist = d.get('cardlist', {})
-        total_cards = sum(cardlist.values())
-        if total_cards < 35: continue
-        
-        creatures = 0
-        lands = 0
-        mana_dist = Counter()
-        for name, qty in cardlist.items():
-            meta = card_meta.get(name)
-            if not meta: continue
-            
-            # Utilisation du poids pour compter les cartes
-            for _ in range(qty): 
-                all_cards_in_decks.extend([name] * (1 if weight == 1.0 else 0)) # Trick pour Counter pondéré plus tard
-                # Pour card_counts, on va utiliser une approche plus propre :
-                # On stocke (nom, poids) ou on accumule directement
-            
-            c_type = meta.get('card_type') or ''
-            is_land = 'Land' in c_type
-            
-            if is_land:
-                lands += qty
-            else:
-                cmc = min(int(meta.get('card_cmc') or 0), 7)
-                mana_dist[cmc] += qty
-                if 'Creature' in c_type: 
-                    creatures += qty
-        
-        curves.append((mana_dist, weight))
-        creature_counts.append((creatures, weight))
-        land_counts.append((lands, weight))
-
-    if not curves: return None
-
-    # Calcul des moyennes pondérées
-    def weighted_mean(data):
-        total_weight = sum(w for _, w in data)
-        if total_weight == 0: return 0
-        return sum(v * w for v, w in data) / total_weight
-
-    avg_curve = {str(i): 0.0 for i in range(8)}
-    for i in range(8):
-        vals = [(c[i], w) for c, w in curves]
-        avg_curve[str(i)] = round(weighted_mean(vals), 1)
-    
-    avg_creatures = weighted_mean(creature_counts)
-    avg_lands = weighted_mean(land_counts)
-    
-    # 2. Score de Fréquence Pondéré
-    card_weights_accum = Counter()
-    total_deck_weights = 0
-    for d in decks:
-        weight = get_trophy_weight(d.get('trophy_time'))
-        total_deck_weights += weight
-        for name, qty in d.get('cardlist', {}).items():
-            if name in card_meta:
-                card_weights_accum[name] += weight * qty
+    names, n_known, is_land = ctx.names, ctx.n_known, ctx.is_land
+
+    def by_id(counts_by_name):
+        """Compteurs par nom (rollups) -> par ID, cartes connues de card_list uniquement (alias cumulés)"""
+        counts = {}
+        for name, value in counts_by_name.items():
+            card_id = ctx.resolve(name)
+            if card_id is not None and card_id < n_known:
+                counts[card_id] = counts.get(card_id, 0) + value
+        return counts
+
+    # 1. Analyse des stats de base (Courbe, Ratio, Terrains)
+    # Vecteur de poids des decks complets (>= 35 cartes) × matrice deck × [courbe 0..7, créatures, terrains]
+    weights = [f.weight for f in decks]
+    full_weights = [f.weight if f.total_cards >= 35 else 0 for f in decks]
+    if not any(full_weights): return None
+
+    total_full_weight = sum(full_weights)
+    profile = dense_vecmat(full_weights, [f.curve + (f.creatures, f.lands) for f in decks], 10)
+
+    avg_curve = {str(i): round(profile[i] / total_full_weight, 1) for i in range(8)}
+    avg_creatures = profile[8] / total_full_weight
+    avg_lands = profile[9] / total_full_weight
     
-    max_freq_weighted = total_deck_weights
+    # 2. Score de Fréquence Pondéré : vecteur de poids × matrice deck × carte (quantités)
+    if frequencies:
+        # Rollups quotidiens : Σ_jours poids × copies, en O(jours × cartes)
+        weights_by_id = by_id(frequencies["weights"])
+        max_freq_weighted = frequencies["total_weight"]
+    else:
+        card_rows = [(f.card_ids, f.quantities) for f in decks]
+        weights_by_id = {card_id: w for card_id, w in sparse_vecmat(weights, card_rows).items() if card_id < n_known}
+        max_freq_weighted = sum(weights)
     
     # 3. Calcul de la Synergie "Cluster"
     # On identifie les 15 cartes les plus fréquentes selon les poids
-    pillars = [name for name, _ in card_weights_accum.most_common(15)]
+    pillars = [card_id for card_id, _ in Counter(weights_by_id).most_common(15)]
     
-    synergy_map = {}
-    for syn in synergy_data:
-        ca, cb, score = syn['card_a'], syn['card_b'], float(syn['synergy_score'])
-        if ca in pillars:
-            synergy_map[cb] = synergy_map.get(cb, []) + [score]
-        if cb in pillars:
-            synergy_map[ca] = synergy_map.get(ca, []) + [score]
+    # Seules les arêtes des piliers sont parcourues (O(piliers × degré))
+    synergy_sums = {}
+    synergy_counts = {}
+    for pillar in pillars:
+        for partner, score in synergy_index.get(pillar, ()):
+            synergy_sums[partner] = synergy_sums.get(partner, 0.0) + score
+            synergy_counts[partner] = synergy_counts.get(partner, 0) + 1
     
-    avg_synergy = {name: statistics.mean(scores) if scores else 0 for name, scores in synergy_map.items()}
+    avg_synergy = {card_id: synergy_sums[card_id] / count for card_id, count in synergy_counts.items()}
 
     # 4. Score Final Pondéré : 80% Fréquence + 20% Synergie
     candidates = []
-    for name, weighted_count in card_weights_accum.items():
-        if name not in card_meta: continue
-        
+    for card_id, weighted_count in weights_by_id.items():
         f_score = weighted_count / max_freq_weighted 
-        s_score = min(avg_synergy.get(name, 0) / 10, 1.0)
+        s_score = min(avg_synergy.get(card_id, 0) / 10, 1.0)
         
         weighted_score = (f_score * 0.8) + (s_score * 0.2)
-        candidates.append((name, weighted_score, card_meta[name]))
+        candidates.append((card_id, weighted_score))
 
     candidates.sort(key=lambda x: x[1], reverse=True)
 
@@ -339,18 +771,19 @@ def build_archetype_skeleton(archetype, decks, card_meta, synergy_data, set_code
     # Étape A: Les Terrains (Cible arrondie)
     # On ajoute d'abord les terrains non-basiques (bi-lands, etc.) qui sont fréquents
     target_lands = int(round(avg_lands))
-    land_candidates = [c for c in candidates if 'Land' in (c[2].get('card_type') or '')]
+    land_candidates = [card_id for card_id, _ in candidates if is_land[card_id]]
     lands_added = 0
     
     # On garde une trace des non-basiques ajoutés
-    for name, _, meta in land_candidates:
+    for card_id in land_candidates:
         if lands_added >= target_lands: break
-        if 'Basic' in (meta.get('card_type') or ''): continue # On gèrera les basics après
+        if ctx.is_basic[card_id]: continue # On gèrera les basics après
         
         # Pour les non-basiques, on respecte la fréquence
-        if card_weights_accum[name] / max_freq_weighted > 0.2: # Seulement si significatif
+        if weights_by_id[card_id] / max_freq_weighted > 0.2: # Seulement si significatif
+            meta = ctx.meta[names[card_id]]
             final_deck.append({
-                "name": name,
+                "name": names[card_id],
                 "cmc": 0,
                 "type": meta.get('card_type'),
                 "cost": "",
@@ -361,7 +794,7 @@ def build_archetype_skeleton(archetype, decks, card_meta, synergy_data, set_code
     # Étape B: Les Spells (Le reste jusqu'à 40)
     # IMPORTANT: On utilise target_lands (pas lands_added) car les basics seront ajoutés après
     target_spells = 40 - target_lands
-    spell_candidates = [c for c in candidates if 'Land' not in (c[2].get('card_type') or '')]
+    spell_candidates = [card_id for card_id, _ in candidates if not is_land[card_id]]
 
     # CALCUL DES QUOTAS BASÉS SUR LE RATIO D'ARCHÉTYPE
     # On veut respecter target_creatures = target_spells * ratio
@@ -373,15 +806,15 @@ def build_archetype_skeleton(archetype, decks, card_meta, synergy_data, set_code
     non_creatures_added = 0
     common_pairs_count = 0
     current_curve = Counter()
+    total_pips = Counter() # Pips des sorts sélectionnés (pour la Smart Mana Base)
     
     # PREMIÈRE PASSE : Essayer de respecter strictement les quotas tout en suivant la fréquence
-    for name, _, meta in spell_candidates:
+    for card_id in spell_candidates:
         if spells_added >= target_spells: break
         
-        c_type = meta.get('card_type') or ''
-        is_creature = 'Creature' in c_type
-        cmc = min(int(meta.get('card_cmc') or 0), 7)
-        is_common = meta.get('rarity') == 'common'
+        is_creature = ctx.is_creature[card_id]
+        cmc = ctx.cmc[card_id]
+        is_common = ctx.is_common[card_id]
 
         # Skip si on a déjà atteint le quota pour ce type (avec une marge de +1)
         if is_creature and creatures_added >= target_creatures + 1: continue
@@ -389,7 +822,7 @@ def build_archetype_skeleton(archetype, decks, card_meta, synergy_data, set_code
 
         qty = 1
         # Règle des 2 paires de communes
-        if is_common and common_pairs_count < 2 and card_weights_accum[name] > max_freq_weighted * 1.0:
+        if is_common and common_pairs_count < 2 and weights_by_id[card_id] > max_freq_weighted * 1.0:
             qty = 2
         
         # On vérifie qu'on ne dépasse pas le slot total de sorts ni le quota spécifique
@@ -399,15 +832,17 @@ def build_archetype_skeleton(archetype, decks, card_meta, synergy_data, set_code
         
         # On respecte la courbe
         if current_curve[cmc] < round(float(avg_curve[str(cmc)])) + 2:
+            meta = ctx.meta[names[card_id]]
             for _ in range(qty):
                 if spells_added < target_spells:
                     final_deck.append({
-                        "name": name,
+                        "name": names[card_id],
                         "cmc": cmc,
-                        "type": c_type,
+                        "type": meta.get('card_type') or '',
                         "cost": meta.get('card_cost'),
                         "rarity": meta.get('rarity')
                     })
+                    total_pips.update(ctx.pips[card_id])
                     current_curve[cmc] += 1
                     spells_added += 1
                     if is_creature: creatures_added += 1
@@ -415,13 +850,7 @@ def build_archetype_skeleton(archetype, decks, card_meta, synergy_data, set_code
                     if qty == 2 and _ == 0: common_pairs_count += 1
 
     # Étape C: Smart Mana Base (Compléter avec les basics)
-    # 1. Calculer les pips des sorts sélectionnés
-    total_pips = Counter()
-    for card in final_deck:
-        if 'Land' not in (card['type'] or ''):
-            total_pips.update(parse_mana_pips(card['cost']))
-    
-    # 2. Répartition des basics restants
+    # Répartition des basics restants selon les pips des sorts sélectionnés
     basic_map = {
         "W": "Plains", "U": "Island", "B": "Swamp", "R": "Mountain", "G": "Forest"
     }
@@ -471,23 +900,16 @@ def build_archetype_skeleton(archetype, decks, card_meta, synergy_data, set_code
     # = Cartes sous-estimées par les joueurs mais qui gagnent
     sleeper_cards = []
 
-    # D'abord, calculons l'ALSA moyen du format pour calibrer
-    all_alsas = [m.get('alsa') for m in card_meta.values() if m.get('alsa') is not None]
-    avg_alsa = statistics.mean(all_alsas) if all_alsas else 4.0
-    print(f"      📊 ALSA moyen du format: {avg_alsa:.2f} (sur {len(all_alsas)} cartes)")
+    # ALSA moyen du format pour calibrer (pré-calculé dans le FormatContext)
+    avg_alsa = ctx.avg_alsa
 
     sleeper_candidates = 0
-    for name, weighted_count in card_weights_accum.items():
-        meta = card_meta.get(name)
-        if not meta:
-            continue
-
-        # Ignorer les terrains (vérifier plusieurs noms de colonnes possibles)
-        c_type = meta.get('card_type') or meta.get('type_line') or ''
-        if 'Land' in c_type: continue
-        if 'Basic' in c_type: continue
+    for card_id, weighted_count in weights_by_id.items():
+        # Ignorer les terrains
+        if is_land[card_id]: continue
 
-        alsa = meta.get('alsa')
+        name = names[card_id]
+        alsa = ctx.alsa[card_id]
         # Fréquence pondérée
         frequency = weighted_count / max_freq_weighted
 
@@ -511,49 +933,34 @@ def build_archetype_skeleton(archetype, decks, card_meta, synergy_data, set_code
 
     # --- 6.2 TRENDING CARDS ---
     # Comparer fréquence dans les decks récents vs anciens
-    now = datetime.now(timezone.utc)
-    cutoff = now - timedelta(days=7)  # 7 derniers jours = récent
+    now = now or datetime.now(timezone.utc)
+    cutoff = (now - timedelta(days=7)).date()  # 7 derniers jours = récent (au jour près, comme les rollups)
 
-    recent_decks = []
-    old_decks = []
-    for d in decks:
-        trophy_time = d.get('trophy_time')
-        if trophy_time:
-            try:
-                if trophy_time.endswith('Z'):
-                    trophy_time = trophy_time[:-1] + '+00:00'
-                dt = datetime.fromisoformat(trophy_time)
-                if dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=timezone.utc)
-                if dt >= cutoff:
-                    recent_decks.append(d)
-                else:
-                    old_decks.append(d)
-            except:
-                old_decks.append(d)
-        else:
-            old_decks.append(d)
+    if frequencies:
+        n_recent, n_old = frequencies["n_recent"], frequencies["n_old"]
+    else:
+        recent_mask = [1 if f.time is not None and f.time.date() >= cutoff else 0 for f in decks]
+        n_recent = sum(recent_mask)
+        n_old = len(decks) - n_recent
 
     trending_cards = []
-    if len(recent_decks) >= 3 and len(old_decks) >= 3:
-        # Compter les fréquences dans chaque groupe
-        recent_counts = Counter()
-        old_counts = Counter()
-
-        for d in recent_decks:
-            for name in d.get('cardlist', {}).keys():
-                if name in card_meta and 'Land' not in (card_meta[name].get('card_type') or ''):
-                    recent_counts[name] += 1
-
-        for d in old_decks:
-            for name in d.get('cardlist', {}).keys():
-                if name in card_meta and 'Land' not in (card_meta[name].get('card_type') or ''):
-                    old_counts[name] += 1
-
-        # Calculer le delta de fréquence
-        for name in set(recent_counts.keys()) | set(old_counts.keys()):
-            recent_freq = recent_counts[name] / len(recent_decks) if recent_decks else 0
-            old_freq = old_counts[name] / len(old_decks) if old_decks else 0
+    if n_recent >= 3 and n_old >= 3:
+        # Compter la présence des cartes dans chaque groupe (masque × matrice de présence, ou rollups)
+        if frequencies:
+            recent_counts = by_id(frequencies["recent"])
+            old_counts = by_id(frequencies["old"])
+        else:
+            presence_rows = [(f.card_ids, (1,) * len(f.card_ids)) for f in decks]
+            recent_counts = sparse_vecmat(recent_mask, presence_rows)
+            old_counts = sparse_vecmat([1 - r for r in recent_mask], presence_rows)
+
+        # Calculer le delta de fréquence (cartes connues hors terrains)
+        spell_ids = list(recent_counts) + [card_id for card_id in old_counts if card_id not in recent_counts]
+        for card_id in spell_ids:
+            if card_id >= n_known or is_land[card_id]: continue
+            name = names[card_id]
+            recent_freq = recent_counts.get(card_id, 0) / n_recent
+            old_freq = old_counts.get(card_id, 0) / n_old
 
             delta = recent_freq - old_freq
             # Trending = augmentation significative (> 15 points de %)
@@ -574,13 +981,7 @@ def build_archetype_skeleton(archetype, decks, card_meta, synergy_data, set_code
     # Plus ce nombre est bas, plus l'archétype est fermé (quelques cartes dominent)
 
     # Calculer les fréquences triées (SANS LES TERRAINS)
-    spell_freqs = []
-    for name, weight in card_weights_accum.items():
-        meta = card_meta.get(name)
-        if not meta: continue
-        c_type = meta.get('card_type') or ''
-        if 'Land' in c_type: continue
-        spell_freqs.append(weight)
+    spell_freqs = [weight for card_id, weight in weights_by_id.items() if not is_land[card_id]]
     
     spell_freqs.sort(reverse=True)
     total_occurrences = sum(spell_freqs)
@@ -607,27 +1008,25 @@ def build_archetype_skeleton(archetype, decks, card_meta, synergy_data, set_code
     cards_with_gihwr = 0
     cards_with_synergy = 0
 
-    for name, weighted_count in card_weights_accum.items():
-        meta = card_meta.get(name)
-        if not meta: continue
-        c_type = meta.get('card_type') or meta.get('type_line') or ''
-        if 'Land' in c_type: continue
+    for card_id, weighted_count in weights_by_id.items():
+        if is_land[card_id]: continue
+        name = names[card_id]
 
         # Fréquence normalisée (0-1)
         freq_score = weighted_count / max_freq_weighted
 
         # Lift moyen (synergie avec les autres cartes de l'archétype) (0-1)
-        raw_synergy = avg_synergy.get(name, 0)
+        raw_synergy = avg_synergy.get(card_id, 0)
         lift_score = min(raw_synergy / 5, 1.0)  # Normalisé sur 5
         if raw_synergy > 0:
             cards_with_synergy += 1
 
         # Delta WR (GIH WR - format average, approximé par 55%) (0-1)
-        gih_wr = meta.get('gih_wr')
+        gih_wr = ctx.gih_wr[card_id]
         delta_wr_score = 0
         if gih_wr is not None and gih_wr > 0:
             cards_with_gihwr += 1
-            delta_wr = gih_wr - format_avg_wr  # Delta par rapport à la moyenne dynamique
+            delta_wr = gih_wr - ctx.avg_gih_wr  # Delta par rapport à la moyenne dynamique
             delta_wr_score = max(0, min(1, (delta_wr + 10) / 20))  # Normalisé [-10, +10] -> [0, 1]
 
         importance = (freq_score * 0.4) + (lift_score * 0.3) + (delta_wr_score * 0.3)
@@ -648,11 +1047,14 @@ def build_archetype_skeleton(archetype, decks, card_meta, synergy_data, set_code
     importance_cards = importance_cards[:15]  # Top 15
     print(f"      ⭐ Importance: {len(importance_cards)} cartes, {cards_with_synergy} avec synergie, {cards_with_gihwr} avec GIH WR")
 
+    skeleton_ids = {ctx.resolve(card["name"]) for card in final_deck} - {None}
+
     return {
         "set_code": set_code,
         "format": format_name,
         "archetype_name": archetype,
-        "is_alternative": is_alternative, # Flag pour le front
+        "is_alternative": variant_index > 0, # Flag pour le front
+        "variant_index": variant_index, # 0 = principal, 1..k-1 = variantes
         "avg_mana_curve": avg_curve,
         "avg_lands": round(avg_lands, 1),
         "creature_ratio": round(avg_creatures / (40 - avg_lands), 3),
@@ -662,66 +1064,390 @@ def build_archetype_skeleton(archetype, decks, card_meta, synergy_data, set_code
         "sleeper_cards": sleeper_cards,
         "trending_cards": trending_cards,
         "openness_score": openness_score,
-        "importance_cards": importance_cards
+        "importance_cards": importance_cards,
+        "representative_deck_id": representative_deck_id(decks, skeleton_ids, ctx)
     }
 
 # ==============================================================================
-# MAIN
+# 5. EXÉCUTION PARALLÈLE PAR ARCHÉTYPE
 # ==============================================================================
 
-if __name__ == "__main__":
-    for set_code in TARGET_SET_CODES:
-        print(f"🚀 Traitement du set {set_code}...")
+def archetype_fingerprint(decks, meta_version, synergy_gen, now=None):
+    """
+    Empreinte des entrées d'un archétype : decks (aggregate_id), tranche de poids Meta-Shift
+    et appartenance à la fenêtre "récente" du trending, version des métadonnées et des synergies.
+    Si elle n'a pas changé depuis le dernier run, le squelette stocké est toujours à jour.
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = (now - timedelta(days=7)).date()  # Même fenêtre que le trending (au jour près)
+    deck_keys = sorted(
+        (str(f.deck.get('aggregate_id')), f.weight, f.time is not None and f.time.date() >= cutoff)
+        for f in decks
+    )
+    payload = json.dumps([SKELETON_VERSION, meta_version, synergy_gen, deck_keys])
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+# Entrées communes à tout le set/format, chargées une seule fois par processus
+_WORKER_STATE = {}
+
+def init_worker(ctx, synergy_index, set_code, fmt, now=None, profile=False):
+    """
+    Initializer du pool : partage le FormatContext et l'index de synergies avec le processus.
+    profile : le parent est profilé, le worker chronomètre ses phases (renvoyées par archetype_job).
+    """
+    _WORKER_STATE.update(ctx=ctx, synergy_index=synergy_index, init_synergy_index=synergy_index,
+                         set_code=set_code, fmt=fmt, now=now, profile=profile)
+    if profile:
+        profiling.enable_worker_timings()
+
+def process_archetype(arch, decks, previous_centroids=None, frequencies=None, searched_decks=None):
+    """Clustering + squelettes (principal et variantes) d'un archétype. Indépendant des autres archétypes."""
+    ctx = _WORKER_STATE['ctx']
+    print(f"      📊 Analyse {arch} ({len(decks)} decks)...")
+
+    # Clustering (groupe principal en premier, puis les variantes)
+    groups, centroids, searched_decks = cluster_decks(decks, ctx, previous_centroids, searched_decks)
+
+    # Rollups utilisables seulement pour l'archétype entier, et s'ils couvrent exactement ses decks
+    if len(groups) > 1 or not frequencies or frequencies["n_decks"] != len(decks):
+        frequencies = None
+
+    skeletons = []
+    for variant_index, group in enumerate(groups):
+        if variant_index > 0:
+            print(f"         ✨ Variante {variant_index} détectée pour {arch} ({len(group)} decks)")
+        skeleton = build_archetype_skeleton(
+            arch, group, ctx, _WORKER_STATE['synergy_index'],
+            _WORKER_STATE['set_code'], _WORKER_STATE['fmt'], variant_index=variant_index,
+            frequencies=frequencies, now=_WORKER_STATE['now']
+        )
+        if skeleton:
+            skeleton["centroid_cards"] = centroids[variant_index] if centroids else None
+            skeleton["searched_decks"] = searched_decks
+            skeletons.append(skeleton)
+    return skeletons
+
+def archetype_job(day, *job):
+    """
+    Job du pool : process_archetype avec les données du jour.
+    day : (now, synergies) ou None si le pool est propre à l'appel ; synergies None = celles de l'initializer.
+    En worker profilé, renvoie aussi les temps par phase du job (fusionnés par le parent).
+    """
+    if day is not None:
+        now, synergy_index = day
+        if synergy_index is None:
+            synergy_index = _WORKER_STATE['init_synergy_index']
+        _WORKER_STATE.update(now=now, synergy_index=synergy_index)
+    skeletons = process_archetype(*job)
+    if _WORKER_STATE['profile']:
+        return skeletons, profiling.collect_worker_timings()
+    return skeletons
+
+# Pool de processus et ce que ses workers ont reçu à l'initialisation
+ArchetypePool = namedtuple('ArchetypePool', ['executor', 'synergy_index', 'profile'])
+
+def create_archetype_pool(ctx, synergy_index, set_code, fmt, workers, now=None):
+    """
+    Pool initialisé une fois avec le contexte et les synergies (None si workers <= 1).
+    Réutilisable entre plusieurs run_archetype_jobs (mode historique) : seules les données du jour sont ensuite envoyées.
+    """
+    if workers <= 1:
+        return None
+    profile = profiling.ENABLED
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                   initargs=(ctx, synergy_index, set_code, fmt, now, profile))
+    return ArchetypePool(executor, synergy_index, profile)
+
+@phase("compute")
+def run_archetype_jobs(jobs, ctx, synergy_index, set_code, fmt, workers=MAX_WORKERS, now=None, pool=None):
+    """
+    Exécute process_archetype pour chaque (archétype, decks, centroïdes précédents, fréquences des rollups,
+    decks de la dernière recherche), dans un pool de processus si workers > 1.
+    pool : pool partagé (create_archetype_pool) ; now est alors envoyé avec les jobs, et les synergies
+    seulement si ce ne sont pas celles de l'initialisation.
+    Les résultats sont renvoyés dans l'ordre des jobs, quel que soit l'ordre de fin des calculs.
+    """
+    if pool is None and (workers <= 1 or len(jobs) <= 1):
+        init_worker(ctx, synergy_index, set_code, fmt, now)
+        return [process_archetype(*job) for job in jobs]
 
-        for fmt in TARGET_FORMATS:
-            print(f"   📋 Format: {fmt}")
-            card_meta = get_cards_metadata(set_code, fmt)
-            trophies = get_trophy_decks(set_code, fmt)
-            synergies = get_archetype_synergies(set_code, fmt)
-            
-            # Calculer le WR moyen du format (pour le centrage des scores d'importance)
-            all_wrs = [m['gih_wr'] for m in card_meta.values() if m.get('gih_wr')]
-            format_avg_wr = statistics.mean(all_wrs) if all_wrs else 55.0
-            print(f"      📊 GIH WR moyen du format: {format_avg_wr:.2f}% (sur {len(all_wrs)} cartes)")
-            
-            if not trophies:
-                print(f"      ⚠️ Aucun trophy deck pour {set_code} ({fmt}).")
-                continue
+    own_pool = pool is None
+    if own_pool:
+        pool = create_archetype_pool(ctx, synergy_index, set_code, fmt, min(workers, len(jobs)), now)
+        day = None
+    else:
+        day = (now, None if synergy_index is pool.synergy_index else synergy_index)
 
-            # Grouper par archétype
+    try:
+        # Les plus gros archétypes sont soumis en premier pour équilibrer la charge
+        order = sorted(range(len(jobs)), key=lambda i: len(jobs[i][1]), reverse=True)
+        futures = {i: pool.executor.submit(archetype_job, day, *jobs[i]) for i in order}
+        results = [futures[i].result() for i in range(len(jobs))]
+    finally:
+        if own_pool:
+            pool.executor.shutdown()
+
+    if pool.profile:
+        # Temps des phases exécutées dans les workers, rapatriés dans le rapport du parent
+        for _, timings in results:
+            profiling.merge_worker_timings(timings)
+        results = [skeletons for skeletons, _ in results]
+    return results
+
+@phase("upsert")
+def save_skeletons(set_code, fmt, results, variant_counts):
+    """Upsert des squelettes, puis suppression des variantes qui n'existent plus (sinon leur centroïde serait repris au prochain run)"""
+    print(f"      🚀 Sauvegarde de {len(results)} squelettes dans Supabase...")
+    url = f"{SUPABASE_URL}/rest/v1/archetypal_skeletons?on_conflict=set_code,format,archetype_name,variant_index"
+    resp = requests.post(url, json=results, headers=HEADERS_SUPABASE)
+    if resp.status_code >= 400:
+        print(f"      ❌ Erreur sauvegarde: {resp.text}")
+        return
+    print(f"      ✅ Squelettes mis à jour pour {set_code} ({fmt}) !")
+
+    for arch, count in variant_counts.items():
+        url = (f"{SUPABASE_URL}/rest/v1/archetypal_skeletons?set_code=eq.{set_code}&format=eq.{fmt}"
+               f"&archetype_name=eq.{requests.utils.quote(arch)}&variant_index=gte.{count}")
+        resp = requests.delete(url, headers=HEADERS_SUPABASE)
+        if resp.status_code >= 400:
+            print(f"      ⚠️ Erreur nettoyage variantes {arch}: {resp.text[:200]}")
+
+# ==============================================================================
+# 6. CALCUL "AS-OF" ET HISTORIQUE
+# ==============================================================================
+
+@phase("upsert")
+def save_skeleton_history(set_code, fmt, as_of, skeletons):
+    """Remplace les squelettes datés d'un jour dans archetypal_skeletons_history"""
+    url = f"{SUPABASE_URL}/rest/v1/archetypal_skeletons_history?set_code=eq.{set_code}&format=eq.{fmt}&as_of=eq.{as_of}"
+    resp = requests.delete(url, headers=HEADERS_SUPABASE)
+    if resp.status_code >= 400:
+        print(f"      ⚠️ Erreur nettoyage historique {as_of}: {resp.text[:200]}")
+
+    url = f"{SUPABASE_URL}/rest/v1/archetypal_skeletons_history?on_conflict=set_code,format,archetype_name,variant_index,as_of"
+    resp = requests.post(url, json=skeletons, headers=HEADERS_SUPABASE)
+    if resp.status_code >= 400:
+        print(f"      ❌ Erreur sauvegarde historique {as_of}: {resp.text}")
+        return 0
+    return len(skeletons)
+
+def build_skeleton_history(set_code, fmt, ctx, features, end_day=None, history=False, workers=MAX_WORKERS, rollups=None):
+    """
+    Squelettes "as-of" : decks avec trophy_time <= jour, poids Meta-Shift et trending relatifs à ce jour.
+    En mode historique, tous les jours sont produits en un passage : decks featurisés et rollups
+    chargés une seule fois, clustering de chaque jour démarré depuis les centroïdes de la veille.
+    """
+    dated = [f for f in features if f.time is not None]
+    if not dated:
+        print(f"      ⚠️ Aucun trophy deck daté pour {set_code} ({fmt}).")
+        return 0
+
+    end = date.fromisoformat(end_day) if end_day else max(f.time for f in dated).date()
+    day = min(f.time for f in dated).date() if history else end
+
+    if rollups is None:
+        rollups = load_daily_rollups(set_code, fmt, features)
+    live_synergies = get_archetype_synergies(set_code, fmt, ctx)
+    centroids_by_arch = {}
+    searched_by_arch = {}
+    saved = 0
+
+    # Pool créé une seule fois pour tous les jours : contexte et synergies actuelles envoyés à l'initialisation,
+    # puis seulement la date (et les synergies datées quand elles existent) avec les jobs de chaque jour
+    arch_sizes = Counter(f.deck['archetype'] for f in dated)
+    pool = create_archetype_pool(ctx, live_synergies, set_code, fmt,
+                                 min(workers, sum(1 for n in arch_sizes.values() if n >= 3)))
+    try:
+        while day <= end:
+            as_of = day.isoformat()
+            now = datetime.combine(day, datetime.max.time(), tzinfo=timezone.utc) # Fin de journée : decks du jour inclus
+            print(f"\n   📅 As-of {as_of}")
+
+            # Poids Meta-Shift recalculés par rapport à la date as-of (pas de re-featurisation)
             decks_by_arch = {}
-            for d in trophies:
-                arch = d['archetype']
-                if arch not in decks_by_arch: decks_by_arch[arch] = []
-                decks_by_arch[arch].append(d)
+            for f in dated:
+                if f.time > now: continue
+                decks_by_arch.setdefault(f.deck['archetype'], []).append(f._replace(weight=get_trophy_weight(f.time, now)))
 
-            results = []
+            # Synergies calculées à la même date si disponibles (etl_script_synergy.py --as-of / --history)
+            synergy_index = get_archetype_synergies(set_code, fmt, ctx, as_of=as_of)
+            if not synergy_index:
+                print(f"      ⚠️ Pas de synergies datées du {as_of}, synergies actuelles utilisées")
+                synergy_index = live_synergies
+
+            jobs = []
             for arch, decks in decks_by_arch.items():
-                if len(decks) < 3: continue 
-                print(f"      📊 Analyse {arch} ({len(decks)} decks)...")
-                
-                # Clustering
-                main_group, alt_group = cluster_decks(decks)
-                
-                # Build Main
-                skeleton = build_archetype_skeleton(arch, main_group, card_meta, synergies, set_code, fmt, is_alternative=False, format_avg_wr=format_avg_wr)
-                if skeleton:
-                    results.append(skeleton)
-                
-                # Build Alternative if exists
-                if alt_group:
-                    print(f"         ✨ Archétype alternatif détecté pour {arch} ({len(alt_group)} decks)")
-                    alt_skeleton = build_archetype_skeleton(arch, alt_group, card_meta, synergies, set_code, fmt, is_alternative=True, format_avg_wr=format_avg_wr)
-                    if alt_skeleton:
-                        results.append(alt_skeleton)
+                if len(decks) < 3: continue
+                frequencies = None
+                if arch in rollups:
+                    frequencies = rollup_frequencies(rollups[arch], now, get_trophy_weight, include_undated=False)
+                jobs.append((arch, decks, centroids_by_arch.get(arch), frequencies, searched_by_arch.get(arch)))
 
-            if results:
-                print(f"      🚀 Sauvegarde de {len(results)} squelettes dans Supabase...")
-                url = f"{SUPABASE_URL}/rest/v1/archetypal_skeletons?on_conflict=set_code,format,archetype_name,is_alternative"
-                resp = requests.post(url, json=results, headers=HEADERS_SUPABASE)
-                if resp.status_code >= 400:
-                    print(f"      ❌ Erreur sauvegarde: {resp.text}")
+            results = []
+            for skeletons in run_archetype_jobs(jobs, ctx, synergy_index, set_code, fmt, workers=workers, now=now, pool=pool):
+                if not skeletons: continue
+                arch = skeletons[0]["archetype_name"]
+                if all(sk.get("centroid_cards") for sk in skeletons):
+                    centroids_by_arch[arch] = [sk["centroid_cards"] for sk in skeletons]
+                    searched_by_arch[arch] = skeletons[0]["searched_decks"]
                 else:
-                    print(f"      ✅ Squelettes mis à jour pour {set_code} ({fmt}) !")
+                    centroids_by_arch.pop(arch, None)
+                for skeleton in skeletons:
+                    skeleton["as_of"] = as_of
+                results.extend(skeletons)
+
+            if results:
+                saved += save_skeleton_history(set_code, fmt, as_of, results)
+                print(f"      ✅ {len(results)} squelettes datés du {as_of}")
+            day += timedelta(days=1)
+    finally:
+        if pool:
+            pool.executor.shutdown()
+
+    return saved
+
+# ==============================================================================
+# 7. SQUELETTES D'UN SET/FORMAT
+# ==============================================================================
+
+def process_skeletons(set_code, fmt, ctx=None, trophies=None, synergy_rows=None, rollups=None):
+    """
+    Squelettes d'un set/format (table live, ou historique en mode as-of).
+    Les entrées déjà en mémoire (pipeline.py) ne sont pas rechargées : ctx (get_cards_metadata),
+    trophies (lignes trophy_decks), synergy_rows (lignes synergy_scores), rollups (get_daily_rollups).
+    Retourne le nombre de squelettes sauvegardés.
+    """
+    if ctx is None:
+        ctx = get_cards_metadata(set_code, fmt)
+    if trophies is None:
+        trophies = get_trophy_decks(set_code, fmt)
+        if USE_SNAPSHOT and rollups is None:
+            rollups = rollups_from_decks(trophies) # Sans réseau : rollups recalculés depuis les decks du snapshot
+
+    if not trophies:
+        print(f"      ⚠️ Aucun trophy deck pour {set_code} ({fmt}).")
+        return 0
+
+    # Featurisation unique de tous les decks du set/format, puis groupement par archétype
+    features = featurize_decks(trophies, ctx)
+
+    # Mode as-of / historique : résultats datés, la table live n'est pas modifiée
+    if AS_OF_DATE or HISTORY_MODE:
+        return build_skeleton_history(set_code, fmt, ctx, features, AS_OF_DATE, HISTORY_MODE, workers=MAX_WORKERS, rollups=rollups)
+
+    if synergy_rows is None:
+        synergy_index = get_archetype_synergies(set_code, fmt, ctx)
+    else:
+        synergy_index = build_synergy_index(synergy_rows, ctx)
+        print(f"   🔗 {len(synergy_rows)} paires de synergie (en mémoire) indexées sur {len(synergy_index)} cartes.")
+
+    decks_by_arch = {}
+    for f in features:
+        arch = f.deck['archetype']
+        if arch not in decks_by_arch: decks_by_arch[arch] = []
+        decks_by_arch[arch].append(f)
+
+    # Empreintes : on saute les archétypes dont aucune entrée n'a changé
+    # Centroïdes : les variantes repartent de celles du run précédent
+    existing_fingerprints, previous_centroids, searched_decks = get_existing_skeletons(set_code, fmt)
+    if FORCE_REBUILD: existing_fingerprints = {}
+    if FULL_RECLUSTER: previous_centroids = {}
+    synergy_gen = synergy_generation(synergy_index)
+
+    # Rollups quotidiens : fréquences pondérées et trending par archétype en O(jours × cartes)
+    if rollups is None:
+        rollups = load_daily_rollups(set_code, fmt, features)
+    now = datetime.now(timezone.utc)
+
+    jobs = []
+    fingerprints = []
+    for arch, decks in decks_by_arch.items():
+        if len(decks) < 3: continue
+        fingerprint = archetype_fingerprint(decks, ctx.version, synergy_gen)
+        if existing_fingerprints.get(arch) == {fingerprint}:
+            print(f"      ⏭️ {arch} inchangé ({len(decks)} decks), squelette conservé")
+            continue
+        frequencies = rollup_frequencies(rollups[arch], now, get_trophy_weight) if arch in rollups else None
+        jobs.append((arch, decks, previous_centroids.get(arch), frequencies, searched_decks.get(arch)))
+        fingerprints.append(fingerprint)
+
+    results = []
+    variant_counts = {}
+    for fingerprint, skeletons in zip(fingerprints, run_archetype_jobs(jobs, ctx, synergy_index, set_code, fmt, workers=MAX_WORKERS)):
+        for skeleton in skeletons:
+            skeleton["fingerprint"] = fingerprint
+            variant_counts[skeleton["archetype_name"]] = skeleton["variant_index"] + 1
+        results.extend(skeletons)
+
+    if results:
+        save_skeletons(set_code, fmt, results, variant_counts)
+    return len(results)
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+
+def parse_arguments():
+    """Parse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Build archetypal skeletons from trophy decks')
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=None,
+        help=f'Nombre de processus pour le calcul des archétypes (défaut: {MAX_WORKERS}, 1 = séquentiel)'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Recalcule tous les archétypes, même ceux dont les entrées n\'ont pas changé'
+    )
+    parser.add_argument(
+        '--recluster',
+        action='store_true',
+        help='Ignore les centroïdes du run précédent et relance la recherche complète des variantes'
+    )
+    parser.add_argument(
+        '--snapshot',
+        action='store_true',
+        help='Lit decks, métadonnées et stats dans le snapshot local (snapshot_store.py) au lieu de Supabase'
+    )
+    parser.add_argument(
+        '--as-of',
+        type=str,
+        default=None,
+        help='Calcule les squelettes avec les decks jusqu\'à cette date incluse, YYYY-MM-DD (résultats dans archetypal_skeletons_history)'
+    )
+    parser.add_argument(
+        '--history',
+        action='store_true',
+        help='Produit chaque jour depuis le premier trophy deck (jusqu\'à --as-of ou au dernier jour)'
+    )
+    add_profile_argument(parser)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    start_profiling(args.profile)
+
+    # Override des configs
+    if args.workers:
+        MAX_WORKERS = args.workers
+    if args.force:
+        FORCE_REBUILD = True
+    if args.recluster:
+        FULL_RECLUSTER = True
+    if args.snapshot:
+        USE_SNAPSHOT = True
+    if args.as_of:
+        AS_OF_DATE = args.as_of
+    if args.history:
+        HISTORY_MODE = True
+
+    for set_code in TARGET_SET_CODES:
+        print(f"🚀 Traitement du set {set_code}...")
+
+        for fmt in TARGET_FORMATS:
+            print(f"   📋 Format: {fmt}")
+            process_skeletons(set_code, fmt)
     
     print("\n🏁 Mission accomplie.")
@@ -0,0 +1,98 @@
+"""
+Résolution canonique des noms de cartes, commune à tous les scripts backend.
+
+Chaque nom canonique reçoit un ID entier dense (ordre d'ajout) ; les autres écritures
+d'une même carte y sont rattachées en O(1) par une table d'alias :
+- face avant d'une carte double-face ou scindée ("Fire" -> "Fire // Ice")
+- accents, ligatures, casse et ponctuation ("Aether Vial" -> "Æther Vial", "fire//ice" -> "Fire // Ice")
+
+Les IDs sont stables tant que le résolveur est alimenté dans le même ordre
+(ex: noms de card_list triés) : les calculs joignent sur les IDs, les noms ne servent qu'en sortie.
+
+Usage:
+    resolver = CardNameResolver(["Fire // Ice", "Æther Vial"])
+    resolver.resolve("Fire")          # -> 0
+    resolver.intern("Unknown Card")   # -> 2 (nouveau nom canonique)
+    resolver.names[1]                 # -> "Æther Vial"
+"""
+
+from name_matcher import normalize_name
+
+# ==============================================================================
+# 1. TERRAINS DE BASE
+# ==============================================================================
+
+_BASIC_TYPES = ("Plains", "Island", "Swamp", "Mountain", "Forest")
+
+# Noms exacts (les versions enneigées et Wastes comprises) : "Island Sanctuary" n'est pas un terrain de base
+BASIC_LAND_NAMES = frozenset(_BASIC_TYPES + ("Wastes",) + tuple(f"Snow-Covered {t}" for t in _BASIC_TYPES + ("Wastes",)))
+
+def is_basic_land(name):
+    """Vrai pour un terrain de base (nom exact)"""
+    return name in BASIC_LAND_NAMES
+
+# ==============================================================================
+# 2. RÉSOLVEUR
+# ==============================================================================
+
+def alias_keys(name):
+    """Clés d'alias d'un nom : nom normalisé, puis face avant normalisée pour les cartes à plusieurs faces"""
+    keys = [normalize_name(name)]
+    if "//" in name:
+        keys.append(normalize_name(name.split("//")[0]))
+    return [key for key in keys if key]
+
+class CardNameResolver:
+    """Table de noms internés : nom canonique <-> ID, toutes écritures connues -> ID"""
+
+    def __init__(self, names=()):
+        self.names = []       # id -> nom canonique
+        self.ids = {}         # écriture exacte (canonique ou déjà résolue) -> id
+        self.aliases = {}     # clé normalisée -> id
+        self._full_keys = set() # clés issues d'un nom complet (prioritaires sur les faces avant)
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return self.resolve(name) is not None
+
+    def add(self, name):
+        """Enregistre `name` comme nom canonique (ID existant si cette écriture est déjà connue)"""
+        card_id = self.ids.get(name)
+        if card_id is not None:
+            return card_id
+        card_id = self.ids[name] = len(self.names)
+        self.names.append(name)
+
+        keys = alias_keys(name)
+        full_key = keys[0] if keys else None
+        for key in keys:
+            if key == full_key and key not in self._full_keys:
+                # Un nom complet l'emporte sur la face avant d'une autre carte
+                self.aliases[key] = card_id
+                self._full_keys.add(key)
+            else:
+                self.aliases.setdefault(key, card_id)
+        return card_id
+
+    def resolve(self, name):
+        """ID de la carte désignée par `name` (écriture exacte ou alias), None si inconnue"""
+        card_id = self.ids.get(name)
+        if card_id is None and name:
+            card_id = self.aliases.get(normalize_name(name))
+            if card_id is not None:
+                self.ids[name] = card_id # Les écritures suivantes sont résolues sans normalisation
+        return card_id
+
+    def intern(self, name):
+        """ID de la carte, en ajoutant les noms inconnus comme nouveaux noms canoniques"""
+        card_id = self.resolve(name)
+        return self.add(name) if card_id is None else card_id
+
+    def canonical(self, name):
+        """Nom canonique de `name` (le nom tel quel s'il est inconnu)"""
+        card_id = self.resolve(name)
+        return name if card_id is None else self.names[card_id]
@@ -4,9 +4,11 @@ import time
 import random
 import re
 import math
+import argparse
 from datetime import date
 from dotenv import load_dotenv
 from pathlib import Path
+from profiling import phase, add_profile_argument, start_profiling
 
 # ==============================================================================
 # 1. CONFIGURATION
@@ -50,6 +52,7 @@ HEADERS_SUPABASE = {
 # 2. FONCTIONS UTILITAIRES
 # ==============================================================================
 
+@phase("throttle")
 def random_sleep(min_seconds=2.0, max_seconds=4.5):
     time.sleep(random.uniform(min_seconds, max_seconds))
 
@@ -77,6 +80,7 @@ def safe_float(value, is_percentage=False):
 def get_gih_strict(row):
     return safe_float(row.get('ever_drawn_win_rate'), is_percentage=True)
 
+@phase("fetch")
 def fetch_data_safe(url, context_name="Données"):
     try:
         print(f"   📡 GET : {url}")
@@ -97,6 +101,7 @@ def fetch_data_safe(url, context_name="Données"):
 # 3. RECUPERATION DES SETS ACTIFS & HISTORIQUE
 # ==============================================================================
 
+@phase("fetch")
 def get_active_sets():
     url = f"{SUPABASE_URL}/rest/v1/sets?active=eq.true&select=code,start_date"
     try:
@@ -110,6 +115,7 @@ def get_active_sets():
         print(f"❌ Exception Fetch Sets: {e}")
         return []
 
+@phase("fetch")
 def get_existing_histories(set_code, fmt):
     """Pour les Decks (Archetypes)"""
     url = f"{SUPABASE_URL}/rest/v1/archetype_stats?select=colors,win_rate_history&set_code=eq.{set_code}&format=eq.{fmt}"
@@ -122,6 +128,7 @@ def get_existing_histories(set_code, fmt):
     except Exception:
         return {}
 
+@phase("fetch")
 def get_existing_card_histories(set_code, fmt, context):
     """
     Pour les Cartes : Récupère l'historique WIN RATE par nom de carte
@@ -141,10 +148,66 @@ def get_existing_card_histories(set_code, fmt, context):
         print(f"⚠️ Erreur récupération historique cartes: {e}")
         return {}
 
+@phase("upsert")
+def upsert_records(table, records, on_conflict, batch_size=500):
+    """Upsert par lots de batch_size (merge sur on_conflict), retourne le nombre de lignes sauvegardées"""
+    saved = 0
+    api_url = f"{SUPABASE_URL}/rest/v1/{table}?on_conflict={on_conflict}"
+    for i in range(0, len(records), batch_size):
+        chunk = records[i:i + batch_size]
+        try:
+            resp = requests.post(api_url, json=chunk, headers=HEADERS_SUPABASE)
+            if resp.status_code >= 400: print(f"      ❌ Erreur Batch {i}: {resp.text}")
+            else: saved += len(chunk)
+        except Exception as e: print(f"      ❌ Exception POST: {e}")
+    return saved
+
 # ==============================================================================
 # 4. INGESTION DES DECKS (Avec Gestion Historique)
 # ==============================================================================
 
+@phase("parse")
+def parse_deck_rows(target_data, set_code, fmt, existing_histories):
+    """Lignes color_ratings 17lands -> records archetype_stats (historique WR sur 14 jours)"""
+    unique_batch = {}
+
+    for row in target_data:
+        try:
+            name = row.get('color_name')
+            if not name: continue
+            final_code_colors = clean_color_code(name)
+            games = row.get('games', 0)
+            if games == 0: continue 
+
+            wr = safe_float(row.get('win_rate'), is_percentage=True)
+            if wr is None:
+                wins = safe_float(row.get('wins', 0)) or 0
+                wr = (wins / games) * 100
+
+            current_wr = round(wr, 1)
+
+            # --- GESTION DE L'HISTORIQUE ---
+            history = existing_histories.get(final_code_colors)
+            if history is None: history = []
+
+            history.append(current_wr)
+            if len(history) > 14: history = history[-14:]
+            # -------------------------------
+
+            record = {
+                "set_code": set_code,
+                "archetype_name": name,
+                "colors": final_code_colors,
+                "format": fmt,
+                "win_rate": current_wr,
+                "win_rate_history": history,
+                "games_count": games,
+            }
+            unique_batch[f"{fmt}_{final_code_colors}"] = record
+        except: continue
+
+    return list(unique_batch.values())
+
 def ingest_decks(set_code, start_date):
     print(f"\n🚀 [DECKS] Traitement du set : {set_code} (Start: {start_date})")
     
@@ -160,56 +223,62 @@ def ingest_decks(set_code, start_date):
         if not raw_data: continue
 
         target_data = raw_data if isinstance(raw_data, list) else raw_data.get('results', list(raw_data.values())[0] if raw_data else [])
-        unique_batch = {}
-
-        for row in target_data:
-            try:
-                name = row.get('color_name')
-                if not name: continue
-                final_code_colors = clean_color_code(name)
-                games = row.get('games', 0)
-                if games == 0: continue 
-
-                wr = safe_float(row.get('win_rate'), is_percentage=True)
-                if wr is None:
-                    wins = safe_float(row.get('wins', 0)) or 0
-                    wr = (wins / games) * 100
-                
-                current_wr = round(wr, 1)
-
-                # --- GESTION DE L'HISTORIQUE ---
-                history = existing_histories.get(final_code_colors)
-                if history is None: history = []
-                
-                history.append(current_wr)
-                if len(history) > 14: history = history[-14:]
-                # -------------------------------
-
-                record = {
-                    "set_code": set_code,
-                    "archetype_name": name,
-                    "colors": final_code_colors,
-                    "format": fmt,
-                    "win_rate": current_wr,
-                    "win_rate_history": history,
-                    "games_count": games,
-                }
-                unique_batch[f"{fmt}_{final_code_colors}"] = record
-            except: continue
-
-        records = list(unique_batch.values())
+        records = parse_deck_rows(target_data, set_code, fmt, existing_histories)
         if records:
-            api_url = f"{SUPABASE_URL}/rest/v1/archetype_stats?on_conflict=set_code,colors,format"
-            try:
-                resp = requests.post(api_url, json=records, headers=HEADERS_SUPABASE)
-                if resp.status_code >= 400: print(f"      ❌ Erreur Supabase: {resp.text}")
-                else: print(f"      ✅ {len(records)} decks sauvegardés.")
-            except Exception as e: print(f"      ❌ Exception POST: {e}")
+            saved = upsert_records("archetype_stats", records, "set_code,colors,format")
+            if saved: print(f"      ✅ {saved} decks sauvegardés.")
 
 # ==============================================================================
 # 5. INGESTION DES CARTES (Avec Win Rate History)
 # ==============================================================================
 
+@phase("parse")
+def parse_card_rows(target_list, set_code, fmt, context, existing_card_histories):
+    """Lignes card_ratings 17lands -> records card_stats (historique GIH WR sur 14 jours)"""
+    unique_batch = {}
+
+    for row in target_list:
+        try:
+            name = row.get('name')
+            if not name: continue
+
+            gih = get_gih_strict(row)
+            alsa = safe_float(row.get('avg_seen'))
+            img_count = row.get('game_count') or 0
+
+            current_wr = round(gih, 2) if gih is not None else None
+
+            # --- GESTION HISTORIQUE CARTES ---
+            # Récupération ancien historique ou vide
+            history = existing_card_histories.get(name)
+            if history is None: history = []
+
+            # On ajoute la nouvelle valeur SI elle existe (pas None)
+            if current_wr is not None:
+                history.append(current_wr)
+
+                # Rolling Window de 14 jours
+                if len(history) > 14: 
+                    history = history[-14:]
+            # ----------------------------------
+
+            record = {
+                "set_code": set_code,
+                "card_name": name,
+                "rarity": row.get('rarity', 'common'),
+                "colors": row.get('color', ''),
+                "filter_context": context,
+                "format": fmt,
+                "gih_wr": current_wr, 
+                "alsa": alsa,
+                "img_count": img_count,
+                "win_rate_history": history # Nouvelle donnée
+            }
+            unique_batch[f"{fmt}_{name}_{context}"] = record
+        except Exception: continue
+
+    return list(unique_batch.values())
+
 def ingest_cards(set_code, start_date):
     print(f"\n🚀 [CARTES] Traitement du set : {set_code} (Start: {start_date})")
     
@@ -239,65 +308,25 @@ def ingest_cards(set_code, start_date):
                      if isinstance(v, list): target_list = v; break
             
             if not target_list: continue
-            unique_batch = {}
-
-            for row in target_list:
-                try:
-                    name = row.get('name')
-                    if not name: continue
-
-                    gih = get_gih_strict(row)
-                    alsa = safe_float(row.get('avg_seen'))
-                    img_count = row.get('game_count') or 0
-                    
-                    current_wr = round(gih, 2) if gih is not None else None
-
-                    # --- GESTION HISTORIQUE CARTES ---
-                    # Récupération ancien historique ou vide
-                    history = existing_card_histories.get(name)
-                    if history is None: history = []
-
-                    # On ajoute la nouvelle valeur SI elle existe (pas None)
-                    if current_wr is not None:
-                        history.append(current_wr)
-                        
-                        # Rolling Window de 14 jours
-                        if len(history) > 14: 
-                            history = history[-14:]
-                    # ----------------------------------
-
-                    record = {
-                        "set_code": set_code,
-                        "card_name": name,
-                        "rarity": row.get('rarity', 'common'),
-                        "colors": row.get('color', ''),
-                        "filter_context": context,
-                        "format": fmt,
-                        "gih_wr": current_wr, 
-                        "alsa": alsa,
-                        "img_count": img_count,
-                        "win_rate_history": history # Nouvelle donnée
-                    }
-                    unique_batch[f"{fmt}_{name}_{context}"] = record
-                except Exception: continue
-            
-            batch = list(unique_batch.values())
+            batch = parse_card_rows(target_list, set_code, fmt, context, existing_card_histories)
             if batch:
-                for i in range(0, len(batch), 500):
-                    chunk = batch[i:i + 500]
-                    api_url = f"{SUPABASE_URL}/rest/v1/card_stats?on_conflict=set_code,card_name,filter_context,format"
-                    try:
-                        resp = requests.post(api_url, json=chunk, headers=HEADERS_SUPABASE)
-                        if resp.status_code >= 400: print(f"      ❌ Erreur Batch {i}: {resp.text}")
-                    except Exception as e: print(f"      ❌ Exception POST: {e}")
-                
+                upsert_records("card_stats", batch, "set_code,card_name,filter_context,format")
                 print(f"      ✅ {context.ljust(6)} : {len(batch)} cartes traitées")
 
 # ==============================================================================
 # MAIN LOOP
 # ==============================================================================
 
+def parse_arguments():
+    """Parse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Ingest 17lands card and archetype stats into Supabase')
+    add_profile_argument(parser)
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_arguments()
+    start_profiling(args.profile)
+
     if not SUPABASE_URL:
         print("❌ ERREUR: Variables d'environnement manquantes.")
         exit(1)
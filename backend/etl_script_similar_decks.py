@@ -0,0 +1,334 @@
+import requests
+import os
+import argparse
+import hashlib
+import random
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from pathlib import Path
+from supabase_fetch import fetch_all
+from profiling import phase, add_profile_argument, start_profiling
+from card_names import is_basic_land
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+
+# Sets et formats à traiter
+TARGET_SET_CODES = ["ECL"]  # [] pour tous les sets actifs
+TARGET_FORMATS = ["PremierDraft", "TradDraft"]
+
+# --- MINHASH / LSH ---
+# Seuil ≈ (1/NUM_BANDS)^(1/ROWS_PER_BAND) ≈ 0.25 de Jaccard, sous celui des 5 plus proches voisins
+# (≥ 0.29, médiane 0.375 sur 3000 decks synthétiques) : recall@5 ≈ 0.97 pour ~9% des decks en candidats
+NUM_BANDS = 64                 # Bandes LSH
+ROWS_PER_BAND = 3              # Lignes par bande
+NUM_PERM = NUM_BANDS * ROWS_PER_BAND
+MINHASH_SEED = 42
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Nombre de voisins précalculés par deck
+TOP_N_NEIGHBORS = 5
+
+# Version de l'index : les signatures d'une autre version sont recalculées
+INDEX_VERSION = f"v2-{NUM_BANDS}x{ROWS_PER_BAND}-{MINHASH_SEED}"
+
+# --- ENVIRONNEMENT ---
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+env_path = root_dir / '.env'
+load_dotenv(dotenv_path=env_path)
+
+SUPABASE_URL = os.getenv("SUPABASE_URL") or os.getenv("VITE_SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY") or os.getenv("VITE_SUPABASE_KEY")
+
+HEADERS_SUPABASE = {
+    "apikey": SUPABASE_KEY,
+    "Authorization": f"Bearer {SUPABASE_KEY}",
+    "Content-Type": "application/json",
+    "Prefer": "resolution=merge-duplicates"
+}
+
+# ==============================================================================
+# 2. FONCTIONS SUPABASE
+# ==============================================================================
+
+@phase("fetch")
+def get_active_sets():
+    """Récupère les sets actifs depuis Supabase"""
+    url = f"{SUPABASE_URL}/rest/v1/sets?active=eq.true&select=code"
+    try:
+        response = requests.get(url, headers=HEADERS_SUPABASE)
+        if response.status_code == 200:
+            return [s['code'] for s in response.json()]
+        return []
+    except Exception as e:
+        print(f"❌ Exception fetch sets: {e}")
+        return []
+
+def get_trophy_decks(set_code, fmt):
+    """Récupère tous les trophy decks (id + cardlist) pour un set/format"""
+    return fetch_all(
+        "trophy_decks", f"set_code=eq.{set_code}&format=eq.{fmt}",
+        columns=["aggregate_id", "cardlist"], key="aggregate_id", parallel=True
+    )
+
+def get_existing_signatures(set_code, fmt):
+    """Signatures MinHash déjà calculées avec la version courante de l'index"""
+    rows = fetch_all(
+        "trophy_deck_minhash", f"set_code=eq.{set_code}&format=eq.{fmt}&index_version=eq.{INDEX_VERSION}",
+        columns=["aggregate_id", "signature"], key="aggregate_id", parallel=True
+    )
+    return {row['aggregate_id']: tuple(row['signature']) for row in rows if row.get('signature')}
+
+@phase("upsert")
+def upsert_rows(table, rows, on_conflict):
+    """Upsert par batch de 500, retourne le nombre de lignes sauvegardées"""
+    saved = 0
+    for i in range(0, len(rows), 500):
+        chunk = rows[i:i + 500]
+        api_url = f"{SUPABASE_URL}/rest/v1/{table}?on_conflict={on_conflict}"
+        try:
+            resp = requests.post(api_url, json=chunk, headers=HEADERS_SUPABASE)
+            if resp.status_code >= 400:
+                print(f"      ❌ Erreur batch {table} {i}: {resp.text[:200]}")
+            else:
+                saved += len(chunk)
+        except Exception as e:
+            print(f"      ❌ Exception POST {table}: {e}")
+    return saved
+
+# ==============================================================================
+# 3. MINHASH / LSH
+# ==============================================================================
+
+# Coefficients (a, b) des NUM_PERM fonctions de hachage h(x) = (a*x + b) mod p, fixés par la seed
+_rng = random.Random(MINHASH_SEED)
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+_card_hash_cache = {}
+
+def card_hashes(card_name):
+    """Les NUM_PERM hachés d'une carte (hash stable entre runs, contrairement à hash())"""
+    hashes = _card_hash_cache.get(card_name)
+    if hashes is None:
+        x = int.from_bytes(hashlib.blake2b(card_name.encode(), digest_size=8).digest(), 'big') % MERSENNE_PRIME
+        hashes = _card_hash_cache[card_name] = tuple((a * x + b) % MERSENNE_PRIME for a, b in PERMUTATIONS)
+    return hashes
+
+def deck_card_set(cardlist):
+    """Cartes distinctes d'un deck, sans les terrains de base (même filtre que cluster_decks)"""
+    return frozenset(card for card in (cardlist or {}) if not is_basic_land(card))
+
+@phase("compute")
+def minhash_signature(cards):
+    """Signature MinHash d'un ensemble de cartes (None si vide)"""
+    if not cards:
+        return None
+    return tuple(map(min, zip(*(card_hashes(card) for card in cards))))
+
+def band_keys(signature):
+    """Clés de bucket LSH d'une signature, une par bande ("bande:hash")"""
+    keys = []
+    for band in range(NUM_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(repr(rows).encode(), digest_size=8).hexdigest()
+        keys.append(f"{band}:{digest}")
+    return keys
+
+def estimated_jaccard(sig_a, sig_b):
+    """Estimation de Jaccard : part des positions où les signatures coïncident"""
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / NUM_PERM
+
+class LSHIndex:
+    """Index LSH en mémoire : bucket -> decks, pour trouver les candidats sans tout comparer"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.signatures = {}
+
+    def add(self, key, signature):
+        self.signatures[key] = signature
+        for band in band_keys(signature):
+            self.buckets.setdefault(band, []).append(key)
+
+    def candidates(self, signature, exclude=None):
+        """Decks partageant au moins un bucket avec la signature"""
+        found = set()
+        for band in band_keys(signature):
+            found.update(self.buckets.get(band, ()))
+        found.discard(exclude)
+        return found
+
+    def query(self, signature, top_n=TOP_N_NEIGHBORS, exclude=None):
+        """Plus proches voisins [(deck, Jaccard estimé)] parmi les candidats"""
+        scored = [(key, estimated_jaccard(signature, self.signatures[key])) for key in self.candidates(signature, exclude)]
+        scored.sort(key=lambda x: (-x[1], x[0]))
+        return scored[:top_n]
+
+def find_similar_decks(cardlist, set_code, fmt, top_n=TOP_N_NEIGHBORS):
+    """
+    Requête ponctuelle sur l'index persisté : decks les plus proches d'une cardlist quelconque.
+    Les candidats sont lus via les buckets (lsh_bands && ...), sans parcourir tous les decks.
+    """
+    signature = minhash_signature(deck_card_set(cardlist))
+    if signature is None:
+        return []
+
+    bands = ",".join(f'"{band}"' for band in band_keys(signature))
+    rows = fetch_all(
+        "trophy_deck_minhash",
+        f"set_code=eq.{set_code}&format=eq.{fmt}&index_version=eq.{INDEX_VERSION}&lsh_bands=ov.{{{bands}}}",
+        columns=["aggregate_id", "signature"], key="aggregate_id"
+    )
+    scored = [(row['aggregate_id'], estimated_jaccard(signature, row['signature'])) for row in rows]
+    scored.sort(key=lambda x: (-x[1], x[0]))
+    return scored[:top_n]
+
+# ==============================================================================
+# 4. PROCESSING PRINCIPAL
+# ==============================================================================
+
+def process_similar_decks(set_code, formats):
+    """Met à jour les signatures et les voisins précalculés pour un set"""
+    print(f"\n{'='*60}")
+    print(f"🧬 DECKS SIMILAIRES - Set: {set_code}")
+    print(f"{'='*60}")
+
+    for fmt in formats:
+        print(f"\n📂 Format: {fmt}")
+
+        decks = get_trophy_decks(set_code, fmt)
+        if not decks:
+            print(f"   ⚠️ Aucun deck trouvé")
+            continue
+
+        card_sets = {deck['aggregate_id']: deck_card_set(deck.get('cardlist')) for deck in decks}
+        existing = get_existing_signatures(set_code, fmt)
+
+        # 1. Signatures : seules celles des nouveaux decks sont calculées
+        index = LSHIndex()
+        new_ids = []
+        signature_rows = []
+        for agg_id, cards in card_sets.items():
+            signature = existing.get(agg_id)
+            if signature is None:
+                signature = minhash_signature(cards)
+                if signature is None: continue
+                new_ids.append(agg_id)
+                signature_rows.append({
+                    "set_code": set_code,
+                    "format": fmt,
+                    "aggregate_id": agg_id,
+                    "signature": list(signature),
+                    "lsh_bands": band_keys(signature),
+                    "index_version": INDEX_VERSION
+                })
+            index.add(agg_id, signature)
+        print(f"   🧮 {len(new_ids)} nouvelles signatures ({len(index.signatures)} decks indexés)")
+
+        if not new_ids:
+            print(f"   ⏭️ Aucun nouveau deck, voisins inchangés")
+            continue
+
+        saved = upsert_rows("trophy_deck_minhash", signature_rows, "set_code,format,aggregate_id")
+        print(f"   ✅ {saved} signatures sauvegardées")
+
+        # 2. Voisins : les nouveaux decks et ceux qui partagent un bucket avec eux
+        affected = set(new_ids)
+        for agg_id in new_ids:
+            affected |= index.candidates(index.signatures[agg_id], exclude=agg_id)
+
+        now = datetime.now(timezone.utc).isoformat()
+        neighbor_rows = []
+        for agg_id in affected:
+            # Re-classement des candidats par Jaccard exact (cardlists déjà en mémoire)
+            cards = card_sets[agg_id]
+            scored = []
+            for other in index.candidates(index.signatures[agg_id], exclude=agg_id):
+                other_cards = card_sets[other]
+                scored.append((other, len(cards & other_cards) / len(cards | other_cards)))
+            scored.sort(key=lambda x: (-x[1], x[0]))
+
+            for rank, (other, similarity) in enumerate(scored[:TOP_N_NEIGHBORS], 1):
+                neighbor_rows.append({
+                    "set_code": set_code,
+                    "format": fmt,
+                    "aggregate_id": agg_id,
+                    "rank": rank,
+                    "neighbor_id": other,
+                    "similarity": round(similarity, 4),
+                    "updated_at": now
+                })
+
+        saved = upsert_rows("trophy_deck_neighbors", neighbor_rows, "set_code,format,aggregate_id,rank")
+        print(f"   ✅ {saved} voisins sauvegardés ({len(affected)} decks mis à jour)")
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+
+def parse_arguments():
+    """Parse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Build MinHash/LSH similar-deck index from trophy decks')
+    parser.add_argument(
+        '--sets', '-s',
+        type=str,
+        nargs='+',
+        default=None,
+        help='Codes des sets (ex: --sets FDN DSK)'
+    )
+    parser.add_argument(
+        '--formats', '-f',
+        type=str,
+        nargs='+',
+        default=None,
+        help='Formats (ex: --formats PremierDraft TradDraft)'
+    )
+    parser.add_argument(
+        '--top-n', '-n',
+        type=int,
+        default=None,
+        help=f'Nombre de voisins précalculés par deck (défaut: {TOP_N_NEIGHBORS})'
+    )
+    add_profile_argument(parser)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    start_profiling(args.profile)
+
+    # Override des configs
+    if args.sets:
+        TARGET_SET_CODES = list(args.sets)
+    if args.formats:
+        TARGET_FORMATS = list(args.formats)
+    if args.top_n:
+        TOP_N_NEIGHBORS = args.top_n
+
+    print("🧬 ETL Decks similaires - Démarrage")
+    print(f"⏰ {datetime.now(timezone.utc).isoformat()}")
+
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print("❌ ERREUR: Variables d'environnement SUPABASE manquantes.")
+        exit(1)
+
+    # Déterminer les sets
+    if TARGET_SET_CODES:
+        sets_to_process = TARGET_SET_CODES
+        print(f"📋 Sets ciblés: {sets_to_process}")
+    else:
+        sets_to_process = get_active_sets()
+        print(f"📋 Sets actifs: {sets_to_process}")
+
+    if not sets_to_process:
+        print("⚠️ Aucun set à traiter.")
+        exit(0)
+
+    print(f"📋 Formats: {TARGET_FORMATS}")
+    print(f"⚙️ Index: {NUM_BANDS} bandes x {ROWS_PER_BAND} lignes, top {TOP_N_NEIGHBORS} voisins")
+
+    for set_code in sets_to_process:
+        process_similar_decks(set_code, TARGET_FORMATS)
+
+    print("\n🏁 Terminé.")
@@ -1,11 +1,16 @@
 import requests
 import os
 import argparse
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from collections import defaultdict
 from itertools import combinations
 from dotenv import load_dotenv
 from pathlib import Path
+from supabase_fetch import fetch_all
+from profiling import phase, add_profile_argument, start_profiling
+from trophy_rollups import trophy_day, UNDATED_DAY
+from card_names import CardNameResolver, is_basic_land
+from snapshot_store import load_snapshot
 
 # ==============================================================================
 # 1. CONFIGURATION
@@ -18,8 +23,14 @@ TARGET_FORMATS = ["PremierDraft", "TradDraft"]
 # Seuils pour filtrer les résultats (valeurs par défaut, recalculées dynamiquement)
 MIN_LIFT_SCORE = 1.2  # Ne garder que les synergies significatives (lift > 1.2)
 
-# Terrains de base à exclure des calculs de synergie
-BASIC_LANDS = {"Plains", "Island", "Swamp", "Mountain", "Forest"}
+# Date de calcul "as-of" (None = données actuelles, ou "YYYY-MM-DD" : decks avec trophy_time <= ce jour)
+AS_OF_DATE = None
+
+# Decks lus dans le snapshot local (snapshot_store.py) au lieu de Supabase
+USE_SNAPSHOT = False
+
+# Produit l'historique jour par jour (jusqu'à AS_OF_DATE ou au dernier jour) dans synergy_scores_history
+HISTORY_MODE = False
 
 # --- ENVIRONNEMENT ---
 current_dir = Path(__file__).parent
@@ -41,6 +52,7 @@ HEADERS_SUPABASE = {
 # 2. FONCTIONS SUPABASE
 # ==============================================================================
 
+@phase("fetch")
 def get_active_sets():
     """Récupère les sets actifs depuis Supabase"""
     url = f"{SUPABASE_URL}/rest/v1/sets?active=eq.true&select=code"
@@ -53,40 +65,29 @@ def get_active_sets():
         print(f"❌ Exception fetch sets: {e}")
         return []
 
-def get_trophy_decks(set_code, fmt):
-    """Récupère tous les trophy decks pour un set/format avec pagination"""
-    all_decks = []
-    offset = 0
-    page_size = 1000
-
-    while True:
-        url = f"{SUPABASE_URL}/rest/v1/trophy_decks?set_code=eq.{set_code}&format=eq.{fmt}&select=cardlist&limit={page_size}&offset={offset}"
-        try:
-            response = requests.get(url, headers=HEADERS_SUPABASE)
-            if response.status_code != 200:
-                print(f"   ❌ Erreur fetch decks: {response.text[:200]}")
-                break
-
-            data = response.json()
-            if not data:
-                break
-
-            all_decks.extend(data)
-
-            if len(data) < page_size:
-                break  # Dernière page
-
-            offset += page_size
-            print(f"   📄 {len(all_decks)} decks chargés...")
-
-        except Exception as e:
-            print(f"   ❌ Exception fetch decks: {e}")
-            break
-
-    return all_decks
+def get_trophy_decks(set_code, fmt, with_time=False):
+    """Récupère tous les trophy decks pour un set/format (pagination keyset, pages en parallèle, ou snapshot local)"""
+    snapshot = load_snapshot(set_code, fmt) if USE_SNAPSHOT else None
+    if snapshot is not None:
+        print(f"   🗄️ {snapshot.n_decks} decks lus dans le snapshot local")
+        return snapshot.deck_rows()
+    return fetch_all(
+        "trophy_decks", f"set_code=eq.{set_code}&format=eq.{fmt}",
+        columns=["cardlist", "trophy_time"] if with_time else ["cardlist"], key="aggregate_id", parallel=True
+    )
 
-def save_synergies(synergies, set_code, fmt):
-    """Sauvegarde les synergies dans Supabase"""
+@phase("fetch")
+def get_card_names(set_code, fmt):
+    """Noms de card_list du set (snapshot local si activé), pour alimenter le résolveur avant comptage"""
+    snapshot = load_snapshot(set_code, fmt) if USE_SNAPSHOT else None
+    if snapshot is not None:
+        return [row['card_name'] for row in snapshot.card_list_rows()]
+    rows = fetch_all("card_list", f"set_code=eq.{set_code}", columns=["card_name"], key="card_name")
+    return [row['card_name'] for row in rows]
+
+@phase("upsert")
+def save_synergies(synergies, set_code, fmt, as_of=None):
+    """Sauvegarde les synergies dans Supabase (dans synergy_scores_history si as_of est fourni)"""
     if not synergies:
         return 0
 
@@ -114,12 +115,18 @@ def save_synergies(synergies, set_code, fmt):
             "confidence_b_to_a": round(conf_b_to_a, 4),
             "updated_at": datetime.now(timezone.utc).isoformat()
         })
+        if as_of:
+            records[-1]["as_of"] = as_of
+
+    table, on_conflict = "synergy_scores", "set_code,format,card_a,card_b"
+    if as_of:
+        table, on_conflict = "synergy_scores_history", "set_code,format,card_a,card_b,as_of"
 
     # Upsert par batch
     saved = 0
     for i in range(0, len(records), 500):
         chunk = records[i:i + 500]
-        api_url = f"{SUPABASE_URL}/rest/v1/synergy_scores?on_conflict=set_code,format,card_a,card_b"
+        api_url = f"{SUPABASE_URL}/rest/v1/{table}?on_conflict={on_conflict}"
 
         try:
             resp = requests.post(api_url, json=chunk, headers=HEADERS_SUPABASE)
@@ -132,9 +139,12 @@ def save_synergies(synergies, set_code, fmt):
 
     return saved
 
-def delete_old_synergies(set_code, fmt):
-    """Supprime les anciennes synergies pour un set/format avant recalcul"""
+@phase("upsert")
+def delete_old_synergies(set_code, fmt, as_of=None):
+    """Supprime les anciennes synergies pour un set/format (et une date as-of) avant recalcul"""
     url = f"{SUPABASE_URL}/rest/v1/synergy_scores?set_code=eq.{set_code}&format=eq.{fmt}"
+    if as_of:
+        url = f"{SUPABASE_URL}/rest/v1/synergy_scores_history?set_code=eq.{set_code}&format=eq.{fmt}&as_of=eq.{as_of}"
     try:
         response = requests.delete(url, headers=HEADERS_SUPABASE)
         if response.status_code >= 400:
@@ -146,7 +156,19 @@ def delete_old_synergies(set_code, fmt):
 # 3. CALCUL DU LIFT SCORE
 # ==============================================================================
 
-def calculate_lift_scores(decks):
+def build_resolver(decks, card_names=()):
+    """
+    Résolveur alimenté avant tout comptage : noms de card_list (hors terrains de base), puis noms des decks triés
+    (cartes à plusieurs faces d'abord). Les écritures d'une même carte sont regroupées de la
+    même façon quel que soit l'ordre des decks ("Fire" rejoint toujours "Fire // Ice").
+    """
+    resolver = CardNameResolver(sorted(name for name in card_names if not is_basic_land(name)))
+    deck_names = {card for deck in decks for card in (deck.get('cardlist') or {}) if not is_basic_land(card)}
+    for name in sorted(deck_names, key=lambda name: ("//" not in name, name)):
+        resolver.intern(name)
+    return resolver
+
+def calculate_lift_scores(decks, card_names=()):
     """
     Calcule le lift score pour chaque paire de cartes.
 
@@ -156,31 +178,44 @@ def calculate_lift_scores(decks):
     - P(A ∩ B) = nombre de decks avec A ET B / total decks
     - P(A) = nombre de decks avec A / total decks
     - P(B) = nombre de decks avec B / total decks
+
+    card_names : noms de card_list du set (écritures canoniques des cartes)
     """
     if not decks:
         return {}
 
-    total_decks = len(decks)
-    print(f"   📊 Analyse de {total_decks} decks...")
-
-    # Seuils dynamiques basés sur la taille du dataset
-    min_co_occurrence = max(10, int(total_decks * 0.02))   # Au moins 2% des decks
-    min_card_occurrence = max(20, int(total_decks * 0.03)) # Au moins 3% des decks
-    print(f"   ⚙️ Seuils dynamiques: co_occurrence >= {min_co_occurrence}, card_occurrence >= {min_card_occurrence}")
+    print(f"   📊 Analyse de {len(decks)} decks...")
+    resolver = build_resolver(decks, card_names)
+    card_occurrence, pair_occurrence = count_occurrences(decks, resolver)
+    return lift_from_counts(card_occurrence, pair_occurrence, len(decks), resolver.names)
 
+@phase("compute")
+def count_occurrences(decks, resolver, card_occurrence=None, pair_occurrence=None):
+    """
+    Compte les decks contenant chaque carte et chaque paire de cartes (hors terrains de base).
+    Les cartes sont comptées par ID (resolver.intern) : les écritures d'une même carte sont regroupées.
+    Les compteurs passés en argument sont complétés : permet des agrégats cumulés jour par jour.
+    """
+    known, intern = resolver.ids, resolver.intern
     # Compter les occurrences de chaque carte (dans combien de decks elle apparaît)
-    card_occurrence = defaultdict(int)
+    card_occurrence = card_occurrence if card_occurrence is not None else defaultdict(int)
 
     # Compter les co-occurrences de paires de cartes
-    pair_occurrence = defaultdict(int)
+    pair_occurrence = pair_occurrence if pair_occurrence is not None else defaultdict(int)
 
     for deck in decks:
         cardlist = deck.get('cardlist', {})
         if not cardlist:
             continue
 
-        # Liste des cartes uniques dans ce deck (sans les terrains de base)
-        cards_in_deck = [card for card in cardlist.keys() if card not in BASIC_LANDS]
+        # IDs des cartes uniques dans ce deck (sans les terrains de base)
+        cards_in_deck = set()
+        for card in cardlist:
+            if is_basic_land(card): continue
+            card_id = known.get(card)
+            if card_id is None:
+                card_id = intern(card)
+            cards_in_deck.add(card_id)
 
         # Compter l'occurrence de chaque carte
         for card in cards_in_deck:
@@ -190,6 +225,19 @@ def calculate_lift_scores(decks):
         for card_a, card_b in combinations(sorted(cards_in_deck), 2):
             pair_occurrence[(card_a, card_b)] += 1
 
+    return card_occurrence, pair_occurrence
+
+@phase("compute")
+def lift_from_counts(card_occurrence, pair_occurrence, total_decks, names):
+    """Lift et confidences des paires significatives, à partir des compteurs d'occurrences par ID (names : id -> nom)"""
+    if not total_decks:
+        return {}
+
+    # Seuils dynamiques basés sur la taille du dataset
+    min_co_occurrence = max(10, int(total_decks * 0.02))   # Au moins 2% des decks
+    min_card_occurrence = max(20, int(total_decks * 0.03)) # Au moins 3% des decks
+    print(f"   ⚙️ Seuils dynamiques: co_occurrence >= {min_co_occurrence}, card_occurrence >= {min_card_occurrence}")
+
     print(f"   🃏 {len(card_occurrence)} cartes uniques trouvées")
     print(f"   🔗 {len(pair_occurrence)} paires analysées")
 
@@ -231,9 +279,13 @@ def calculate_lift_scores(decks):
         # Confidence(B→A) = P(A|B) = co_occurrence / occurrence_B
         confidence_b_to_a = co_count / count_b if count_b > 0 else 0
 
-        # Ne garder que les synergies significatives
+        # Ne garder que les synergies significatives (clés en noms, ordre alphabétique)
         if lift >= MIN_LIFT_SCORE:
-            synergies[(card_a, card_b)] = {
+            name_a, name_b = names[card_a], names[card_b]
+            if name_a > name_b:
+                name_a, name_b = name_b, name_a
+                confidence_a_to_b, confidence_b_to_a = confidence_b_to_a, confidence_a_to_b
+            synergies[(name_a, name_b)] = {
                 'lift': lift,
                 'co_occurrence': co_count,
                 'confidence_a_to_b': confidence_a_to_b,
@@ -246,6 +298,114 @@ def calculate_lift_scores(decks):
 # 4. PROCESSING PRINCIPAL
 # ==============================================================================
 
+def process_synergy_history(set_code, fmt, end_day=None, history=False):
+    """
+    Synergies "as-of" : uniquement les decks avec trophy_time <= jour, sauvegardées par date.
+    En mode historique, les compteurs sont cumulés jour par jour : un seul passage sur les
+    decks produit toutes les dates, sans recompter les jours précédents.
+    """
+    decks = get_trophy_decks(set_code, fmt, with_time=True)
+    decks_by_day = defaultdict(list)
+    for deck in decks:
+        day = trophy_day(deck.get('trophy_time'))
+        if day == UNDATED_DAY: continue # Sans date, impossible de savoir s'il précède le jour demandé
+        decks_by_day[day].append(deck)
+
+    if not decks_by_day:
+        print(f"   ⚠️ Aucun deck daté trouvé")
+        return 0
+
+    end_day = end_day or max(decks_by_day)
+    first_day = min(decks_by_day) if history else end_day
+    if first_day > end_day:
+        print(f"   ⚠️ Aucun deck avant le {end_day}")
+        return 0
+
+    # Compteurs cumulés : on part des decks antérieurs au premier jour produit
+    # Un seul résolveur pour tout l'historique, alimenté avec tous les decks : les IDs et les
+    # regroupements d'écritures ne dépendent pas du jour où une écriture apparaît
+    resolver = build_resolver(decks, get_card_names(set_code, fmt))
+    card_occurrence, pair_occurrence = defaultdict(int), defaultdict(int)
+    total_decks = 0
+    for day, day_decks in decks_by_day.items():
+        if day < first_day:
+            count_occurrences(day_decks, resolver, card_occurrence, pair_occurrence)
+            total_decks += len(day_decks)
+
+    saved = 0
+    day = datetime.fromisoformat(first_day)
+    while day.date().isoformat() <= end_day:
+        as_of = day.date().isoformat()
+        day_decks = decks_by_day.get(as_of, [])
+        count_occurrences(day_decks, resolver, card_occurrence, pair_occurrence)
+        total_decks += len(day_decks)
+
+        print(f"\n   📅 As-of {as_of}: {total_decks} decks (+{len(day_decks)})")
+        synergies = lift_from_counts(card_occurrence, pair_occurrence, total_decks, resolver.names)
+        if synergies:
+            delete_old_synergies(set_code, fmt, as_of=as_of)
+            saved += save_synergies(synergies, set_code, fmt, as_of=as_of)
+            print(f"   ✅ {len(synergies)} synergies (lift >= {MIN_LIFT_SCORE}) sauvegardées pour le {as_of}")
+        day += timedelta(days=1)
+
+    return saved
+
+def process_format_synergies(set_code, fmt, decks=None, card_names=None):
+    """
+    Calcule et sauvegarde les synergies d'un set/format (decks : lignes trophy_decks déjà en mémoire, sinon lues en BDD ;
+    card_names : noms de card_list déjà en mémoire, sinon lus en BDD).
+    Retourne (synergies, nombre de lignes sauvegardées).
+    """
+    # Récupérer les trophy decks
+    if decks is None:
+        decks = get_trophy_decks(set_code, fmt)
+    if not decks:
+        print(f"   ⚠️ Aucun deck trouvé")
+        return {}, 0
+
+    # Calculer les lift scores
+    if card_names is None:
+        card_names = get_card_names(set_code, fmt)
+    synergies = calculate_lift_scores(decks, card_names)
+    print(f"   🎯 {len(synergies)} synergies significatives (lift >= {MIN_LIFT_SCORE})")
+    if not synergies:
+        return synergies, 0
+
+    # Supprimer les anciennes synergies
+    delete_old_synergies(set_code, fmt)
+
+    # Sauvegarder les nouvelles
+    saved = save_synergies(synergies, set_code, fmt)
+    print(f"   ✅ {saved} synergies sauvegardées")
+
+    # === LOGS: Top 10 par Lift Score ===
+    top_by_lift = sorted(synergies.items(), key=lambda x: x[1]['lift'], reverse=True)[:10]
+    print(f"\n   🏆 Top 10 LIFT (synergies les plus fortes):")
+    for i, ((card_a, card_b), data) in enumerate(top_by_lift, 1):
+        print(f"      {i:2}. {card_a} + {card_b}")
+        print(f"          lift={data['lift']:.2f} | co={data['co_occurrence']} | conf(A→B)={data['confidence_a_to_b']:.0%} conf(B→A)={data['confidence_b_to_a']:.0%}")
+
+    # === LOGS: Top 10 par Confidence A→B ===
+    top_by_conf_ab = sorted(synergies.items(), key=lambda x: x[1]['confidence_a_to_b'], reverse=True)[:10]
+    print(f"\n   🎯 Top 10 CONFIDENCE A→B (si j'ai A, je veux B):")
+    for i, ((card_a, card_b), data) in enumerate(top_by_conf_ab, 1):
+        print(f"      {i:2}. {card_a} → {card_b}: {data['confidence_a_to_b']:.0%} (lift={data['lift']:.2f}, co={data['co_occurrence']})")
+
+    # === LOGS: Top 10 par Confidence B→A ===
+    top_by_conf_ba = sorted(synergies.items(), key=lambda x: x[1]['confidence_b_to_a'], reverse=True)[:10]
+    print(f"\n   🎯 Top 10 CONFIDENCE B→A (si j'ai B, je veux A):")
+    for i, ((card_a, card_b), data) in enumerate(top_by_conf_ba, 1):
+        print(f"      {i:2}. {card_b} → {card_a}: {data['confidence_b_to_a']:.0%} (lift={data['lift']:.2f}, co={data['co_occurrence']})")
+
+    return synergies, saved
+
+def synergy_rows(synergies):
+    """Synergies sous la forme des lignes synergy_scores lues par calculate_archetypal_decks.py (card_a, card_b, synergy_score)"""
+    return [
+        {"card_a": card_a, "card_b": card_b, "synergy_score": round(data['lift'], 4)}
+        for (card_a, card_b), data in sorted(synergies.items())
+    ]
+
 def process_synergies(set_code, formats):
     """Calcule et sauvegarde les synergies pour un set"""
     print(f"\n{'='*60}")
@@ -257,43 +417,13 @@ def process_synergies(set_code, formats):
     for fmt in formats:
         print(f"\n📂 Format: {fmt}")
 
-        # Récupérer les trophy decks
-        decks = get_trophy_decks(set_code, fmt)
-        if not decks:
-            print(f"   ⚠️ Aucun deck trouvé")
+        # Mode as-of / historique : résultats datés dans synergy_scores_history
+        if AS_OF_DATE or HISTORY_MODE:
+            total_saved += process_synergy_history(set_code, fmt, AS_OF_DATE, HISTORY_MODE)
             continue
 
-        # Calculer les lift scores
-        synergies = calculate_lift_scores(decks)
-        print(f"   🎯 {len(synergies)} synergies significatives (lift >= {MIN_LIFT_SCORE})")
-
-        if synergies:
-            # Supprimer les anciennes synergies
-            delete_old_synergies(set_code, fmt)
-
-            # Sauvegarder les nouvelles
-            saved = save_synergies(synergies, set_code, fmt)
-            total_saved += saved
-            print(f"   ✅ {saved} synergies sauvegardées")
-
-            # === LOGS: Top 10 par Lift Score ===
-            top_by_lift = sorted(synergies.items(), key=lambda x: x[1]['lift'], reverse=True)[:10]
-            print(f"\n   🏆 Top 10 LIFT (synergies les plus fortes):")
-            for i, ((card_a, card_b), data) in enumerate(top_by_lift, 1):
-                print(f"      {i:2}. {card_a} + {card_b}")
-                print(f"          lift={data['lift']:.2f} | co={data['co_occurrence']} | conf(A→B)={data['confidence_a_to_b']:.0%} conf(B→A)={data['confidence_b_to_a']:.0%}")
-
-            # === LOGS: Top 10 par Confidence A→B ===
-            top_by_conf_ab = sorted(synergies.items(), key=lambda x: x[1]['confidence_a_to_b'], reverse=True)[:10]
-            print(f"\n   🎯 Top 10 CONFIDENCE A→B (si j'ai A, je veux B):")
-            for i, ((card_a, card_b), data) in enumerate(top_by_conf_ab, 1):
-                print(f"      {i:2}. {card_a} → {card_b}: {data['confidence_a_to_b']:.0%} (lift={data['lift']:.2f}, co={data['co_occurrence']})")
-
-            # === LOGS: Top 10 par Confidence B→A ===
-            top_by_conf_ba = sorted(synergies.items(), key=lambda x: x[1]['confidence_b_to_a'], reverse=True)[:10]
-            print(f"\n   🎯 Top 10 CONFIDENCE B→A (si j'ai B, je veux A):")
-            for i, ((card_a, card_b), data) in enumerate(top_by_conf_ba, 1):
-                print(f"      {i:2}. {card_b} → {card_a}: {data['confidence_b_to_a']:.0%} (lift={data['lift']:.2f}, co={data['co_occurrence']})")
+        _, saved = process_format_synergies(set_code, fmt)
+        total_saved += saved
 
     return total_saved
 
@@ -324,10 +454,28 @@ def parse_arguments():
         default=None,
         help=f'Minimum lift score (défaut: {MIN_LIFT_SCORE})'
     )
+    parser.add_argument(
+        '--as-of',
+        type=str,
+        default=None,
+        help='Calcule les synergies avec les decks jusqu\'à cette date incluse, YYYY-MM-DD (résultats dans synergy_scores_history)'
+    )
+    parser.add_argument(
+        '--history',
+        action='store_true',
+        help='Produit chaque jour depuis le premier trophy deck (jusqu\'à --as-of ou au dernier jour)'
+    )
+    parser.add_argument(
+        '--snapshot',
+        action='store_true',
+        help='Lit les decks dans le snapshot local (snapshot_store.py) au lieu de Supabase'
+    )
+    add_profile_argument(parser)
     return parser.parse_args()
 
 if __name__ == "__main__":
     args = parse_arguments()
+    start_profiling(args.profile)
 
     # Override des configs
     if args.sets:
@@ -336,6 +484,12 @@ if __name__ == "__main__":
         TARGET_FORMATS = list(args.formats)
     if args.min_lift:
         MIN_LIFT_SCORE = args.min_lift
+    if args.as_of:
+        AS_OF_DATE = args.as_of
+    if args.history:
+        HISTORY_MODE = True
+    if args.snapshot:
+        USE_SNAPSHOT = True
 
     print("🔗 ETL Synergies - Démarrage")
     print(f"⏰ {datetime.now(timezone.utc).isoformat()}")
@@ -358,6 +512,8 @@ if __name__ == "__main__":
 
     print(f"📋 Formats: {TARGET_FORMATS}")
     print(f"⚙️ Seuils: min_lift={MIN_LIFT_SCORE} (co_occurrence et card_occurrence sont dynamiques)")
+    if AS_OF_DATE or HISTORY_MODE:
+        print(f"📅 As-of: {AS_OF_DATE or 'dernier jour'}{' (historique jour par jour)' if HISTORY_MODE else ''}")
 
     # Traiter chaque set
     total_saved = 0
@@ -6,6 +6,9 @@ import argparse
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 from pathlib import Path
+from supabase_fetch import fetch_all
+from profiling import phase, add_profile_argument, start_profiling
+from trophy_rollups import parse_trophy_time, update_daily_rollups
 
 # ==============================================================================
 # 1. CONFIGURATION
@@ -32,6 +35,9 @@ ALL_COLOR_COMBINATIONS = [
     "WUBRG"
 ]
 
+# Colonnes des decks transmis aux étapes suivantes (pipeline.py : synergies et squelettes)
+DECK_COLUMNS = ["aggregate_id", "archetype", "trophy_time", "cardlist"]
+
 # --- ENVIRONNEMENT ---
 current_dir = Path(__file__).parent
 root_dir = current_dir.parent
@@ -62,6 +68,7 @@ HEADERS_SUPABASE = {
 # 2. FONCTIONS UTILITAIRES
 # ==============================================================================
 
+@phase("throttle")
 def random_sleep(min_seconds=2.5, max_seconds=4.0):
     """Sleep aléatoire pour éviter le rate limiting"""
     sleep_time = random.uniform(min_seconds, max_seconds)
@@ -87,22 +94,6 @@ def get_date_range():
         end_time = now
         return start_time, end_time
 
-def parse_trophy_time(time_str):
-    """Parse le timestamp d'un trophy deck (format ISO) et retourne un datetime UTC"""
-    if not time_str:
-        return None
-    try:
-        # Format: "2024-01-15T10:30:00Z" ou "2024-01-15T10:30:00" ou avec offset
-        if time_str.endswith('Z'):
-            time_str = time_str[:-1] + '+00:00'
-        dt = datetime.fromisoformat(time_str)
-        # S'assurer que le datetime est timezone-aware (UTC)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt
-    except Exception:
-        return None
-
 def normalize_colors(colors_str):
     """Normalise les couleurs en ordre WUBRG standard"""
     if not colors_str:
@@ -111,6 +102,7 @@ def normalize_colors(colors_str):
     chars = sorted(set(colors_str.upper()), key=lambda c: order.index(c) if c in order else 99)
     return "".join(c for c in chars if c in order)
 
+@phase("fetch")
 def fetch_with_retry(url, context_name="Data", max_retries=3, method="GET", payload=None):
     """Fetch avec retry et gestion des erreurs (incluant 403). Supporte GET et POST."""
     for attempt in range(max_retries):
@@ -154,6 +146,7 @@ def fetch_with_retry(url, context_name="Data", max_retries=3, method="GET", payl
 # 3. RECUPERATION DES DONNEES SUPABASE
 # ==============================================================================
 
+@phase("fetch")
 def get_active_sets():
     """Récupère les sets actifs depuis Supabase"""
     url = f"{SUPABASE_URL}/rest/v1/sets?active=eq.true&select=code,start_date"
@@ -169,32 +162,31 @@ def get_active_sets():
         return []
 
 def get_existing_deck_ids(set_code, fmt):
-    """Récupère tous les aggregate_id déjà en BDD pour éviter les doublons (avec pagination)"""
-    all_ids = set()
-    offset = 0
-    page_size = 1000
-
-    while True:
-        url = f"{SUPABASE_URL}/rest/v1/trophy_decks?set_code=eq.{set_code}&format=eq.{fmt}&select=aggregate_id&limit={page_size}&offset={offset}"
-        try:
-            response = requests.get(url, headers=HEADERS_SUPABASE)
-            if response.status_code == 200:
-                data = response.json()
-                if not data:
-                    break  # Plus de données
-                for row in data:
-                    all_ids.add(row['aggregate_id'])
-                if len(data) < page_size:
-                    break  # Dernière page
-                offset += page_size
-            else:
-                print(f"   ⚠️ Erreur fetch existing IDs: {response.text[:100]}")
-                break
-        except Exception as e:
-            print(f"   ⚠️ Exception fetch existing IDs: {e}")
-            break
+    """Récupère tous les aggregate_id déjà en BDD pour éviter les doublons (pagination keyset)"""
+    rows = fetch_all("trophy_decks", f"set_code=eq.{set_code}&format=eq.{fmt}", columns=["aggregate_id"], key="aggregate_id")
+    return {row['aggregate_id'] for row in rows}
+
+def get_trophy_decks(set_code, fmt):
+    """Trophy decks déjà en BDD (DECK_COLUMNS) : sert aussi au dédoublonnage quand les decks sont gardés en mémoire"""
+    return fetch_all(
+        "trophy_decks", f"set_code=eq.{set_code}&format=eq.{fmt}",
+        columns=DECK_COLUMNS, key="aggregate_id", parallel=True
+    )
 
-    return all_ids
+@phase("upsert")
+def save_trophy_decks(records, color_combo):
+    """Upsert des decks d'une combinaison de couleurs, retourne True si la sauvegarde a réussi"""
+    api_url = f"{SUPABASE_URL}/rest/v1/trophy_decks?on_conflict=aggregate_id"
+    try:
+        resp = requests.post(api_url, json=records, headers=HEADERS_SUPABASE)
+        if resp.status_code >= 400:
+            print(f"      ❌ Erreur sauvegarde {color_combo}: {resp.text[:200]}")
+            return False
+        print(f"      ✅ {len(records)} decks {color_combo} sauvegardés")
+        return True
+    except Exception as e:
+        print(f"      ❌ Exception POST {color_combo}: {e}")
+        return False
 
 # ==============================================================================
 # 4. FONCTIONS DE SCRAPING 17LANDS
@@ -227,6 +219,7 @@ def fetch_deck_details(aggregate_id, deck_index=0):
     url = f"https://www.17lands.com/data/deck?draft_id={aggregate_id}&deck_index={deck_index}"
     return fetch_with_retry(url, f"Deck {aggregate_id}")
 
+@phase("parse")
 def process_deck_to_cardlist(deck_data):
     """
     Transforme les données d'un deck en liste de cartes avec quantités.
@@ -273,10 +266,12 @@ def process_deck_to_cardlist(deck_data):
 # 5. INGESTION DES TROPHY DECKS
 # ==============================================================================
 
-def ingest_trophy_decks(set_code, formats):
+def ingest_trophy_decks(set_code, formats, decks_by_format=None):
     """
     Ingère les trophy decks pour un set donné, tous formats et toutes couleurs.
     Filtre par date selon TARGET_DATE (date spécifique) ou dernières 24h.
+    decks_by_format (dict, pipeline.py) : complété par format avec tous les decks du set
+    (BDD + decks sauvegardés pendant ce run, triés par aggregate_id), sans relecture en BDD.
     """
     print(f"\n{'='*60}")
     print(f"🏆 TROPHY DECKS - Set: {set_code}")
@@ -295,8 +290,15 @@ def ingest_trophy_decks(set_code, formats):
         print(f"\n📂 Format: {fmt}")
 
         # Récupérer les IDs déjà en BDD pour éviter les doublons
-        existing_ids = get_existing_deck_ids(set_code, fmt)
+        # (decks complets si les étapes suivantes les réutilisent en mémoire)
+        decks = None
+        if decks_by_format is None:
+            existing_ids = get_existing_deck_ids(set_code, fmt)
+        else:
+            decks = decks_by_format[fmt] = get_trophy_decks(set_code, fmt)
+            existing_ids = {deck['aggregate_id'] for deck in decks}
         print(f"   📦 {len(existing_ids)} decks déjà en BDD")
+        saved_before = stats["total_saved"]
 
         # Parcourir chaque combinaison de couleurs (un appel API par couleur)
         for color_combo in ALL_COLOR_COMBINATIONS:
@@ -373,20 +375,20 @@ def ingest_trophy_decks(set_code, formats):
                 color_records.append(record)
 
             # Sauvegarder au fil de l'eau après chaque combinaison de couleurs
-            if color_records:
-                api_url = f"{SUPABASE_URL}/rest/v1/trophy_decks?on_conflict=aggregate_id"
-                try:
-                    resp = requests.post(api_url, json=color_records, headers=HEADERS_SUPABASE)
-                    if resp.status_code >= 400:
-                        print(f"      ❌ Erreur sauvegarde {color_combo}: {resp.text[:200]}")
-                    else:
-                        stats["total_saved"] += len(color_records)
-                        print(f"      ✅ {len(color_records)} decks {color_combo} sauvegardés")
-                        # Ajouter les IDs sauvegardés pour éviter les doublons dans la même session
-                        for rec in color_records:
-                            existing_ids.add(rec['aggregate_id'])
-                except Exception as e:
-                    print(f"      ❌ Exception POST {color_combo}: {e}")
+            if color_records and save_trophy_decks(color_records, color_combo):
+                stats["total_saved"] += len(color_records)
+                # Ajouter les IDs sauvegardés pour éviter les doublons dans la même session
+                for rec in color_records:
+                    existing_ids.add(rec['aggregate_id'])
+                if decks is not None:
+                    decks.extend({col: rec[col] for col in DECK_COLUMNS} for rec in color_records)
+
+        if decks is not None:
+            decks.sort(key=lambda deck: deck['aggregate_id']) # Même ordre qu'une relecture (fetch_all)
+
+        # Rollups quotidiens : on recalcule les jours couverts par la période ingérée
+        if stats["total_saved"] > saved_before:
+            update_daily_rollups(set_code, fmt, since_day=start_time.date().isoformat(), decks=decks)
 
     # Résumé
     print(f"\n📈 Résumé {set_code}:")
@@ -432,10 +434,12 @@ def parse_arguments():
         default=None,
         help='Combinaisons de couleurs à scraper (ex: --colors WU WB WUB)'
     )
+    add_profile_argument(parser)
     return parser.parse_args()
 
 if __name__ == "__main__":
     args = parse_arguments()
+    start_profiling(args.profile)
 
     # Override des configs par les arguments CLI
     if args.date:
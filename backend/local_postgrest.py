@@ -0,0 +1,630 @@
+"""
+Stand-in local de l'API REST Supabase (PostgREST), adossé à SQLite, pour les runs de bout en bout
+et les benchmarks d'écriture sans le vrai projet.
+
+Implémente uniquement le sous-ensemble utilisé par les scripts backend :
+- GET    /rest/v1/<table>?select=a,b&col=eq.v&order=a.asc,b.asc&limit=N&offset=M
+         opérateurs eq, neq, gt, gte, lt, lte, in.(...), is.null, ov.{...} (colonne JSON liste) ;
+         or=(...,and(...)) (pagination keyset)
+         Prefer: count=exact -> total dans Content-Range (0-999/12345)
+- POST   /rest/v1/<table>?on_conflict=a,b  (Prefer: resolution=merge-duplicates | ignore-duplicates)
+- PATCH  /rest/v1/<table>?<filtres>
+- DELETE /rest/v1/<table>?<filtres>        (filtre obligatoire, comme sur Supabase)
+
+Pas de schéma à déclarer : tables et colonnes sont créées à la première écriture (type déduit des
+valeurs, dict/list stockés en JSON) et une colonne jamais écrite se lit comme null. Les clés
+d'upsert (on_conflict, ou TABLE_KEYS par défaut) deviennent des index uniques.
+
+Fixtures générées par synthetic_trophy_decks.py (set SYN) : sets, card_list, card_stats,
+archetype_stats, trophy_decks, synergy_scores, archetypal_skeletons.
+
+Usage:
+    python backend/local_postgrest.py                          # http://127.0.0.1:54321, fixtures de 2000 decks
+    SUPABASE_URL=http://127.0.0.1:54321 python backend/pipeline.py --sets SYN --from synergy --no-artifacts
+    python backend/local_postgrest.py --db /tmp/local.sqlite --decks 20000   # Base conservée entre deux lancements
+    python backend/local_postgrest.py --fixtures dump.json     # {table: [lignes]} au lieu des fixtures synthétiques
+    python backend/local_postgrest.py --bench-writes           # Débit des upserts (etl_script.upsert_records) par taille de lot
+"""
+
+import io
+import re
+import json
+import time
+import random
+import sqlite3
+import argparse
+import threading
+import contextlib
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+from synthetic_trophy_decks import generate_dataset, SET_CODE, DAYS, REFERENCE_NOW
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+
+HOST = "127.0.0.1"
+PORT = 54321        # Port de l'API d'un projet Supabase local
+DB_PATH = ":memory:"
+VERBOSE = False     # Log de chaque requête
+
+# Fixtures synthétiques
+N_DECKS = 2000
+SEED = 1
+FORMAT = "PremierDraft"
+
+# Clés d'upsert par défaut (clés primaires côté Supabase), les mêmes que les on_conflict des scripts
+TABLE_KEYS = {
+    "sets": "code",
+    "card_list": "card_name,set_code",
+    "card_stats": "set_code,card_name,filter_context,format",
+    "archetype_stats": "set_code,colors,format",
+    "trophy_decks": "aggregate_id",
+    "synergy_scores": "set_code,format,card_a,card_b",
+    "archetypal_skeletons": "set_code,format,archetype_name,variant_index",
+}
+
+# Benchmark d'écriture : tailles de lot passées à etl_script.upsert_records
+BENCH_BATCH_SIZES = [100, 500, 1000]
+BENCH_TABLES = ["trophy_decks", "synergy_scores"]
+
+# Type SQLite déclaré -> type des valeurs renvoyées (l'affinité convertit les filtres texte en nombres)
+SQL_TYPES = {"bool": "BOOLEAN", "int": "INTEGER", "real": "REAL", "text": "TEXT", "json": "JSON TEXT"}
+KIND_BY_SQL_TYPE = {sql: kind for kind, sql in SQL_TYPES.items()}
+
+OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+class QueryError(Exception):
+    """Requête hors du sous-ensemble PostgREST supporté (réponse 400)"""
+
+# ==============================================================================
+# 2. STOCKAGE SQLITE
+# ==============================================================================
+
+def quote_ident(name):
+    if not IDENTIFIER.match(name or ""):
+        raise QueryError(f"identifiant invalide: {name!r}")
+    return f'"{name}"'
+
+def value_kind(value):
+    if isinstance(value, bool): return "bool"
+    if isinstance(value, int): return "int"
+    if isinstance(value, float): return "real"
+    if isinstance(value, (dict, list)): return "json"
+    return "text"
+
+def encode_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+def decode_value(kind, value):
+    if value is None: return None
+    if kind == "json": return json.loads(value)
+    if kind == "bool": return bool(value)
+    return value
+
+class Store:
+    """Base SQLite partagée par les threads du serveur (accès sérialisés par un verrou)"""
+
+    def __init__(self, path=DB_PATH):
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.lock = threading.Lock()
+        self.kinds = {} # {table: {colonne: kind}}
+        for (table,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall():
+            self.kinds[table] = {
+                row[1]: KIND_BY_SQL_TYPE.get(row[2])
+                for row in self.conn.execute(f"PRAGMA table_info({quote_ident(table)})")
+            }
+
+    def _ensure_columns(self, table, columns, samples=()):
+        """Crée la table / les colonnes manquantes, typées d'après la première valeur non nulle"""
+        def sql_type(column):
+            for row in samples:
+                if row.get(column) is not None:
+                    return SQL_TYPES[value_kind(row[column])]
+            return ""
+
+        known = self.kinds.get(table)
+        missing = [c for c in columns if known is None or c not in known]
+        if not missing:
+            return
+        if known is None:
+            defs = ", ".join(f"{quote_ident(c)} {sql_type(c)}".strip() for c in missing)
+            self.conn.execute(f"CREATE TABLE {quote_ident(table)} ({defs})")
+            known = self.kinds[table] = {}
+        else:
+            for c in missing:
+                self.conn.execute(f"ALTER TABLE {quote_ident(table)} ADD COLUMN {quote_ident(c)} {sql_type(c)}".strip())
+        for c in missing:
+            known[c] = KIND_BY_SQL_TYPE.get(sql_type(c))
+
+    def _ensure_unique(self, table, keys):
+        name = quote_ident(f"{table}__{'__'.join(keys)}")
+        cols = ", ".join(quote_ident(k) for k in keys)
+        self.conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {quote_ident(table)} ({cols})")
+
+    def _where(self, table, filters):
+        """Arbre de filtres -> (clause SQL, paramètres), colonnes inconnues ajoutées (null)"""
+        if not filters:
+            return "", []
+        self._ensure_columns(table, sorted(filter_columns(filters)))
+        params = []
+        sql = " AND ".join(compile_filter(node, self.kinds[table], params) for node in filters)
+        return f" WHERE {sql}", params
+
+    def upsert(self, table, rows, on_conflict=None, resolution=None):
+        """INSERT par lot ; avec on_conflict + résolution, fusion ou ignore des doublons. Retourne le nombre de lignes."""
+        if not rows:
+            return 0
+        columns = list(dict.fromkeys(c for row in rows for c in row))
+        keys = [k.strip() for k in (on_conflict or TABLE_KEYS.get(table, "")).split(",") if k.strip()]
+        with self.lock:
+            self._ensure_columns(table, columns + [k for k in keys if k not in columns], rows)
+            if keys:
+                self._ensure_unique(table, keys)
+
+            cols = ", ".join(quote_ident(c) for c in columns)
+            sql = f"INSERT INTO {quote_ident(table)} ({cols}) VALUES ({', '.join('?' * len(columns))})"
+            updates = [c for c in columns if c not in keys]
+            if keys and resolution == "merge-duplicates" and updates:
+                assignments = ", ".join(f"{quote_ident(c)} = excluded.{quote_ident(c)}" for c in updates)
+                sql += f" ON CONFLICT ({', '.join(quote_ident(k) for k in keys)}) DO UPDATE SET {assignments}"
+            elif keys and resolution in ("merge-duplicates", "ignore-duplicates"):
+                sql += f" ON CONFLICT ({', '.join(quote_ident(k) for k in keys)}) DO NOTHING"
+
+            values = [tuple(encode_value(row.get(c)) for c in columns) for row in rows]
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(sql, values)
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+        return len(rows)
+
+    def select(self, table, columns, filters=(), order=(), limit=None, offset=0, count=False):
+        """Lignes décodées (+ total si count) ; table inexistante = aucune ligne"""
+        with self.lock:
+            if table not in self.kinds:
+                return [], 0 if count else None
+            if columns is None:
+                columns = list(self.kinds[table])
+            self._ensure_columns(table, columns + [c for c, _ in order])
+            where, params = self._where(table, filters)
+            kinds = self.kinds[table]
+
+            # Tri Postgres : NULL en dernier en ordre croissant, en premier en ordre décroissant
+            order_sql = ", ".join(
+                f"{quote_ident(c)} IS NULL{' DESC' if desc else ''}, {quote_ident(c)}{' DESC' if desc else ''}"
+                for c, desc in order
+            )
+            sql = f"SELECT {', '.join(quote_ident(c) for c in columns)} FROM {quote_ident(table)}{where}"
+            if order_sql:
+                sql += f" ORDER BY {order_sql}"
+            if limit is not None or offset:
+                sql += f" LIMIT {-1 if limit is None else int(limit)} OFFSET {int(offset)}"
+
+            rows = [
+                {c: decode_value(kinds[c], v) for c, v in zip(columns, values)}
+                for values in self.conn.execute(sql, params)
+            ]
+            total = None
+            if count:
+                total = self.conn.execute(f"SELECT COUNT(*) FROM {quote_ident(table)}{where}", params).fetchone()[0]
+        return rows, total
+
+    def update(self, table, values, filters):
+        with self.lock:
+            if table not in self.kinds:
+                return 0
+            self._ensure_columns(table, list(values), [values])
+            where, params = self._where(table, filters)
+            assignments = ", ".join(f"{quote_ident(c)} = ?" for c in values)
+            cursor = self.conn.execute(
+                f"UPDATE {quote_ident(table)} SET {assignments}{where}",
+                [encode_value(v) for v in values.values()] + params
+            )
+        return cursor.rowcount
+
+    def delete(self, table, filters):
+        with self.lock:
+            if table not in self.kinds:
+                return 0
+            where, params = self._where(table, filters)
+            cursor = self.conn.execute(f"DELETE FROM {quote_ident(table)}{where}", params)
+        return cursor.rowcount
+
+    def table_counts(self):
+        with self.lock:
+            return {
+                table: self.conn.execute(f"SELECT COUNT(*) FROM {quote_ident(table)}").fetchone()[0]
+                for table in self.kinds
+            }
+
+# ==============================================================================
+# 3. FILTRES POSTGREST
+# ==============================================================================
+
+def split_top_level(text):
+    """Découpe "a,and(b,c),"d,e"" sur les virgules hors parenthèses et hors guillemets"""
+    parts, current, depth, quoted, escaped = [], [], 0, False, False
+    for ch in text:
+        if escaped:
+            escaped = False
+        elif ch == '\\' and quoted:
+            escaped = True
+        elif ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == '(':
+            depth += 1
+        elif not quoted and ch == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ',':
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(ch)
+    parts.append("".join(current))
+    return parts
+
+def unquote_value(text):
+    """Valeur "entre guillemets" des filtres logiques et des listes in.(...)"""
+    if len(text) >= 2 and text[0] == '"' and text[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', text[1:-1])
+    return text
+
+def parse_condition(column, expr, quoted=False):
+    """
+    ("cmp", colonne, op SQL, valeur) | ("in", colonne, valeurs) | ("is", colonne, null/true/false)
+    | ("ov", colonne, valeurs) : chevauchement d'un tableau (&& Postgres), liste stockée en JSON
+    """
+    op, _, value = expr.partition(".")
+    if op in OPERATORS:
+        return ("cmp", column, OPERATORS[op], unquote_value(value) if quoted else value)
+    if op == "in" and value.startswith("(") and value.endswith(")"):
+        return ("in", column, [unquote_value(v) for v in split_top_level(value[1:-1])])
+    if op == "is" and value in ("null", "true", "false"):
+        return ("is", column, value)
+    if op == "ov" and value.startswith("{") and value.endswith("}"):
+        return ("ov", column, [unquote_value(v) for v in split_top_level(value[1:-1]) if v])
+    raise QueryError(f"filtre non supporté: {column}={expr}")
+
+def parse_logic(op, text):
+    """or=(a.gt.1,and(a.eq.1,b.gt.2)) -> ("or", [conditions / sous-arbres])"""
+    if not (text.startswith("(") and text.endswith(")")):
+        raise QueryError(f"filtre logique invalide: {op}={text}")
+    nodes = []
+    for part in split_top_level(text[1:-1]):
+        name, _, rest = part.partition("(")
+        if name in ("and", "or") and rest:
+            nodes.append(parse_logic(name, "(" + rest))
+        else:
+            column, _, expr = part.partition(".")
+            nodes.append(parse_condition(column, expr, quoted=True))
+    return (op, nodes)
+
+def parse_filters(params):
+    """Paramètres de requête (hors select/order/...) -> liste de conditions combinées par AND"""
+    filters = []
+    for name, value in params:
+        if name in RESERVED_PARAMS:
+            continue
+        if name in ("and", "or"):
+            filters.append(parse_logic(name, value))
+        else:
+            filters.append(parse_condition(name, value))
+    return filters
+
+def filter_columns(filters):
+    columns = set()
+    for node in filters:
+        if node[0] in ("and", "or"):
+            columns |= filter_columns(node[1])
+        else:
+            columns.add(node[1])
+    return columns
+
+def coerce_value(kind, text):
+    """Valeur texte d'un filtre -> valeur comparable (les nombres sont convertis par l'affinité SQLite)"""
+    if kind == "bool":
+        return {"true": 1, "false": 0}.get(text, text)
+    return text
+
+def compile_filter(node, kinds, params):
+    kind = node[0]
+    if kind in ("and", "or"):
+        return "(" + f" {kind.upper()} ".join(compile_filter(n, kinds, params) for n in node[1]) + ")"
+
+    column = quote_ident(node[1])
+    if kind == "cmp":
+        params.append(coerce_value(kinds.get(node[1]), node[3]))
+        return f"{column} {node[2]} ?"
+    if kind == "in":
+        params.extend(coerce_value(kinds.get(node[1]), v) for v in node[2])
+        return f"{column} IN ({', '.join('?' * len(node[2]))})"
+    if kind == "ov":
+        if not node[2]:
+            return "0"
+        params.extend(node[2])
+        return f"EXISTS (SELECT 1 FROM json_each({column}) WHERE json_each.value IN ({', '.join('?' * len(node[2]))}))"
+    return f"{column} IS NULL" if node[2] == "null" else f"{column} = {1 if node[2] == 'true' else 0}"
+
+def parse_order(text):
+    order = []
+    for part in filter(None, (text or "").split(",")):
+        column, _, direction = part.partition(".")
+        if direction not in ("", "asc", "desc"):
+            raise QueryError(f"tri non supporté: {part}")
+        order.append((column, direction == "desc"))
+    return order
+
+def parse_prefer(header):
+    """Prefer: resolution=merge-duplicates, count=exact -> {"resolution": ..., "count": ...}"""
+    prefs = {}
+    for part in (header or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            prefs[name] = value
+    return prefs
+
+# ==============================================================================
+# 4. SERVEUR HTTP
+# ==============================================================================
+
+class PostgrestHandler(BaseHTTPRequestHandler):
+    """Routes /rest/v1/<table> ; le store est porté par le serveur"""
+
+    protocol_version = "HTTP/1.1" # Keep-alive : les sessions requests réutilisent leur connexion
+
+    def _send(self, status, body=None, headers=None):
+        payload = b"" if body is None else json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        if body is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status, code, message):
+        self._send(status, {"code": code, "message": message, "details": None, "hint": None})
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def _handle(self, method):
+        url = urlsplit(self.path)
+        table = url.path[len("/rest/v1/"):] if url.path.startswith("/rest/v1/") else None
+        if not table or not IDENTIFIER.match(table):
+            return self._error(404, "PGRST125", f"route inconnue: {url.path}")
+
+        params = parse_qsl(url.query, keep_blank_values=True)
+        options = dict(params)
+        prefer = parse_prefer(self.headers.get("Prefer"))
+        store = self.server.store
+        try:
+            filters = parse_filters(params)
+            if method == "GET":
+                return self._get(store, table, options, filters, prefer)
+            if method == "POST":
+                body = self._read_json()
+                rows = body if isinstance(body, list) else [body]
+                store.upsert(table, rows, options.get("on_conflict"), prefer.get("resolution"))
+                return self._send(201)
+            if method == "PATCH":
+                store.update(table, self._read_json(), filters)
+                return self._send(204)
+            if not filters:
+                return self._error(400, "21000", "DELETE requires a WHERE clause")
+            store.delete(table, filters)
+            return self._send(204)
+        except QueryError as e:
+            return self._error(400, "PGRST100", str(e))
+        except sqlite3.IntegrityError as e:
+            return self._error(409, "23505", str(e))
+        except (sqlite3.Error, ValueError) as e:
+            return self._error(400, "PGRST102", str(e))
+
+    def _get(self, store, table, options, filters, prefer):
+        select = options.get("select", "*")
+        columns = None if select == "*" else [c.strip() for c in select.split(",") if c.strip()]
+        offset = int(options.get("offset") or 0)
+        limit = int(options["limit"]) if options.get("limit") else None
+        rows, total = store.select(
+            table, columns, filters, parse_order(options.get("order")), limit, offset, prefer.get("count") == "exact"
+        )
+
+        # Content-Range: 0-999/12345 (total "*" sans Prefer: count=exact)
+        total_text = "*" if total is None else str(total)
+        span = f"{offset}-{offset + len(rows) - 1}" if rows else "*"
+        partial = total is not None and offset + len(rows) < total
+        self._send(206 if partial else 200, rows, {"Content-Range": f"{span}/{total_text}"})
+
+    def do_GET(self): self._handle("GET")
+    def do_POST(self): self._handle("POST")
+    def do_PATCH(self): self._handle("PATCH")
+    def do_DELETE(self): self._handle("DELETE")
+
+    def log_message(self, format, *args):
+        if VERBOSE:
+            super().log_message(format, *args)
+
+def make_server(store, host=HOST, port=PORT):
+    """Serveur HTTP multi-thread sur le store (port 0 = port libre)"""
+    server = ThreadingHTTPServer((host, port), PostgrestHandler)
+    server.daemon_threads = True
+    server.store = store
+    return server
+
+# ==============================================================================
+# 5. FIXTURES
+# ==============================================================================
+
+def build_skeleton_rows(dataset, fmt):
+    """archetypal_skeletons calculés par calculate_archetypal_decks sur le set synthétique"""
+    import calculate_archetypal_decks as cad
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctx = cad.FormatContext(dataset["cards"])
+        features = cad.featurize_decks(dataset["trophy_decks"], ctx, now=REFERENCE_NOW)
+        synergy_index = cad.build_synergy_index(dataset["synergy_scores"], ctx)
+        by_arch = {}
+        for f in features:
+            by_arch.setdefault(f.deck['archetype'], []).append(f)
+        jobs = [(arch, decks) for arch, decks in sorted(by_arch.items()) if len(decks) >= 3]
+        results = cad.run_archetype_jobs(jobs, ctx, synergy_index, SET_CODE, fmt, workers=1, now=REFERENCE_NOW)
+
+    synergy_gen = cad.synergy_generation(synergy_index)
+    rows = []
+    for (arch, decks), skeletons in zip(jobs, results):
+        fingerprint = cad.archetype_fingerprint(decks, ctx.version, synergy_gen)
+        rows.extend({**skeleton, "fingerprint": fingerprint} for skeleton in skeletons)
+    return rows
+
+def generate_fixtures(n_decks=N_DECKS, seed=SEED, fmt=FORMAT):
+    """{table: lignes} d'un set synthétique complet, au format des tables Supabase"""
+    dataset = generate_dataset(n_decks, seed, fmt)
+    rng = random.Random(seed)
+    cards = dataset["cards"].values()
+
+    card_stats = []
+    for card in cards:
+        gih = card["gih_wr"]
+        card_stats.append({
+            "set_code": SET_CODE, "card_name": card["card_name"], "rarity": card["rarity"], "colors": card["colors"],
+            "filter_context": "Global", "format": fmt, "gih_wr": gih, "alsa": card["alsa"],
+            "img_count": rng.randint(200, 5000) if gih is not None else 0,
+            "win_rate_history": [round(gih + rng.gauss(0, 1), 2) for _ in range(14)] if gih is not None else [],
+        })
+
+    games = {}
+    for deck in dataset["trophy_decks"]:
+        games[deck["archetype"]] = games.get(deck["archetype"], 0) + 1
+    archetype_stats = []
+    for colors, n in sorted(games.items()):
+        win_rate = round(rng.uniform(50, 60), 1)
+        archetype_stats.append({
+            "set_code": SET_CODE, "archetype_name": colors, "colors": colors, "format": fmt,
+            "win_rate": win_rate, "games_count": n * 40,
+            "win_rate_history": [round(win_rate + rng.gauss(0, 0.8), 1) for _ in range(14)],
+        })
+
+    scraped_at = REFERENCE_NOW.isoformat()
+    return {
+        "sets": [{"code": SET_CODE, "active": True, "start_date": (REFERENCE_NOW - timedelta(days=DAYS)).date().isoformat()}],
+        "card_list": [{"set_code": SET_CODE, **{k: v for k, v in card.items() if k not in ("alsa", "gih_wr")}} for card in cards],
+        "card_stats": card_stats,
+        "archetype_stats": archetype_stats,
+        "trophy_decks": [{**deck, "scraped_at": scraped_at} for deck in dataset["trophy_decks"]],
+        "synergy_scores": dataset["synergy_scores"],
+        "archetypal_skeletons": build_skeleton_rows(dataset, fmt),
+    }
+
+def load_fixtures(store, fixtures):
+    """Charge les fixtures dans les tables qui n'existent pas encore (une base --db existante est conservée)"""
+    for table, rows in fixtures.items():
+        if table in store.kinds:
+            print(f"   ⏭️ {table} déjà présente, fixtures ignorées")
+            continue
+        store.upsert(table, rows, TABLE_KEYS.get(table), "merge-duplicates")
+        print(f"   📥 {table}: {len(rows)} lignes")
+
+# ==============================================================================
+# 6. BENCHMARK D'ÉCRITURE
+# ==============================================================================
+
+def bench_writes(fixtures, batch_sizes=BENCH_BATCH_SIZES, tables=BENCH_TABLES):
+    """
+    Débit de etl_script.upsert_records contre un serveur local vierge, par table et taille de lot :
+    insertion initiale puis ré-upsert des mêmes lignes (merge-duplicates).
+    Mesure le coût client + HTTP + JSON, à comparer entre tailles de lot, pas la latence Supabase.
+    """
+    import etl_script
+
+    print(f"\n⏱️ Upserts via etl_script.upsert_records (lots: {batch_sizes})")
+    for table in (t for t in tables if t in fixtures):
+        rows = fixtures[table]
+        print(f"\n📦 {table} ({len(rows)} lignes)")
+        for batch_size in batch_sizes:
+            server = make_server(Store(), HOST, 0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            etl_script.SUPABASE_URL = f"http://{HOST}:{server.server_address[1]}"
+            timings = []
+            for _ in range(2):
+                start = time.perf_counter()
+                saved = etl_script.upsert_records(table, rows, TABLE_KEYS[table], batch_size)
+                timings.append(time.perf_counter() - start)
+            server.shutdown()
+            server.server_close()
+            insert_s, merge_s = timings
+            print(f"   lots de {batch_size:>5} : insertion {saved / insert_s:>9.0f} lignes/s, "
+                  f"ré-upsert {saved / merge_s:>9.0f} lignes/s")
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+
+def parse_arguments():
+    """Parse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Local SQLite-backed PostgREST stand-in for offline runs')
+    parser.add_argument('--host', type=str, default=None, help=f'Adresse d\'écoute (défaut: {HOST})')
+    parser.add_argument('--port', '-p', type=int, default=None, help=f'Port (défaut: {PORT})')
+    parser.add_argument('--db', type=str, default=None, help='Fichier SQLite (défaut: base en mémoire)')
+    parser.add_argument('--fixtures', type=str, default=None, help='Fixtures JSON {table: [lignes]} au lieu du set synthétique')
+    parser.add_argument('--no-fixtures', action='store_true', help='Démarre sur une base vide')
+    parser.add_argument('--decks', '-n', type=int, default=None, help=f'Trophy decks synthétiques (défaut: {N_DECKS})')
+    parser.add_argument('--seed', type=int, default=None, help=f'Seed du générateur (défaut: {SEED})')
+    parser.add_argument('--bench-writes', action='store_true', help='Mesure le débit des upserts puis quitte')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Log de chaque requête')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    # Override des configs
+    if args.host:
+        HOST = args.host
+    if args.port is not None:
+        PORT = args.port
+    if args.db:
+        DB_PATH = args.db
+    if args.decks:
+        N_DECKS = args.decks
+    if args.seed is not None:
+        SEED = args.seed
+    if args.verbose:
+        VERBOSE = True
+
+    fixtures = {}
+    if args.fixtures:
+        with open(args.fixtures) as f:
+            fixtures = json.load(f)
+    elif not args.no_fixtures or args.bench_writes:
+        print(f"🧪 Génération des fixtures synthétiques ({N_DECKS} decks, seed={SEED})...")
+        fixtures = generate_fixtures(N_DECKS, SEED)
+
+    if args.bench_writes:
+        bench_writes(fixtures)
+        raise SystemExit(0)
+
+    store = Store(DB_PATH)
+    load_fixtures(store, fixtures)
+    server = make_server(store, HOST, PORT)
+    url = f"http://{HOST}:{server.server_address[1]}"
+    counts = store.table_counts()
+    print(f"🚀 PostgREST local sur {url}/rest/v1 ({len(counts)} tables, {sum(counts.values())} lignes)")
+    print(f"   SUPABASE_URL={url} python backend/<script>.py ...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Arrêt du serveur")
+    server.server_close()
@@ -0,0 +1,157 @@
+"""
+Correspondance floue locale de noms de cartes (index de trigrammes + distance d'édition).
+
+Remplace les appels `cards/named?fuzzy=` un par un : les candidats sont trouvés par
+trigrammes communs, puis classés par distance d'édition sur les noms normalisés.
+Chaque résultat porte une confiance entre 0 et 1 ; en dessous de MIN_CONFIDENCE,
+l'appelant peut se rabattre sur la recherche floue distante.
+
+Usage:
+    matcher = TrigramMatcher()
+    matcher.add("Fire // Ice")               # Nom complet
+    matcher.add("Fire", "Fire // Ice")       # Alias (face avant) vers le nom canonique
+    matcher.match("fire//ice")               # -> ("Fire // Ice", 1.0)
+"""
+
+import re
+import heapq
+import unicodedata
+from collections import Counter
+from itertools import chain
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+
+MIN_CONFIDENCE = 0.8   # En dessous : correspondance jugée incertaine (1 faute sur 5 lettres)
+CANDIDATES = 8         # Candidats (par trigrammes) départagés par distance d'édition
+PRESELECT = 32         # Candidats retenus sur les trigrammes les plus rares, avant le Dice exact
+
+_PUNCTUATION = re.compile(r"[^a-z0-9/ ]+")
+_SPACES = re.compile(r"\s+")
+
+# ==============================================================================
+# 2. NORMALISATION ET DISTANCE
+# ==============================================================================
+
+def normalize_name(name):
+    """Minuscules, sans accents ni ponctuation, espaces simples ("Æther-Vial" -> "aether vial")"""
+    name = unicodedata.normalize("NFKD", name.replace("Æ", "Ae").replace("æ", "ae"))
+    name = "".join(c for c in name if not unicodedata.combining(c)).lower()
+    name = name.replace("’", "").replace("'", "").replace("//", " // ")
+    name = _PUNCTUATION.sub(" ", name)
+    return _SPACES.sub(" ", name).strip()
+
+def trigrams(normalized):
+    """Trigrammes d'un nom normalisé, bordé d'espaces (les débuts de nom pèsent davantage)"""
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a, b):
+    """
+    Distance d'édition avec transpositions de lettres voisines ("Alpah" -> "Alpha" = 1),
+    algorithme bit-parallèle de Myers/Hyyrö : une colonne de la matrice par opération sur entiers.
+    """
+    if not a:
+        return len(b)
+    peq = {}
+    bit = 1
+    for c in a:
+        peq[c] = peq.get(c, 0) | bit
+        bit <<= 1
+    last = 1 << (len(a) - 1)
+    vp = (1 << len(a)) - 1
+    vn = 0
+    distance = len(a)
+    prev_x = 0
+    d0 = 0
+    for c in b:
+        x = peq.get(c, 0)
+        transposed = (((~d0) & x) << 1) & prev_x
+        d0 = (((x & vp) + vp) ^ vp) | x | vn | transposed
+        hp = vn | ~(d0 | vp)
+        hn = d0 & vp
+        if hp & last:
+            distance += 1
+        elif hn & last:
+            distance -= 1
+        hp = (hp << 1) | 1
+        hn <<= 1
+        vp = hn | ~(d0 | hp)
+        vn = hp & d0
+        prev_x = x
+    return distance
+
+def similarity(a, b):
+    """1 - distance d'édition normalisée par la longueur du plus long nom"""
+    if not a and not b:
+        return 1.0
+    return 1.0 - edit_distance(a, b) / max(len(a), len(b))
+
+# ==============================================================================
+# 3. INDEX
+# ==============================================================================
+
+class TrigramMatcher:
+    """Index de noms (et alias) vers leur nom canonique, interrogeable par nom approché"""
+
+    def __init__(self, names=()):
+        self.exact = {}      # nom normalisé -> nom canonique
+        self.keys = []       # id -> nom normalisé
+        self.canonical = []  # id -> nom canonique
+        self.grams = []      # id -> trigrammes
+        self.postings = {}   # trigramme -> [ids]
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, name, canonical=None):
+        """Indexe `name` (nom ou alias) comme écriture de `canonical` (par défaut le nom lui-même)"""
+        key = normalize_name(name)
+        if not key or key in self.exact:
+            return
+        canonical = canonical or name
+        self.exact[key] = canonical
+        grams = trigrams(key)
+        item_id = len(self.keys)
+        self.keys.append(key)
+        self.canonical.append(canonical)
+        self.grams.append(grams)
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(item_id)
+
+    def matches(self, name, limit=3):
+        """Meilleures correspondances [(nom canonique, confiance)], confiance décroissante"""
+        key = normalize_name(name)
+        if not key:
+            return []
+        if key in self.exact:
+            return [(self.exact[key], 1.0)]
+
+        grams = trigrams(key)
+        rarest = sorted(grams, key=lambda g: len(self.postings.get(g, ())))[:len(grams) // 2 + 2]
+        shared = Counter(chain.from_iterable(self.postings.get(gram, ()) for gram in rarest))
+        if not shared:
+            return []
+
+        # Candidats par les trigrammes les plus rares ("  th", " of" sont partagés par des milliers de noms),
+        # puis coefficient de Dice exact et enfin distance d'édition
+        n = len(grams)
+        candidates = [item_id for item_id, _ in shared.most_common(PRESELECT)]
+        candidates = heapq.nlargest(
+            CANDIDATES, candidates, key=lambda i: 2 * len(grams & self.grams[i]) / (n + len(self.grams[i]))
+        )
+        best = {}
+        for item_id in candidates:
+            score = similarity(key, self.keys[item_id])
+            canonical = self.canonical[item_id]
+            if score > best.get(canonical, -1.0):
+                best[canonical] = score
+        return sorted(best.items(), key=lambda x: (-x[1], x[0]))[:limit]
+
+    def match(self, name):
+        """(nom canonique, confiance) de la meilleure correspondance, (None, 0.0) si aucune"""
+        found = self.matches(name, limit=1)
+        return found[0] if found else (None, 0.0)
@@ -0,0 +1,268 @@
+"""
+Pipeline trophy decks en un seul processus : scraping -> synergies -> squelettes archétypaux.
+
+Remplace l'enchaînement etl_script_trophydecks.py, etl_script_synergy.py, calculate_archetypal_decks.py :
+les étapes forment un DAG (STAGES), exécuté par set/format dans l'ordre topologique, et chaque
+étape reçoit en mémoire les sorties de ses dépendances au lieu de les relire dans Supabase.
+- decks     : scraping 17lands ; decks déjà en BDD lus une seule fois, complétés par les decks sauvegardés
+- metadata  : card_list + stats card_stats (FormatContext des squelettes)
+- synergy   : lift scores calculés sur les decks en mémoire (noms canoniques de metadata)
+- skeletons : squelettes avec decks, métadonnées, synergies et rollups (recalculés depuis les decks) en mémoire
+
+Chaque sortie est aussi écrite en artefact (JSON gzip, ARTIFACTS_DIR/<set>/<format>/<étape>.json.gz).
+Une étape sautée (--skip, ou en amont de --from) reprend son artefact, ou à défaut relit la BDD.
+Les modes as-of / historique restent dans les scripts individuels.
+
+Usage:
+    python backend/pipeline.py
+    python backend/pipeline.py --sets ECL --formats PremierDraft --date 2025-01-20
+    python backend/pipeline.py --from synergy     # Sans scraping : decks repris de l'artefact du dernier run
+    python backend/pipeline.py --skip synergy     # Squelettes avec les synergies du dernier run
+"""
+
+import os
+import gzip
+import json
+import time
+import argparse
+from collections import namedtuple
+from datetime import datetime, timezone
+from graphlib import TopologicalSorter
+from pathlib import Path
+import etl_script_trophydecks as trophydecks
+import etl_script_synergy as synergy
+import calculate_archetypal_decks as skeletons
+from trophy_rollups import rollups_from_decks
+from profiling import add_profile_argument, start_profiling
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+
+# Sets et formats à traiter
+TARGET_SET_CODES = ["ECL"]  # [] pour tous les sets actifs
+TARGET_FORMATS = ["PremierDraft", "TradDraft"]
+
+# Étapes non exécutées : sorties reprises des artefacts (ou de la BDD)
+SKIPPED_STAGES = set()
+
+# Écrit la sortie de chaque étape exécutée dans ARTIFACTS_DIR
+WRITE_ARTIFACTS = True
+
+# Incrémenter si le contenu des artefacts change (les anciens sont ignorés)
+ARTIFACT_VERSION = 1
+
+# --- ENVIRONNEMENT ---
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+ARTIFACTS_DIR = Path(os.getenv("PIPELINE_ARTIFACTS_DIR") or root_dir / ".cache" / "pipeline")
+
+# ==============================================================================
+# 2. ÉTAPES
+# ==============================================================================
+
+def run_decks(set_code, fmt, inputs):
+    """Scraping des nouveaux trophy decks, puis tous les decks du set/format (BDD + nouveaux)"""
+    decks_by_format = {}
+    trophydecks.ingest_trophy_decks(set_code, [fmt], decks_by_format)
+    return decks_by_format.get(fmt, [])
+
+def run_metadata(set_code, fmt, inputs):
+    """Métadonnées et stats des cartes du set (entrée du FormatContext)"""
+    return skeletons.get_card_meta(set_code, fmt)
+
+def run_synergy(set_code, fmt, inputs):
+    """Synergies calculées et sauvegardées, rendues sous forme de lignes synergy_scores"""
+    print(f"\n🔗 Synergies {set_code} ({fmt})")
+    computed, _ = synergy.process_format_synergies(set_code, fmt, inputs["decks"], list(inputs["metadata"]))
+    if not computed:
+        # Rien de significatif : synergy_scores n'a pas été modifiée, les squelettes gardent les précédentes
+        return skeletons.get_synergy_rows(set_code, fmt)
+    return synergy.synergy_rows(computed)
+
+def run_skeletons(set_code, fmt, inputs):
+    """Squelettes archétypaux, sans relecture des decks, des synergies ni des rollups"""
+    print(f"\n🧬 Squelettes {set_code} ({fmt})")
+    ctx = skeletons.FormatContext(inputs["metadata"])
+    decks = inputs["decks"]
+    return skeletons.process_skeletons(
+        set_code, fmt, ctx=ctx, trophies=decks, synergy_rows=inputs["synergy"], rollups=rollups_from_decks(decks)
+    )
+
+# run : exécute l'étape à partir des sorties de ses dépendances
+# load : relit la sortie en BDD quand l'étape est sautée sans artefact (None : impossible)
+# artifact : la sortie est écrite en artefact
+Stage = namedtuple('Stage', ['deps', 'run', 'load', 'artifact'])
+
+STAGES = {
+    "decks": Stage((), run_decks, trophydecks.get_trophy_decks, True),
+    "metadata": Stage((), run_metadata, skeletons.get_card_meta, True),
+    "synergy": Stage(("decks", "metadata"), run_synergy, skeletons.get_synergy_rows, True),
+    "skeletons": Stage(("decks", "metadata", "synergy"), run_skeletons, None, False),
+}
+
+def stage_order():
+    """Étapes dans l'ordre topologique du DAG"""
+    return list(TopologicalSorter({name: stage.deps for name, stage in STAGES.items()}).static_order())
+
+def ancestors(name):
+    """Étapes dont `name` dépend, directement ou non"""
+    found = set()
+    pending = list(STAGES[name].deps)
+    while pending:
+        dep = pending.pop()
+        if dep not in found:
+            found.add(dep)
+            pending.extend(STAGES[dep].deps)
+    return found
+
+# ==============================================================================
+# 3. ARTEFACTS
+# ==============================================================================
+
+def artifact_path(set_code, fmt, name, artifacts_dir=None):
+    return Path(artifacts_dir or ARTIFACTS_DIR) / set_code.lower() / fmt / f"{name}.json.gz"
+
+def save_artifact(set_code, fmt, name, data, artifacts_dir=None):
+    """Écriture atomique (fichier temporaire puis remplacement)"""
+    path = artifact_path(set_code, fmt, name, artifacts_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump({"version": ARTIFACT_VERSION, "created_at": time.time(), "data": data}, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def load_artifact(set_code, fmt, name, artifacts_dir=None):
+    """(données, âge en heures) de l'artefact, None s'il est absent, illisible ou d'une autre version"""
+    path = artifact_path(set_code, fmt, name, artifacts_dir)
+    if not path.exists():
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            artifact = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if artifact.get("version") != ARTIFACT_VERSION:
+        return None
+    return artifact["data"], (time.time() - artifact["created_at"]) / 3600
+
+# ==============================================================================
+# 4. EXÉCUTION
+# ==============================================================================
+
+def run_pipeline(set_code, fmt, skipped=frozenset(), artifacts_dir=None):
+    """
+    Exécute le DAG pour un set/format. Les sorties circulent en mémoire d'une étape à l'autre ;
+    une étape sautée reprend son artefact (ou la BDD) seulement si une étape exécutée en a besoin.
+    Retourne {étape: sortie}.
+    """
+    print(f"\n{'='*60}")
+    print(f"🧩 PIPELINE - {set_code} ({fmt})")
+    print(f"{'='*60}")
+
+    order = stage_order()
+    needed = set()
+    for name in order:
+        if name not in skipped:
+            needed |= ancestors(name)
+
+    outputs = {}
+    for name in order:
+        stage = STAGES[name]
+
+        if name in skipped:
+            if name not in needed:
+                print(f"\n⏭️ Étape {name} sautée")
+                continue
+            cached = load_artifact(set_code, fmt, name, artifacts_dir) if stage.artifact else None
+            if cached is not None:
+                outputs[name], age = cached
+                print(f"\n💾 Étape {name} sautée : artefact du run précédent ({age:.1f} h)")
+            elif stage.load is not None:
+                print(f"\n📥 Étape {name} sautée : pas d'artefact, lecture en BDD")
+                outputs[name] = stage.load(set_code, fmt)
+            else:
+                raise ValueError(f"Étape {name} sautée sans artefact ni lecture possible")
+            continue
+
+        inputs = {dep: outputs[dep] for dep in stage.deps}
+        started = time.perf_counter()
+        outputs[name] = stage.run(set_code, fmt, inputs)
+        print(f"\n⏱️ Étape {name} : {time.perf_counter() - started:.1f}s")
+        if stage.artifact and WRITE_ARTIFACTS:
+            save_artifact(set_code, fmt, name, outputs[name], artifacts_dir)
+
+    return outputs
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+
+def parse_arguments():
+    """Parse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Run the trophy decks pipeline (scraping, synergies, skeletons) in one process')
+    parser.add_argument('--sets', '-s', type=str, nargs='+', default=None, help='Codes des sets (ex: --sets FDN DSK)')
+    parser.add_argument('--formats', '-f', type=str, nargs='+', default=None, help='Formats (ex: --formats PremierDraft TradDraft)')
+    parser.add_argument('--date', '-d', type=str, default=None, help='Date de scraping YYYY-MM-DD (défaut: dernières 24h)')
+    parser.add_argument('--colors', '-c', type=str, nargs='+', default=None, help='Combinaisons de couleurs à scraper (ex: --colors WU WB)')
+    parser.add_argument('--skip', type=str, nargs='+', default=None, choices=list(STAGES), help='Étapes à ne pas exécuter (sorties reprises des artefacts)')
+    parser.add_argument('--from', dest='from_stage', type=str, default=None, choices=list(STAGES), help='Reprend à cette étape : ses dépendances ne sont pas réexécutées')
+    parser.add_argument('--min-lift', '-l', type=float, default=None, help=f'Minimum lift score (défaut: {synergy.MIN_LIFT_SCORE})')
+    parser.add_argument('--workers', '-w', type=int, default=None, help=f'Processus pour les squelettes (défaut: {skeletons.MAX_WORKERS})')
+    parser.add_argument('--force', action='store_true', help='Recalcule tous les squelettes, même inchangés')
+    parser.add_argument('--recluster', action='store_true', help='Ignore les centroïdes du run précédent')
+    parser.add_argument('--artifacts-dir', type=str, default=None, help=f'Dossier des artefacts (défaut: {ARTIFACTS_DIR})')
+    parser.add_argument('--no-artifacts', action='store_true', help='N\'écrit pas les artefacts des étapes exécutées')
+    add_profile_argument(parser)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    start_profiling(args.profile)
+
+    # Override des configs (y compris celles des scripts de chaque étape)
+    if args.sets:
+        TARGET_SET_CODES = list(args.sets)
+    if args.formats:
+        TARGET_FORMATS = list(args.formats)
+    if args.skip:
+        SKIPPED_STAGES |= set(args.skip)
+    if args.from_stage:
+        SKIPPED_STAGES |= ancestors(args.from_stage)
+    if args.artifacts_dir:
+        ARTIFACTS_DIR = Path(args.artifacts_dir)
+    if args.no_artifacts:
+        WRITE_ARTIFACTS = False
+    if args.date:
+        trophydecks.TARGET_DATE = args.date
+    if args.colors:
+        trophydecks.ALL_COLOR_COMBINATIONS = list(args.colors)
+    if args.min_lift:
+        synergy.MIN_LIFT_SCORE = args.min_lift
+    if args.workers:
+        skeletons.MAX_WORKERS = args.workers
+    if args.force:
+        skeletons.FORCE_REBUILD = True
+    if args.recluster:
+        skeletons.FULL_RECLUSTER = True
+
+    print("🧩 Pipeline Trophy Decks - Démarrage")
+    print(f"⏰ {datetime.now(timezone.utc).isoformat()}")
+
+    if not trophydecks.SUPABASE_URL or not trophydecks.SUPABASE_KEY:
+        print("❌ ERREUR: Variables d'environnement SUPABASE manquantes.")
+        exit(1)
+
+    sets_to_process = TARGET_SET_CODES or [s['code'] for s in trophydecks.get_active_sets()]
+    if not sets_to_process:
+        print("⚠️ Aucun set à traiter.")
+        exit(0)
+
+    print(f"📋 Sets: {sets_to_process} | Formats: {TARGET_FORMATS}")
+    print(f"🔀 Étapes: {' -> '.join(stage_order())}{f' (sautées: {sorted(SKIPPED_STAGES)})' if SKIPPED_STAGES else ''}")
+
+    for set_code in sets_to_process:
+        for fmt in TARGET_FORMATS:
+            run_pipeline(set_code, fmt, SKIPPED_STAGES)
+
+    print("\n🏁 Pipeline terminé.")
@@ -1,15 +1,23 @@
 """
 Script pour alimenter arena_id dans card_list depuis l'API 17lands
-Usage: python populate_arena_ids.py [SET_CODE]
+Usage: python populate_arena_ids.py [SET_CODE] [--dry-run] [--profile]
 Exemple: python populate_arena_ids.py ECL
+
+Réconciliation en 3 requêtes : données 17lands, card_list actuel (nom, arena_id) du set,
+puis un seul upsert des arena_id qui diffèrent. Les noms sans correspondance d'un côté
+ou de l'autre sont listés.
 """
 
 import requests
 import os
 import time
 import sys
+import argparse
 from dotenv import load_dotenv
 from pathlib import Path
+from profiling import phase, add_profile_argument, start_profiling
+from supabase_fetch import fetch_all
+from card_names import CardNameResolver
 
 # ==============================================================================
 # 1. CONFIGURATION
@@ -18,6 +26,12 @@ from pathlib import Path
 # ✅ VARIABLE DE CIBLAGE (peut être overridé par argument CLI)
 TARGET_SET = "ECL"
 
+# Affiche le diff sans écrire dans card_list
+DRY_RUN = False
+
+# Noms non appariés affichés (par côté)
+MAX_UNMATCHED_SHOWN = 10
+
 # --- ENVIRONNEMENT ---
 current_dir = Path(__file__).parent
 root_dir = current_dir.parent
@@ -42,6 +56,7 @@ HEADERS_SUPABASE = {
 # 2. RÉCUPÉRATION 17LANDS
 # ==============================================================================
 
+@phase("fetch")
 def fetch_17lands_data(set_code: str, format: str = "PremierDraft") -> list:
     """Récupère les données 17lands pour un set (avec mtga_id)"""
     url = f"https://www.17lands.com/card_ratings/data?expansion={set_code}&format={format}"
@@ -58,11 +73,89 @@ def fetch_17lands_data(set_code: str, format: str = "PremierDraft") -> list:
     return data
 
 # ==============================================================================
-# 3. MISE À JOUR SUPABASE
+# 3. RÉCONCILIATION
+# ==============================================================================
+
+@phase("fetch")
+def get_current_arena_ids(set_code: str) -> dict:
+    """arena_id actuels de card_list pour le set : {card_name: arena_id ou None}"""
+    rows = fetch_all("card_list", f"set_code=eq.{set_code}", columns=["card_name", "arena_id"], key="card_name")
+    print(f"📋 {len(rows)} cartes dans card_list pour {set_code}")
+    return {row["card_name"]: row.get("arena_id") for row in rows}
+
+@phase("compute")
+def reconcile_arena_ids(set_code: str, cards_17lands: list, current: dict):
+    """
+    Diff entre les mtga_id 17lands et les arena_id de card_list.
+    Les noms 17lands (face avant, sans accents) sont rattachés aux noms card_list par le résolveur.
+    Retourne (lignes à upserter, noms 17lands sans carte card_list, noms card_list absents de 17lands).
+    """
+    resolver = CardNameResolver(current)
+    expected = {}
+    unmatched_17lands = []
+    for card in cards_17lands:
+        card_name = card.get("name")
+        arena_id = card.get("mtga_id")
+        if not card_name or not arena_id:
+            continue
+        card_id = resolver.resolve(card_name)
+        if card_id is None:
+            unmatched_17lands.append(card_name)
+            continue
+        expected.setdefault(resolver.names[card_id], arena_id)
+
+    changes = [
+        {"card_name": card_name, "set_code": set_code, "arena_id": arena_id}
+        for card_name, arena_id in expected.items() if current.get(card_name) != arena_id
+    ]
+    unmatched_card_list = sorted(name for name in current if name not in expected)
+    return changes, sorted(set(unmatched_17lands)), unmatched_card_list
+
+# ==============================================================================
+# 4. MISE À JOUR SUPABASE
 # ==============================================================================
 
+@phase("upsert")
+def save_arena_ids(changes: list) -> bool:
+    """Upsert unique des arena_id modifiés (clé card_name, set_code : seules des lignes existantes sont visées)"""
+    url = f"{SUPABASE_URL}/rest/v1/card_list?on_conflict=card_name,set_code"
+    resp = requests.post(url, json=changes, headers=HEADERS_SUPABASE)
+    if resp.status_code >= 400:
+        print(f"❌ Erreur upsert arena_id: {resp.text[:200]}")
+        return False
+    return True
+
+def sync_arena_ids(set_code: str, cards_17lands: list, dry_run: bool = False):
+    """Réconcilie card_list avec 17lands : seules les cartes dont l'arena_id change sont écrites"""
+    if not cards_17lands:
+        print("⚠️ Aucune donnée 17lands.")
+        return
+
+    current = get_current_arena_ids(set_code)
+    changes, unmatched_17lands, unmatched_card_list = reconcile_arena_ids(set_code, cards_17lands, current)
+
+    unchanged = len(current) - len(unmatched_card_list) - len(changes)
+    print(f"🔎 {len(changes)} arena_id à mettre à jour, {unchanged} déjà corrects")
+    if unmatched_17lands:
+        print(f"   ⚠️ {len(unmatched_17lands)} cartes 17lands absentes de card_list : {unmatched_17lands[:MAX_UNMATCHED_SHOWN]}")
+    if unmatched_card_list:
+        print(f"   ⚠️ {len(unmatched_card_list)} cartes card_list sans mtga_id 17lands : {unmatched_card_list[:MAX_UNMATCHED_SHOWN]}")
+
+    if not changes:
+        print("✅ card_list déjà à jour.")
+        return
+    if dry_run:
+        for change in changes[:MAX_UNMATCHED_SHOWN]:
+            print(f"   • {change['card_name']}: {current.get(change['card_name'])} -> {change['arena_id']}")
+        print("🧪 Dry run : aucune écriture.")
+        return
+
+    if save_arena_ids(changes):
+        print(f"\n✅ Résultat: {len(changes)} arena_id mis à jour en un upsert")
+
+@phase("upsert")
 def update_arena_ids(set_code: str, cards_17lands: list):
-    """Met à jour card_list avec les arena_id depuis 17lands"""
+    """Met à jour card_list avec les arena_id depuis 17lands, un PATCH par carte (ancien mode, --per-card)"""
 
     if not cards_17lands:
         print("⚠️ Aucune donnée 17lands.")
@@ -106,9 +199,26 @@ def update_arena_ids(set_code: str, cards_17lands: list):
 # MAIN
 # ==============================================================================
 
+def parse_arguments():
+    """Parse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Populate card_list.arena_id from 17lands mtga_id')
+    parser.add_argument('set_code', nargs='?', default=None, help=f'Code du set (défaut: {TARGET_SET})')
+    parser.add_argument('--dry-run', action='store_true', help='Affiche le diff sans écrire')
+    parser.add_argument('--per-card', action='store_true', help='Ancien mode : un PATCH par carte, sans diff')
+    add_profile_argument(parser)
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    # Override set code si argument CLI
-    target = sys.argv[1].upper() if len(sys.argv) > 1 else TARGET_SET
+    args = parse_arguments()
+    start_profiling(args.profile)
+
+    # Override des configs
+    if args.set_code:
+        TARGET_SET = args.set_code
+    if args.dry_run:
+        DRY_RUN = True
+
+    target = TARGET_SET.upper()
 
     print(f"\n{'='*50}")
     print(f"🎯 Population arena_id pour le set : {target}")
@@ -119,7 +229,10 @@ if __name__ == "__main__":
     # 1. Récupérer les données 17lands
     cards_17lands = fetch_17lands_data(target)
 
-    # 2. Mettre à jour card_list
-    update_arena_ids(target, cards_17lands)
+    # 2. Mettre à jour card_list (réconciliation par défaut)
+    if args.per_card:
+        update_arena_ids(target, cards_17lands)
+    else:
+        sync_arena_ids(target, cards_17lands, DRY_RUN)
 
     print(f"\n✨ Terminé en {round(time.time() - start_time, 2)}s.")
@@ -2,8 +2,12 @@ import requests
 import os
 import time
 import sys
+import argparse
 from dotenv import load_dotenv
 from pathlib import Path
+from profiling import phase, add_profile_argument, start_profiling
+from scryfall_bulk import CardIndex, ensure_index, INDEX_PATH
+from scryfall_cache import SetCache
 
 # ==============================================================================
 # 1. CONFIGURATION
@@ -12,6 +16,13 @@ from pathlib import Path
 # ✅ VARIABLE DE CIBLAGE
 TARGET_SET = "ECL" 
 
+# Lecture depuis l'index local du dump Scryfall (scryfall_bulk.py) au lieu de l'API
+USE_BULK_INDEX = False
+BULK_FILE = None  # Dump default_cards local (sinon téléchargé si Scryfall l'a mis à jour)
+
+# Ignore le cache disque des sets Scryfall (scryfall_cache.py) et le reconstruit
+REFRESH_CACHE = False
+
 # --- ENVIRONNEMENT ---
 current_dir = Path(__file__).parent
 root_dir = current_dir.parent
@@ -36,56 +47,82 @@ HEADERS_SUPABASE = {
 # 2. RÉCUPÉRATION SCRYFALL
 # ==============================================================================
 
+@phase("fetch")
 def fetch_scryfall_set(set_code):
     """
     Récupère toutes les cartes d'un set depuis Scryfall.
+    Lecture via le cache disque par set (SetCache, partagé avec scryfall_enrichment.py) :
+    aucune requête si le cache est frais, sinon pages en parallèle sous la limite de débit.
     """
     print(f"📡 Récupération du set {set_code} sur Scryfall...")
     cards = []
     # On cherche tout ce qui appartient au set, y compris les bonus sheets rattachées
-    url = f"https://api.scryfall.com/cards/search?q=set:{set_code}"
-    
-    while url:
-        resp = requests.get(url)
-        if resp.status_code != 200: break
-        
-        data = resp.json()
-        for c in data.get('data', []):
-            # Extraction des infos
-            name = c.get('name')
-            cmc = c.get('cmc')
-            mana_cost = c.get('mana_cost')
-            type_line = c.get('type_line')
-            colors = "".join(c.get('colors', []))
-            rarity = c.get('rarity')
-
-            # Gestion DFC
-            if 'card_faces' in c and not mana_cost:
-                face = c['card_faces'][0]
-                mana_cost = face.get('mana_cost')
-                type_line = face.get('type_line')
-                if not colors:
-                     colors = "".join(face.get('colors', []))
-
-            cards.append({
-                "card_name": name,
-                "set_code": set_code,
-                "colors": colors,
-                "card_cmc": cmc,
-                "card_cost": mana_cost,
-                "rarity": rarity,
-                "card_type": type_line
-            })
-            
-        url = data.get('next_page')
-        if url: time.sleep(0.1)
+    cache = SetCache(set_code, refresh=REFRESH_CACHE)
+    try:
+        scryfall_cards = cache.cards()
+        cache.save()
+    finally:
+        cache.close()
+
+    for c in scryfall_cards:
+        # Extraction des infos
+        name = c.get('name')
+        cmc = c.get('cmc')
+        mana_cost = c.get('mana_cost')
+        type_line = c.get('type_line')
+        colors = "".join(c.get('colors', []))
+        rarity = c.get('rarity')
+
+        # Gestion DFC
+        if 'card_faces' in c and not mana_cost:
+            face = c['card_faces'][0]
+            mana_cost = face.get('mana_cost')
+            type_line = face.get('type_line')
+            if not colors:
+                 colors = "".join(face.get('colors', []))
+
+        cards.append({
+            "card_name": name,
+            "set_code": set_code,
+            "colors": colors,
+            "card_cmc": cmc,
+            "card_cost": mana_cost,
+            "rarity": rarity,
+            "card_type": type_line
+        })
         
     return cards
 
+@phase("fetch")
+def fetch_set_from_index(set_code, bulk_file=None):
+    """Même résultat que fetch_scryfall_set, lu depuis l'index local du dump Scryfall"""
+    index_path = ensure_index(INDEX_PATH, bulk_file)
+    if index_path is None:
+        print("❌ Index Scryfall indisponible.")
+        return []
+
+    index = CardIndex(index_path)
+    try:
+        rows = index.by_set(set_code)
+    finally:
+        index.close()
+    print(f"🗂️ {len(rows)} cartes du set {set_code} dans l'index local")
+
+    return [{
+        "card_name": row['name'],
+        "set_code": set_code,
+        "colors": row['colors'],
+        "card_cmc": row['cmc'],
+        "card_cost": row['mana_cost'],
+        "rarity": row['rarity'],
+        "card_type": row['type_line']
+    } for row in rows]
+
 # ==============================================================================
 # 3. POPULATION SUPABASE
 # ==============================================================================
 
+@phase("upsert")
 def populate_table(cards):
     if not cards:
         print("⚠️ Aucune carte trouvée.")
@@ -110,14 +147,37 @@ def populate_table(cards):
 # MAIN
 # ==============================================================================
 
+def parse_arguments():
+    """Parse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Populate card_list from Scryfall')
+    parser.add_argument('--set', '-s', type=str, default=None, help=f'Code du set (défaut: {TARGET_SET})')
+    parser.add_argument('--bulk', action='store_true', help='Lit le set depuis l\'index local du dump Scryfall')
+    parser.add_argument('--bulk-file', type=str, default=None, help='Dump default_cards local (implique --bulk)')
+    parser.add_argument('--refresh-cache', action='store_true', help='Ignore le cache disque des sets Scryfall et le reconstruit')
+    add_profile_argument(parser)
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_arguments()
+    start_profiling(args.profile)
+
+    # Override des configs
+    if args.set:
+        TARGET_SET = args.set
+    if args.bulk or args.bulk_file:
+        USE_BULK_INDEX = True
+    if args.bulk_file:
+        BULK_FILE = args.bulk_file
+    if args.refresh_cache:
+        REFRESH_CACHE = True
+
     target = TARGET_SET.upper()
     print(f"🏁 Démarrage pour le set : {target}")
     
     start_time = time.time()
     
-    # 1. Scryfall
-    all_cards = fetch_scryfall_set(target)
+    # 1. Scryfall (index local ou API)
+    all_cards = fetch_set_from_index(target, BULK_FILE) if USE_BULK_INDEX else fetch_scryfall_set(target)
     
     # 2. Supabase
     populate_table(all_cards)
@@ -0,0 +1,284 @@
+"""
+Mode profilage commun aux scripts backend : flag --profile.
+
+    python backend/etl_script_synergy.py --profile           # cProfile déterministe
+    python backend/etl_script_synergy.py --profile=sample    # Échantillonnage de pile seul, sans cProfile
+
+Chaque script déclare le flag dans son parse_arguments (add_profile_argument) et démarre le
+profilage dans son __main__ (start_profiling(args.profile)) ; importer ce module ne lit ni ne
+modifie sys.argv. Les fichiers sont écrits à la sortie du script.
+
+Fichiers écrits dans PROFILE_DIR/<script>-<horodatage>/ :
+- profile.pstats, profile.txt : stats cProfile (mode déterministe)
+- stacks.collapsed            : piles repliées échantillonnées (flamegraph.pl, speedscope, inferno)
+- allocations.txt             : top N des sites d'allocation tracemalloc
+- phases.txt                  : temps par phase (fetch, throttle, parse, compute, upsert) et par fonction,
+                                y compris ceux des processus workers (enable_worker_timings / merge_worker_timings)
+
+Sans le flag, @phase se réduit à un test de booléen avant d'appeler la fonction.
+Avec le flag, tracemalloc ralentit nettement le code Python pur (x2 à x5) : comparer les temps
+entre runs profilés, pas avec un run normal.
+"""
+
+import os
+import sys
+import time
+import atexit
+import cProfile
+import pstats
+import functools
+import threading
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR") or Path(__file__).parent.parent / "profiles")
+SAMPLE_INTERVAL = 0.005   # Secondes entre deux échantillons de pile
+TOP_ALLOCATIONS = 30
+TOP_FUNCTIONS = 40
+
+PHASES = ("fetch", "throttle", "parse", "compute", "upsert")
+
+PROFILE_MODES = ("deterministic", "sample")
+
+# Mode actif ("deterministic", "sample" ou None), fixé par start_profiling
+MODE = None
+ENABLED = False
+
+def add_profile_argument(parser):
+    """Déclare --profile[=deterministic|sample] dans l'ArgumentParser d'un script"""
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='deterministic',
+        default=None,
+        choices=PROFILE_MODES,
+        help='Profilage : cProfile + piles + allocations + temps par phase (mode sample : sans cProfile)'
+    )
+
+# ==============================================================================
+# 2. CHRONOMÉTRAGE PAR PHASE
+# ==============================================================================
+
+_lock = threading.Lock()
+_local = threading.local()
+_timings = {} # {(phase, fonction): [appels, temps inclusif, temps exclusif]}
+_worker_timings = {} # Idem, cumulés sur les processus workers (merge_worker_timings)
+
+def phase(name):
+    """
+    Décorateur : chronomètre la fonction dans la phase `name` (fetch, throttle, parse, compute, upsert).
+    Temps exclusif = temps inclusif moins celui des phases imbriquées (les totaux par phase ne se recouvrent pas).
+    """
+    def decorator(fn):
+        key = (name, fn.__name__)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            stack = getattr(_local, "stack", None)
+            if stack is None:
+                stack = _local.stack = []
+            stack.append(0.0) # Temps cumulé des phases enfants
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                with _lock:
+                    entry = _timings.setdefault(key, [0, 0.0, 0.0])
+                    entry[0] += 1
+                    entry[1] += elapsed
+                    entry[2] += elapsed - children
+        return wrapper
+    return decorator
+
+def enable_worker_timings():
+    """
+    Processus worker (initializer d'un pool) : chronométrage par phase seul, sans cProfile ni échantillonneur.
+    Les temps hérités du parent (fork) sont remis à zéro pour ne pas être comptés deux fois,
+    et tracemalloc / cProfile hérités sont coupés (ils ralentiraient le worker sans être écrits).
+    """
+    global ENABLED
+    ENABLED = True
+    sys.setprofile(None)
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    with _lock:
+        _timings.clear()
+
+def collect_worker_timings():
+    """Temps accumulés par le worker depuis le dernier appel (à renvoyer au parent avec le résultat)"""
+    with _lock:
+        timings = {key: list(entry) for key, entry in _timings.items()}
+        _timings.clear()
+    return timings
+
+def merge_worker_timings(timings):
+    """Ajoute au processus parent les temps renvoyés par un worker (collect_worker_timings)"""
+    with _lock:
+        for key, (calls, inclusive, exclusive) in timings.items():
+            entry = _worker_timings.setdefault(key, [0, 0.0, 0.0])
+            entry[0] += calls
+            entry[1] += inclusive
+            entry[2] += exclusive
+
+# ==============================================================================
+# 3. ÉCHANTILLONNAGE DE PILE
+# ==============================================================================
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+class StackSampler:
+    """Thread qui relève les piles de tous les threads à intervalle fixe (temps réel, I/O compris)"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id: continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, str(thread_id)))
+                stack = ";".join(reversed(labels))
+                self.counts[stack] = self.counts.get(stack, 0) + 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+# ==============================================================================
+# 4. SESSION DE PROFILAGE
+# ==============================================================================
+
+_session = {}
+
+def start_profiling(mode, script_name=None):
+    """
+    Démarre cProfile (mode déterministe), l'échantillonneur et tracemalloc ; écriture à la sortie.
+    mode : valeur de --profile (None = pas de profilage).
+    """
+    global MODE, ENABLED
+    if mode is None or _session:
+        return
+    MODE, ENABLED = mode, True
+    _session["name"] = script_name or Path(sys.argv[0]).stem or "python"
+    _session["start"] = time.perf_counter()
+
+    tracemalloc.start()
+    sampler = StackSampler()
+    sampler.start()
+    _session["sampler"] = sampler
+    if MODE == "deterministic":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        _session["profiler"] = profiler
+
+    atexit.register(stop)
+    print(f"🔬 Profilage actif ({MODE})")
+
+def _phase_order(name):
+    return (0, PHASES.index(name)) if name in PHASES else (1, name)
+
+def write_phases(path, total):
+    """Temps exclusifs par phase, puis détail par fonction"""
+    by_phase = {}
+    for (name, _), (_, _, exclusive) in sorted(_timings.items(), key=lambda x: _phase_order(x[0][0])):
+        by_phase[name] = by_phase.get(name, 0.0) + exclusive
+    # Temps hors phases chronométrées (boucles principales, imports, pauses non décorées)
+    by_phase["autres"] = max(total - sum(by_phase.values()), 0.0)
+
+    lines = [f"Durée totale: {total:.3f}s", "", "Phase        exclusif    part"]
+    for name, seconds in by_phase.items():
+        share = seconds / total if total else 0.0
+        lines.append(f"{name:<10} {seconds:>9.3f}s  {share:>6.1%}")
+    lines += ["", "Phase      Fonction                              appels   inclusif   exclusif"]
+    for (name, fn), (calls, inclusive, exclusive) in sorted(_timings.items(), key=lambda x: -x[1][1]):
+        lines.append(f"{name:<10} {fn:<36} {calls:>7} {inclusive:>9.3f}s {exclusive:>9.3f}s")
+
+    if _worker_timings:
+        # Temps des workers cumulés sur tous les processus : en parallèle de la durée totale, pas inclus dedans
+        worker_phases = {}
+        for (name, _), (_, _, exclusive) in sorted(_worker_timings.items(), key=lambda x: _phase_order(x[0][0])):
+            worker_phases[name] = worker_phases.get(name, 0.0) + exclusive
+        lines += ["", "Workers (somme sur les processus)", "Phase        exclusif"]
+        for name, seconds in worker_phases.items():
+            lines.append(f"{name:<10} {seconds:>9.3f}s")
+        lines += ["", "Phase      Fonction (workers)                    appels   inclusif   exclusif"]
+        for (name, fn), (calls, inclusive, exclusive) in sorted(_worker_timings.items(), key=lambda x: -x[1][1]):
+            lines.append(f"{name:<10} {fn:<36} {calls:>7} {inclusive:>9.3f}s {exclusive:>9.3f}s")
+
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return by_phase
+
+def stop():
+    """Arrête la session et écrit les fichiers de profilage"""
+    if not _session or _session.get("done"):
+        return
+    _session["done"] = True
+    total = time.perf_counter() - _session["start"]
+
+    profiler = _session.get("profiler")
+    if profiler:
+        profiler.disable()
+    _session["sampler"].stop()
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    out_dir = PROFILE_DIR / f"{_session['name']}-{stamp}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    if profiler:
+        profiler.dump_stats(out_dir / "profile.pstats")
+        with open(out_dir / "profile.txt", "w") as f:
+            stats = pstats.Stats(profiler, stream=f)
+            stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            stats.sort_stats("tottime").print_stats(TOP_FUNCTIONS)
+
+    _session["sampler"].write(out_dir / "stacks.collapsed")
+
+    with open(out_dir / "allocations.txt", "w") as f:
+        f.write(f"Mémoire tracée: actuelle {current / 1024 / 1024:.1f} Mo, pic {peak / 1024 / 1024:.1f} Mo\n\n")
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+            frame = stat.traceback[0]
+            f.write(f"{stat.size / 1024:>10.1f} Ko {stat.count:>9} blocs  {frame.filename}:{frame.lineno}\n")
+
+    by_phase = write_phases(out_dir / "phases.txt", total)
+
+    print(f"\n🔬 Profilage: {total:.2f}s, pic mémoire {peak / 1024 / 1024:.1f} Mo")
+    for name, seconds in by_phase.items():
+        print(f"   {name:<10} {seconds:>8.2f}s")
+    if _worker_timings:
+        worker_total = sum(exclusive for _, _, exclusive in _worker_timings.values())
+        print(f"   workers    {worker_total:>8.2f}s (somme sur les processus)")
+    print(f"   📁 {out_dir}")
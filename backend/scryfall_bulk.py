@@ -0,0 +1,301 @@
+"""
+Index local des cartes Scryfall, construit depuis le dump bulk `default_cards`.
+
+Le dump (un tableau JSON de ~100k impressions, plusieurs centaines de Mo) est lu en streaming,
+sans jamais être chargé en mémoire, et projeté dans une base SQLite compacte :
+une ligne par (set, nom de carte), indexée par nom, nom de face avant et set.
+
+scryfall_enrichment.py et populate_card_list.py résolvent alors toutes leurs cartes
+depuis cet index (option --bulk), sans aucun appel HTTP par carte.
+
+Usage:
+    python backend/scryfall_bulk.py                                   # Télécharge le dump si Scryfall l'a mis à jour
+    python backend/scryfall_bulk.py --bulk-file default-cards.json    # Depuis un fichier local (.json ou .json.gz)
+    python backend/scryfall_bulk.py --force
+"""
+
+import requests
+import os
+import json
+import gzip
+import sqlite3
+import argparse
+from pathlib import Path
+from profiling import phase, add_profile_argument, start_profiling
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+
+BULK_DATA_URL = "https://api.scryfall.com/bulk-data/default-cards"
+
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+INDEX_PATH = Path(os.getenv("SCRYFALL_INDEX_PATH") or root_dir / ".cache" / "scryfall_cards.sqlite")
+
+# Incrémenter si le schéma ou la projection change (force la reconstruction)
+INDEX_VERSION = 1
+
+CHUNK_SIZE = 1 << 20  # 1 Mo de texte par lecture
+BATCH_SIZE = 5000     # Lignes par INSERT
+
+# Objets du dump qui ne sont pas des cartes jouables (ignorés aussi par /cards/search)
+SKIPPED_LAYOUTS = {"art_series", "token", "double_faced_token", "emblem"}
+
+COLUMNS = ["set_code", "name", "front_face", "cmc", "mana_cost", "type_line", "colors", "rarity", "arena_id"]
+
+# ==============================================================================
+# 2. LECTURE EN STREAMING
+# ==============================================================================
+
+def iter_json_array(chunks):
+    """
+    Itère sur les objets d'un tableau JSON reçu par morceaux de texte (fichier ou réponse HTTP).
+    Seul le morceau en cours et l'objet en cours de lecture sont gardés en mémoire.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buf = ""
+    pos = 0
+    eof = False
+
+    while True:
+        # Séparateurs entre objets (et ouverture du tableau)
+        while pos < len(buf) and buf[pos] in " \t\r\n,[":
+            pos += 1
+        if pos < len(buf):
+            if buf[pos] == "]":
+                return
+            try:
+                obj, pos = decoder.raw_decode(buf, pos)
+                yield obj
+                continue
+            except json.JSONDecodeError:
+                if eof: raise # Objet tronqué en fin de fichier
+        elif eof:
+            return
+
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+        else:
+            buf = buf[pos:] + chunk
+            pos = 0
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """Morceaux de texte d'un fichier local (.json ou .json.gz)"""
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk: return
+            yield chunk
+
+def card_row(card):
+    """
+    Projection d'une carte Scryfall sur les colonnes de l'index (None si l'objet est ignoré).
+    Les cartes double-face sans coût au niveau racine prennent le coût, le type et les couleurs de leur face avant.
+    """
+    name = card.get('name')
+    set_code = card.get('set')
+    if not name or not set_code or card.get('layout') in SKIPPED_LAYOUTS:
+        return None
+
+    mana_cost = card.get('mana_cost')
+    type_line = card.get('type_line')
+    colors = "".join(card.get('colors', []))
+    faces = card.get('card_faces') or []
+    if faces and not mana_cost:
+        face = faces[0]
+        mana_cost = face.get('mana_cost')
+        type_line = face.get('type_line')
+        if not colors:
+            colors = "".join(face.get('colors', []))
+
+    front_face = name.split(" // ")[0]
+    return (set_code.lower(), name, front_face, card.get('cmc'), mana_cost, type_line, colors, card.get('rarity'), card.get('arena_id'))
+
+# ==============================================================================
+# 3. CONSTRUCTION DE L'INDEX
+# ==============================================================================
+
+def read_index_meta(index_path=INDEX_PATH):
+    """Métadonnées de l'index ({} s'il n'existe pas ou est illisible)"""
+    if not Path(index_path).exists():
+        return {}
+    try:
+        with sqlite3.connect(index_path) as conn:
+            return dict(conn.execute("SELECT key, value FROM meta").fetchall())
+    except sqlite3.Error:
+        return {}
+
+@phase("parse")
+def build_index(chunks, index_path=INDEX_PATH, source=""):
+    """
+    Construit l'index depuis les morceaux de texte du dump, dans un fichier temporaire
+    remplacé atomiquement à la fin (un index existant reste utilisable en cas d'échec).
+    Retourne le nombre de cartes indexées.
+    """
+    index_path = Path(index_path)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("""
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE cards (
+                set_code TEXT NOT NULL, name TEXT NOT NULL, front_face TEXT NOT NULL,
+                cmc REAL, mana_cost TEXT, type_line TEXT, colors TEXT, rarity TEXT, arena_id INTEGER,
+                PRIMARY KEY (set_code, name)
+            ) WITHOUT ROWID;
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        # Une impression par (set, nom) : les variantes et réimpressions suivantes sont ignorées
+        insert = f"INSERT OR IGNORE INTO cards VALUES ({', '.join('?' for _ in COLUMNS)})"
+
+        batch = []
+        scanned = 0
+        for card in iter_json_array(chunks):
+            scanned += 1
+            row = card_row(card)
+            if row is None: continue
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                conn.executemany(insert, batch)
+                batch = []
+        conn.executemany(insert, batch)
+
+        conn.executescript("""
+            CREATE INDEX cards_name ON cards (name);
+            CREATE INDEX cards_front_face ON cards (front_face);
+        """)
+        count = conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("index_version", str(INDEX_VERSION)), ("source", source), ("cards", str(count))
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, index_path)
+    print(f"   🗂️ Index Scryfall: {scanned} objets lus, {count} cartes (set, nom) -> {index_path}")
+    return count
+
+@phase("fetch")
+def get_bulk_info():
+    """Description du dump default_cards (download_uri, updated_at...), None si indisponible"""
+    try:
+        resp = requests.get(BULK_DATA_URL, timeout=30)
+        if resp.status_code == 200:
+            return resp.json()
+        print(f"   ❌ Erreur bulk-data Scryfall: {resp.status_code}")
+    except Exception as e:
+        print(f"   ❌ Exception bulk-data Scryfall: {e}")
+    return None
+
+def download_chunks(url, chunk_size=CHUNK_SIZE):
+    """Morceaux de texte du dump téléchargé en streaming (jamais écrit sur disque)"""
+    with requests.get(url, stream=True, timeout=60) as resp:
+        resp.raise_for_status()
+        resp.encoding = "utf-8"
+        yield from resp.iter_content(chunk_size=chunk_size, decode_unicode=True)
+
+def ensure_index(index_path=INDEX_PATH, bulk_file=None, force=False):
+    """
+    Retourne le chemin d'un index à jour, None si aucun index n'est disponible.
+    - bulk_file : reconstruit depuis ce fichier s'il a changé depuis la dernière construction
+    - sinon : reconstruit depuis le dump Scryfall si sa date de mise à jour a changé
+    """
+    index_path = Path(index_path)
+    meta = read_index_meta(index_path)
+    up_to_date = meta.get("index_version") == str(INDEX_VERSION) and not force
+
+    if bulk_file:
+        bulk_file = Path(bulk_file)
+        source = f"file:{bulk_file.resolve()}@{int(bulk_file.stat().st_mtime)}"
+        if not (up_to_date and meta.get("source") == source):
+            print(f"📦 Construction de l'index Scryfall depuis {bulk_file}...")
+            build_index(read_chunks(bulk_file), index_path, source)
+        return index_path
+
+    info = get_bulk_info()
+    if info is None:
+        if meta:
+            print(f"   ⚠️ Dump Scryfall indisponible, utilisation de l'index existant ({meta.get('source')})")
+            return index_path
+        return None
+
+    source = f"scryfall:{info.get('updated_at')}"
+    if up_to_date and meta.get("source") == source:
+        print(f"   ✅ Index Scryfall à jour ({meta.get('cards')} cartes, {info.get('updated_at')})")
+        return index_path
+
+    print(f"📦 Téléchargement du dump Scryfall default_cards ({info.get('size', 0) / 1024 / 1024:.0f} Mo)...")
+    build_index(download_chunks(info['download_uri']), index_path, source)
+    return index_path
+
+# ==============================================================================
+# 4. LECTURE DE L'INDEX
+# ==============================================================================
+
+class CardIndex:
+    """Accès en lecture à l'index : cartes d'un set, recherche par nom ou par face avant"""
+
+    def __init__(self, index_path=INDEX_PATH):
+        self.conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+        self.conn.row_factory = sqlite3.Row
+
+    def close(self):
+        self.conn.close()
+
+    def by_set(self, set_code):
+        """Toutes les cartes d'un set (une par nom)"""
+        rows = self.conn.execute("SELECT * FROM cards WHERE set_code = ? ORDER BY name", (set_code.lower(),))
+        return [dict(row) for row in rows]
+
+    def names(self):
+        """Couples (nom, face avant) distincts de tout l'index"""
+        return self.conn.execute("SELECT DISTINCT name, front_face FROM cards").fetchall()
+
+    def lookup(self, name, set_code=None):
+        """
+        Carte par nom exact, puis par face avant ("A" trouve "A // B").
+        Le set est préféré s'il est fourni, sinon n'importe quelle impression (coût et type sont identiques).
+        """
+        for column in ("name", "front_face"):
+            rows = self.conn.execute(f"SELECT * FROM cards WHERE {column} = ?", (name,)).fetchall()
+            if rows:
+                preferred = [row for row in rows if set_code and row['set_code'] == set_code.lower()]
+                return dict((preferred or rows)[0])
+        return None
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+
+def parse_arguments():
+    """Parse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Build the local Scryfall card index from the default_cards bulk dump')
+    parser.add_argument('--bulk-file', type=str, default=None, help='Dump default_cards local (.json ou .json.gz) au lieu du téléchargement')
+    parser.add_argument('--index', type=str, default=None, help=f'Chemin de l\'index (défaut: {INDEX_PATH})')
+    parser.add_argument('--force', action='store_true', help='Reconstruit l\'index même s\'il est à jour')
+    add_profile_argument(parser)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    start_profiling(args.profile)
+
+    # Override des configs
+    if args.index:
+        INDEX_PATH = Path(args.index)
+
+    path = ensure_index(INDEX_PATH, args.bulk_file, args.force)
+    if path is None:
+        print("❌ Aucun index Scryfall disponible.")
+        exit(1)
+    print(f"🏁 Index: {path} ({read_index_meta(path).get('cards')} cartes)")
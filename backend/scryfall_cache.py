@@ -0,0 +1,195 @@
+"""
+Cache disque des métadonnées Scryfall par set, partagé par populate_card_list.py et scryfall_enrichment.py.
+
+Un fichier JSON gzip par set dans CACHE_DIR, versionné (CACHE_VERSION) :
+- cards       : cartes de la recherche set:<code>, réduites aux champs utilisés (slim_card)
+- extra_cards : cartes hors set trouvées par nom (Special Guests, bonus sheets, fuzzy)
+- aliases     : nom demandé -> nom Scryfall (résultats du fuzzy distant)
+- not_found   : noms introuvables (pas de nouvel appel avant expiration)
+
+Une fois le TTL écoulé, l'entrée est revalidée par un GET conditionnel sur /sets/<code>
+(ETag, puis nombre de cartes et date de sortie) : la recherche complète n'est relancée
+que si le set a changé. Les sets sortis depuis longtemps ont un TTL plus long.
+
+Usage:
+    cache = SetCache("ECL")
+    cards = cache.cards()      # Aucune requête si l'entrée est fraîche
+    cache.save()
+"""
+
+import os
+import gzip
+import json
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from scryfall_client import ScryfallClient, API_URL
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+CACHE_DIR = Path(os.getenv("SCRYFALL_CACHE_DIR") or root_dir / ".cache" / "scryfall_sets")
+
+# Incrémenter si le format des entrées ou slim_card change (les anciennes entrées sont ignorées)
+CACHE_VERSION = 1
+
+TTL_SECONDS = 24 * 3600               # Set récent ou en preview : cartes encore ajoutées
+RELEASED_TTL_SECONDS = 30 * 24 * 3600 # Set sorti depuis RELEASED_AFTER_DAYS : métadonnées figées
+RELEASED_AFTER_DAYS = 30
+
+# Champs conservés (ceux lus par _process_card et fetch_scryfall_set)
+CARD_FIELDS = ("name", "set", "layout", "cmc", "mana_cost", "type_line", "colors", "rarity", "arena_id")
+FACE_FIELDS = ("name", "mana_cost", "type_line", "colors")
+
+# ==============================================================================
+# 2. HELPERS
+# ==============================================================================
+
+def slim_card(card):
+    """Carte Scryfall réduite aux champs utilisés (faces comprises)"""
+    slim = {k: card[k] for k in CARD_FIELDS if k in card}
+    if card.get('card_faces'):
+        slim['card_faces'] = [{k: face[k] for k in FACE_FIELDS if k in face} for face in card['card_faces']]
+    return slim
+
+def set_signature(set_info):
+    """Ce qui change quand Scryfall ajoute des cartes à un set"""
+    return {"card_count": set_info.get("card_count"), "released_at": set_info.get("released_at")}
+
+def entry_path(set_code, cache_dir=CACHE_DIR):
+    return Path(cache_dir) / f"{set_code.lower()}.json.gz"
+
+def load_entry(set_code, cache_dir=CACHE_DIR):
+    """Entrée du cache pour un set (None si absente, illisible ou d'une autre version)"""
+    path = entry_path(set_code, cache_dir)
+    if not path.exists():
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if entry.get("version") == CACHE_VERSION else None
+
+def save_entry(entry, cache_dir=CACHE_DIR):
+    """Écriture atomique (fichier temporaire puis remplacement)"""
+    path = entry_path(entry["set_code"], cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(entry, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def ttl_seconds(entry):
+    released_at = entry.get("signature", {}).get("released_at")
+    if released_at and date.fromisoformat(released_at) + timedelta(days=RELEASED_AFTER_DAYS) < date.today():
+        return RELEASED_TTL_SECONDS
+    return TTL_SECONDS
+
+# ==============================================================================
+# 3. CACHE PAR SET
+# ==============================================================================
+
+class SetCache:
+    """Métadonnées Scryfall d'un set, lues depuis le disque ou récupérées (puis revalidées) via l'API"""
+
+    def __init__(self, set_code, client=None, cache_dir=CACHE_DIR, refresh=False):
+        self.set_code = set_code.lower()
+        self.cache_dir = cache_dir
+        self.refresh = refresh
+        self._client = client
+        self._own_client = False
+        self.entry = None if refresh else load_entry(self.set_code, cache_dir)
+        self.dirty = False
+
+    @property
+    def client(self):
+        """Client Scryfall créé seulement si une requête est nécessaire"""
+        if self._client is None:
+            self._client = ScryfallClient()
+            self._own_client = True
+        return self._client
+
+    def close(self):
+        if self._own_client:
+            self._client.close()
+
+    def _is_fresh(self):
+        return self.entry is not None and time.time() - self.entry["checked_at"] < ttl_seconds(self.entry)
+
+    def cards(self):
+        """Cartes du set (recherche set:<code>) : disque si frais, revalidation sinon, recherche complète si le set a changé"""
+        if self._is_fresh():
+            print(f"   💾 Cache Scryfall {self.set_code}: {len(self.entry['cards'])} cartes (à jour)")
+            return self.entry["cards"]
+
+        etag = self.entry.get("etag") if self.entry else None
+        status, set_info, etag = self.client.get_if_changed(f"{API_URL}/sets/{self.set_code}", etag)
+
+        if self.entry is not None:
+            unchanged = status == 304 or (status == 200 and set_signature(set_info) == self.entry.get("signature"))
+            if status is None:
+                print(f"   ⚠️ Scryfall indisponible, cache {self.set_code} expiré utilisé")
+                return self.entry["cards"]
+            if unchanged:
+                print(f"   💾 Cache Scryfall {self.set_code}: revalidé, set inchangé")
+                self.entry.update(checked_at=time.time(), etag=etag, not_found=[])
+                self.dirty = True
+                return self.entry["cards"]
+
+        cards = []
+        for page in self.client.search(f"set:{self.set_code}"):
+            cards.extend(slim_card(card) for card in page)
+        cards.sort(key=lambda c: c.get("name") or "")
+        if not cards:
+            # Recherche en échec ou set inconnu : rien n'est mis en cache
+            return self.entry["cards"] if self.entry else []
+
+        previous = self.entry or {}
+        self.entry = {
+            "version": CACHE_VERSION,
+            "set_code": self.set_code,
+            "checked_at": time.time(),
+            "etag": etag,
+            "signature": set_signature(set_info) if set_info else previous.get("signature", {}),
+            "cards": cards,
+            # Cartes hors set et alias : les métadonnées imprimées ne changent pas
+            "extra_cards": previous.get("extra_cards", {}),
+            "aliases": previous.get("aliases", {}),
+            "not_found": [],
+        }
+        self.dirty = True
+        print(f"   📡 Cache Scryfall {self.set_code}: {len(cards)} cartes récupérées")
+        return cards
+
+    def extra_cards(self):
+        """Cartes hors set déjà récupérées par nom"""
+        return list((self.entry or {}).get("extra_cards", {}).values())
+
+    def aliases(self):
+        """Noms demandés -> noms Scryfall (fuzzy distant des runs précédents)"""
+        return dict((self.entry or {}).get("aliases", {}))
+
+    def is_not_found(self, name):
+        return name in (self.entry or {}).get("not_found", ())
+
+    def add_extra(self, card, requested_name=None):
+        """Mémorise une carte trouvée par nom (et le nom demandé s'il diffère)"""
+        if self.entry is None or not card.get("name"): return
+        self.entry["extra_cards"][card["name"]] = slim_card(card)
+        if requested_name and requested_name != card["name"]:
+            self.entry["aliases"][requested_name] = card["name"]
+        self.dirty = True
+
+    def add_not_found(self, names):
+        if self.entry is None or not names: return
+        self.entry["not_found"] = sorted(set(self.entry["not_found"]) | set(names))
+        self.dirty = True
+
+    def save(self):
+        if self.entry is not None and self.dirty:
+            save_entry(self.entry, self.cache_dir)
+            self.dirty = False
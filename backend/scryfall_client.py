@@ -0,0 +1,181 @@
+"""
+Client HTTP Scryfall partagé : requêtes concurrentes sous la limite de débit publiée.
+
+- Seau à jetons commun à tous les threads : RATE_LIMIT requêtes/s en moyenne
+  (Scryfall demande 50 à 100 ms entre deux requêtes, soit ~10/s), sans rafale par défaut.
+- Session requests unique : connexions HTTPS réutilisées (keep-alive) par les workers.
+- Pages de /cards/search et lots de /cards/collection envoyés en parallèle,
+  résultats rendus dans l'ordre d'arrivée.
+- 429 et erreurs 5xx : nouvel essai après Retry-After (ou backoff exponentiel).
+
+Usage:
+    with ScryfallClient() as client:
+        for cards in client.search("set:ecl"):
+            ...
+        for cards, not_found in client.collection([{"name": n} for n in names]):
+            ...
+"""
+
+import requests
+import math
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from profiling import phase
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+
+API_URL = "https://api.scryfall.com"
+
+RATE_LIMIT = 10.0       # Requêtes par seconde en moyenne (limite documentée par Scryfall)
+BURST = 1               # Requêtes pouvant partir sans attente après une pause (1 = espacement régulier)
+MAX_WORKERS = 4         # Requêtes en vol simultanément
+MAX_RETRIES = 3
+TIMEOUT = 30
+
+COLLECTION_BATCH = 75   # Identifiants max par requête /cards/collection
+SEARCH_PAGE_SIZE = 175  # Cartes par page de /cards/search
+
+# Scryfall exige un User-Agent et un Accept explicites
+HEADERS = {"User-Agent": "MTG-Tools/1.0", "Accept": "application/json"}
+
+# ==============================================================================
+# 2. LIMITE DE DÉBIT
+# ==============================================================================
+
+class TokenBucket:
+    """
+    Seau à jetons thread-safe. Chaque appel réserve un jeton (le solde peut devenir négatif)
+    puis attend son tour : les threads sont servis dans l'ordre, sans attente active.
+    """
+
+    def __init__(self, rate=RATE_LIMIT, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @phase("throttle")
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+# ==============================================================================
+# 3. CLIENT
+# ==============================================================================
+
+class ScryfallClient:
+    """Session Scryfall partagée : limite de débit, réutilisation des connexions, requêtes en parallèle"""
+
+    def __init__(self, rate=RATE_LIMIT, burst=BURST, max_workers=MAX_WORKERS):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(self, method, url, **kwargs):
+        """Réponse JSON d'une requête, None si erreur définitive (404 compris)"""
+        resp = self._send(method, url, **kwargs)
+        if resp is None or resp.status_code != 200:
+            return None
+        return resp.json()
+
+    def get_if_changed(self, url, etag=None):
+        """
+        GET conditionnel (If-None-Match) : (statut, JSON, ETag).
+        Statut 304 : ressource inchangée depuis `etag` (pas de JSON) ; None : erreur.
+        """
+        resp = self._send("GET", url, headers={"If-None-Match": etag} if etag else None)
+        if resp is None or resp.status_code not in (200, 304):
+            return None, None, etag
+        data = resp.json() if resp.status_code == 200 else None
+        return resp.status_code, data, resp.headers.get("ETag") or etag
+
+    @phase("fetch")
+    def _send(self, method, url, **kwargs):
+        """Réponse HTTP après limite de débit et nouveaux essais (429, 5xx, erreurs réseau), None si échec"""
+        for attempt in range(MAX_RETRIES + 1):
+            self.bucket.acquire()
+            try:
+                resp = self.session.request(method, url, timeout=TIMEOUT, **kwargs)
+            except requests.RequestException as e:
+                print(f"   ⚠️ Exception Scryfall: {e}")
+                time.sleep(2 ** attempt)
+                continue
+
+            if resp.status_code == 429 or resp.status_code >= 500:
+                wait = float(resp.headers.get("Retry-After") or 2 ** attempt)
+                print(f"   ⏳ Scryfall {resp.status_code}, nouvel essai dans {wait:.1f}s")
+                time.sleep(wait)
+                continue
+            return resp
+        return None
+
+    def _map_unordered(self, fn, items):
+        """fn(item) en parallèle sur les workers, résultats rendus dans l'ordre d'arrivée"""
+        items = list(items)
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(fn, item) for item in items]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def search(self, query, **params):
+        """
+        Cartes d'une recherche, par page : la première donne total_cards, les suivantes
+        (?page=N) partent ensuite en parallèle. Les pages sont rendues dans l'ordre d'arrivée.
+        """
+        url = f"{API_URL}/cards/search"
+        first = self.request("GET", url, params={"q": query, **params})
+        if not first:
+            return
+        yield first.get("data", [])
+        if not first.get("has_more"):
+            return
+
+        n_pages = math.ceil(first.get("total_cards", 0) / SEARCH_PAGE_SIZE)
+        fetch_page = lambda n: (n, self.request("GET", url, params={"q": query, "page": n, **params}))
+        last = None
+        for n, page in self._map_unordered(fetch_page, range(2, n_pages + 1)):
+            if not page: continue
+            if n == n_pages: last = page
+            yield page.get("data", [])
+
+        # total_cards sous-estimé : on termine en suivant next_page
+        while last and last.get("has_more") and last.get("next_page"):
+            last = self.request("GET", last["next_page"])
+            if last: yield last.get("data", [])
+
+    def collection(self, identifiers):
+        """Lots de COLLECTION_BATCH identifiants en parallèle : (cartes, introuvables) par lot, à l'arrivée"""
+        batches = [identifiers[i:i + COLLECTION_BATCH] for i in range(0, len(identifiers), COLLECTION_BATCH)]
+        post = lambda batch: self.request("POST", f"{API_URL}/cards/collection", json={"identifiers": batch})
+        for result in self._map_unordered(post, batches):
+            if result:
+                yield result.get("data", []), result.get("not_found", [])
+
+    def named_fuzzy(self, names):
+        """Recherche floue /cards/named en parallèle : (nom demandé, carte ou None), à l'arrivée"""
+        lookup = lambda name: (name, self.request("GET", f"{API_URL}/cards/named", params={"fuzzy": name}))
+        yield from self._map_unordered(lookup, names)
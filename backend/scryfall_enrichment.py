@@ -2,8 +2,15 @@ import requests
 import os
 import time
 import sys
+import argparse
 from dotenv import load_dotenv
 from pathlib import Path
+from profiling import phase, add_profile_argument, start_profiling
+from supabase_fetch import fetch_all
+from scryfall_bulk import CardIndex, ensure_index, INDEX_PATH
+from scryfall_cache import SetCache
+from name_matcher import TrigramMatcher, MIN_CONFIDENCE
+from card_names import CardNameResolver
 
 # ==============================================================================
 # 1. CONFIGURATION
@@ -12,6 +19,19 @@ from pathlib import Path
 # ✅ VARIABLE DE CIBLAGE
 TARGET_SET = "ECL" 
 
+# Résolution depuis l'index local du dump Scryfall (scryfall_bulk.py) au lieu de l'API
+USE_BULK_INDEX = False
+BULK_FILE = None  # Dump default_cards local (sinon téléchargé si Scryfall l'a mis à jour)
+
+# Ignore le cache disque des sets Scryfall (scryfall_cache.py) et le reconstruit
+REFRESH_CACHE = False
+
+# Confiance minimale d'une correspondance floue locale (en dessous : recherche fuzzy Scryfall, mode API uniquement)
+FUZZY_MIN_CONFIDENCE = MIN_CONFIDENCE
+
+# Métadonnées stockées une fois par (set, carte) dans card_list (jamais recopiées dans card_stats)
+METADATA_COLUMNS = ["colors", "card_cmc", "card_cost", "rarity", "card_type"]
+
 # --- ENVIRONNEMENT ---
 current_dir = Path(__file__).parent
 root_dir = current_dir.parent
@@ -36,153 +56,277 @@ HEADERS_SUPABASE = {
 # 2. LOGIQUE SCRYFALL
 # ==============================================================================
 
+@phase("fetch")
 def get_scryfall_data(set_code, wanted_names):
     """
     Récupère les données Scryfall. 
     1. Recherche par set.
     2. Recherche par noms pour les cartes manquantes (Special Guests, etc.).
+    Lecture via le cache disque par set (SetCache) : aucune requête si le cache est frais
+    et que les cartes hors set ont déjà été résolues. Sinon, pages et lots partent en parallèle
+    sous la limite de débit Scryfall (ScryfallClient).
     """
+    cache = SetCache(set_code, refresh=REFRESH_CACHE)
+    try:
+        return _get_scryfall_data(cache, set_code, wanted_names)
+    finally:
+        cache.save()
+        cache.close()
+
+def _get_scryfall_data(cache, set_code, wanted_names):
     cards_metadata = {}
     
-    # --- PHASE 1 : Recherche par SET ---
+    # --- PHASE 1 : Recherche par SET (+ cartes hors set des runs précédents) ---
     print(f"📡 Phase 1: Recherche par set '{set_code}' sur Scryfall...")
-    url = f"https://api.scryfall.com/cards/search?q=set:{set_code}"
-    while url:
-        response = requests.get(url)
-        if response.status_code != 200: break
-        data = response.json()
-        for card in data.get('data', []):
-            _process_card(card, cards_metadata)
-        url = data.get('next_page')
-        if url: time.sleep(0.1)
+    for card in cache.cards() + cache.extra_cards():
+        _process_card(card, cards_metadata)
+    for requested, scryfall_name in cache.aliases().items():
+        if scryfall_name in cards_metadata:
+            cards_metadata[requested] = cards_metadata[scryfall_name]
 
     # --- PHASE 2 : Recherche par NOMS pour les manquants ---
-    missing_names = [name for name in wanted_names if name not in cards_metadata]
-    
-    # On vérifie aussi si ce sont des cartes double-face (Scryfall renvoie "Front // Back")
-    # On va indexer par front_face aussi pour faciliter la correspondance
-    _index_by_front_face(cards_metadata)
-    
-    missing_names = [name for name in wanted_names if name not in cards_metadata]
+    # Les cartes double-face (Scryfall renvoie "Front // Back") et les écritures sans accents
+    # sont rattachées par le résolveur, sans re-parcourir les métadonnées
+    resolver = CardNameResolver(cards_metadata)
+    missing_names = _attach_aliases(wanted_names, cards_metadata, resolver)
 
-    if missing_names:
-        print(f"📡 Phase 2: Recherche de {len(missing_names)} cartes par nom exact...")
-        for i in range(0, len(missing_names), 75):
-            chunk = missing_names[i:i + 75]
-            identifiers = [{"name": n} for n in chunk]
-            resp = requests.post("https://api.scryfall.com/cards/collection", json={"identifiers": identifiers})
-            if resp.status_code == 200:
-                data = resp.json()
-                for card in data.get('data', []):
-                    if 'name' in card: _process_card(card, cards_metadata)
-            time.sleep(0.1)
-            
-    # On ré-indexe après phase 2
-    _index_by_front_face(cards_metadata)
+    # Noms introuvables lors d'un run précédent : pas de nouvel appel avant expiration du cache
+    remote_names = [name for name in missing_names if not cache.is_not_found(name)]
+    if remote_names:
+        print(f"📡 Phase 2: Recherche de {len(remote_names)} cartes par nom exact...")
+        for cards, _ in cache.client.collection([{"name": n} for n in remote_names]):
+            for card in cards:
+                name = _process_card(card, cards_metadata)
+                if name:
+                    resolver.add(name)
+                    cache.add_extra(card)
+        missing_names = _attach_aliases(missing_names, cards_metadata, resolver)
     
     # --- PHASE 3 : Recherche FUZZY pour les irréductibles (Typos, etc.) ---
-    missing_names = [name for name in wanted_names if name not in cards_metadata]
+    # D'abord en local sur les noms déjà connus, Scryfall seulement pour les correspondances incertaines
     if missing_names:
-        print(f"📡 Phase 3: Recherche floue (fuzzy) pour {len(missing_names)} cartes...")
+        print(f"🔎 Phase 3: Recherche floue locale pour {len(missing_names)} cartes...")
+        unresolved = match_missing_locally(missing_names, TrigramMatcher(list(cards_metadata)), cards_metadata)
+        missing_names = [name for name, _, _ in unresolved]
+
+    remote_names = [name for name in missing_names if not cache.is_not_found(name)]
+    if remote_names:
+        print(f"📡 Phase 3b: Recherche floue (fuzzy) Scryfall pour {len(remote_names)} cartes...")
+        not_found = []
+        for name, card in cache.client.named_fuzzy(remote_names):
+            if not card:
+                not_found.append(name)
+                continue
+            _process_card(card, cards_metadata)
+            cache.add_extra(card, name)
+            if card.get('name') in cards_metadata:
+                cards_metadata[name] = cards_metadata[card['name']]
+            print(f"   ✅ Trouvé via fuzzy: '{name}' -> '{card.get('name')}'")
+        cache.add_not_found(not_found)
+
+    return cards_metadata
+
+def get_scryfall_data_from_index(set_code, wanted_names, index):
+    """
+    Même résultat que get_scryfall_data, résolu depuis l'index local : aucun appel HTTP.
+    1. Cartes du set.
+    2. Cartes manquantes par nom exact ou face avant, toutes impressions confondues.
+    """
+    cards_metadata = {}
+
+    rows = index.by_set(set_code)
+    print(f"🗂️ Phase 1: {len(rows)} cartes du set '{set_code}' dans l'index local")
+    for row in rows:
+        _add_index_row(row, cards_metadata)
+    missing_names = _attach_aliases(wanted_names, cards_metadata, CardNameResolver(cards_metadata))
+
+    if missing_names:
+        print(f"🗂️ Phase 2: Recherche de {len(missing_names)} cartes par nom dans l'index...")
         for name in missing_names:
-            # On cherche par nom flou
-            url = f"https://api.scryfall.com/cards/named?fuzzy={requests.utils.quote(name)}"
-            resp = requests.get(url)
-            if resp.status_code == 200:
-                card = resp.json()
-                _process_card(card, cards_metadata)
-                print(f"   ✅ Trouvé via fuzzy: '{name}' -> '{card.get('name')}'")
-            time.sleep(0.1)
-
-    # On ré-indexe une dernière fois pour les résultats du fuzzy search (DFCs)
-    _index_by_front_face(cards_metadata)
+            row = index.lookup(name)
+            if row:
+                _add_index_row(row, cards_metadata)
+                cards_metadata[name] = cards_metadata[row['name']]
+
+    # 3. Recherche floue locale sur tous les noms de l'index (pas de repli HTTP)
+    missing_names = [name for name in missing_names if name not in cards_metadata]
+    if missing_names:
+        print(f"🔎 Phase 3: Recherche floue locale pour {len(missing_names)} cartes...")
+        matcher = TrigramMatcher()
+        for full_name, front_face in index.names():
+            matcher.add(full_name)
+            matcher.add(front_face, full_name)
+        resolve = lambda canonical: _add_index_row(index.lookup(canonical), cards_metadata)
+        for name, guess, confidence in match_missing_locally(missing_names, matcher, cards_metadata, resolve):
+            hint = f"meilleure proposition: '{guess}', confiance {confidence:.2f}" if guess else "aucune proposition"
+            print(f"   ❓ '{name}' non résolu ({hint})")
 
     return cards_metadata
 
-def _index_by_front_face(metadata_dict):
-    """Permet de trouver 'Carte A' si Scryfall a 'Carte A // Carte B'"""
-    dfc_map = {}
-    for full_name, data in metadata_dict.items():
-        if " // " in full_name:
-            front = full_name.split(" // ")[0]
-            dfc_map[front] = data
-    metadata_dict.update(dfc_map)
+def match_missing_locally(missing_names, matcher, cards_metadata, resolve=None):
+    """
+    Rattache chaque nom manquant à sa meilleure correspondance floue locale si la confiance
+    atteint FUZZY_MIN_CONFIDENCE. resolve(nom canonique) complète cards_metadata si besoin.
+    Retourne les noms non résolus : [(nom, meilleure proposition, confiance)].
+    """
+    unresolved = []
+    for name in missing_names:
+        match, confidence = matcher.match(name)
+        if match and confidence >= FUZZY_MIN_CONFIDENCE:
+            if match not in cards_metadata and resolve:
+                resolve(match)
+            if match in cards_metadata:
+                cards_metadata[name] = cards_metadata[match]
+                print(f"   ✅ Trouvé via fuzzy local: '{name}' -> '{match}' ({confidence:.2f})")
+                continue
+        unresolved.append((name, match, confidence))
+    return unresolved
+
+def _add_index_row(row, metadata_dict):
+    metadata_dict[row['name']] = {
+        "card_name": row['name'],
+        "colors": row['colors'],
+        "card_cmc": row['cmc'],
+        "card_cost": row['mana_cost'],
+        "rarity": row['rarity'],
+        "card_type": row['type_line']
+    }
+
+def _attach_aliases(names, metadata_dict, resolver):
+    """
+    Rattache les noms demandés connus sous une autre écriture ('Carte A' si Scryfall a 'Carte A // Carte B',
+    accents...), résolus en O(1) par le résolveur. Retourne les noms toujours manquants.
+    """
+    missing = []
+    for name in names:
+        if name in metadata_dict: continue
+        card_id = resolver.resolve(name)
+        if card_id is None:
+            missing.append(name)
+        else:
+            metadata_dict[name] = metadata_dict[resolver.names[card_id]]
+    return missing
 
+@phase("parse")
 def _process_card(card, metadata_dict):
     name = card.get('name')
     if not name: return
     cmc = card.get('cmc')
     mana_cost = card.get('mana_cost')
     type_line = card.get('type_line')
+    colors = "".join(card.get('colors', []))
 
     if 'card_faces' in card and not mana_cost:
         face = card['card_faces'][0]
         mana_cost = face.get('mana_cost')
         type_line = face.get('type_line')
+        if not colors:
+            colors = "".join(face.get('colors', []))
 
     metadata_dict[name] = {
+        "card_name": name,
+        "colors": colors,
         "card_cmc": cmc,
         "card_cost": mana_cost,
+        "rarity": card.get('rarity'),
         "card_type": type_line
     }
+    return name
 
 # ==============================================================================
 # 3. MISE À JOUR SUPABASE
 # ==============================================================================
+# Les métadonnées Scryfall vivent dans card_list, une ligne par (set, carte).
+# Les lecteurs de card_stats qui en ont besoin passent par la vue card_stats_with_metadata
+# (supabase/migrations/20261019000400_card_stats_with_metadata.sql).
+
+@phase("fetch")
+def get_card_stats_names(set_code):
+    """Noms distincts des cartes du set dans card_stats (contexte Global seulement : une ligne par format)"""
+    print(f"🔍 Recherche des cartes existantes dans Supabase pour {set_code}...")
+    rows = fetch_all(
+        "card_stats", f"set_code=eq.{set_code}&filter_context=eq.Global",
+        columns=["card_name", "format"], key=("card_name", "format")
+    )
+    names = sorted({row['card_name'] for row in rows})
+    print(f"✅ {len(names)} cartes distinctes ({len(rows)} lignes Global).")
+    return names
+
+@phase("fetch")
+def get_card_list_rows(set_code):
+    """Lignes card_list actuelles du set, par nom"""
+    rows = fetch_all("card_list", f"set_code=eq.{set_code}", columns=["card_name"] + METADATA_COLUMNS, key="card_name")
+    return {row['card_name']: row for row in rows}
+
+def diff_card_list(set_code, wanted_names, scryfall_meta, existing):
+    """
+    Lignes card_list à écrire : une par carte Scryfall (nom complet "A // B" pour les double-faces),
+    seulement si elle est absente ou si ses métadonnées ont changé.
+    Retourne (lignes, noms introuvables).
+    """
+    rows = {}
+    missing_names = []
+    for name in wanted_names:
+        data = scryfall_meta.get(name)
+        if data is None:
+            missing_names.append(name)
+            continue
+        rows[data['card_name']] = {"card_name": data['card_name'], "set_code": set_code, **{c: data[c] for c in METADATA_COLUMNS}}
+
+    changed = [
+        row for card_name, row in rows.items()
+        if card_name not in existing or any(existing[card_name].get(c) != row[c] for c in METADATA_COLUMNS)
+    ]
+    return changed, missing_names
+
+@phase("upsert")
+def save_updates(updates, batch_size=500):
+    """Upsert des métadonnées dans card_list par lots (clé card_name, set_code)"""
+    print(f"🚀 Mise à jour de {len(updates)} cartes dans card_list...")
+    for i in range(0, len(updates), batch_size):
+        chunk = updates[i:i + batch_size]
+        res = requests.post(f"{SUPABASE_URL}/rest/v1/card_list?on_conflict=card_name,set_code", json=chunk, headers=HEADERS_SUPABASE)
+        if res.status_code >= 400: print(f"❌ Erreur Batch {i}: {res.text}")
+        else: print(f"✅ Batch {i//batch_size + 1} terminé.")
 
 def run_enrichment(set_code):
     """
-    Exécute le workflow complet.
+    Exécute le workflow complet : O(cartes) lectures et écritures, quel que soit le nombre
+    de contextes et de formats de card_stats.
     """
     start_time = time.time()
     
     # 1. Lire Supabase
-    print(f"🔍 Recherche des cartes existantes dans Supabase pour {set_code}...")
-    select_url = f"{SUPABASE_URL}/rest/v1/card_stats?select=id,card_name,set_code,format,filter_context&set_code=eq.{set_code}"
-    resp = requests.get(select_url, headers=HEADERS_SUPABASE)
-    if resp.status_code != 200:
-        print(f"❌ Erreur Supabase: {resp.text}")
+    unique_names = get_card_stats_names(set_code)
+    if not unique_names:
         return
-    supabase_rows = resp.json()
-    print(f"✅ {len(supabase_rows)} lignes trouvées.")
-
-    unique_names = list(set(row['card_name'] for row in supabase_rows))
+    existing = get_card_list_rows(set_code)
 
-    # 2. Lire Scryfall
-    scryfall_meta = get_scryfall_data(set_code, unique_names)
+    # 2. Lire Scryfall (index local ou API)
+    if USE_BULK_INDEX:
+        index_path = ensure_index(INDEX_PATH, BULK_FILE)
+        if index_path is None:
+            print("❌ Index Scryfall indisponible.")
+            return
+        index = CardIndex(index_path)
+        try:
+            scryfall_meta = get_scryfall_data_from_index(set_code, unique_names, index)
+        finally:
+            index.close()
+    else:
+        scryfall_meta = get_scryfall_data(set_code, unique_names)
     
-    # 3. Préparer Updates
-    updates = []
-    missing_names = []
-    for row in supabase_rows:
-        name = row['card_name']
-        if name in scryfall_meta:
-            data = scryfall_meta[name]
-            updates.append({
-                "id": row['id'],
-                "card_name": row['card_name'],
-                "set_code": row['set_code'],
-                "format": row['format'],
-                "filter_context": row['filter_context'],
-                "card_cmc": data['card_cmc'],
-                "card_cost": data['card_cost'],
-                "card_type": data['card_type']
-            })
-        else:
-            if name not in missing_names: missing_names.append(name)
+    # 3. Préparer Updates (cartes nouvelles ou modifiées uniquement)
+    updates, missing_names = diff_card_list(set_code, unique_names, scryfall_meta, existing)
 
     if missing_names:
         print(f"⚠️ {len(missing_names)} cartes toujours introuvables sur Scryfall : {missing_names[:5]}...")
 
     # 4. Batch Update
     if updates:
-        print(f"🚀 Mise à jour de {len(updates)} lignes dans Supabase...")
-        batch_size = 500
-        for i in range(0, len(updates), batch_size):
-            chunk = updates[i:i + batch_size]
-            res = requests.post(f"{SUPABASE_URL}/rest/v1/card_stats", json=chunk, headers=HEADERS_SUPABASE)
-            if res.status_code >= 400: print(f"❌ Erreur Batch {i}: {res.text}")
-            else: print(f"✅ Batch {i//batch_size + 1} terminé.")
+        save_updates(updates)
+    else:
+        print("✅ card_list déjà à jour.")
 
     end_time = time.time()
     print(f"\n✨ Terminé en {round(end_time - start_time, 2)} secondes.")
@@ -191,7 +335,33 @@ def run_enrichment(set_code):
 # 4. MAIN
 # ==============================================================================
 
+def parse_arguments():
+    """Parse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Enrich card_list with Scryfall metadata for every card of card_stats')
+    parser.add_argument('--set', '-s', type=str, default=None, help=f'Code du set (défaut: {TARGET_SET})')
+    parser.add_argument('--bulk', action='store_true', help='Résout les cartes depuis l\'index local du dump Scryfall')
+    parser.add_argument('--bulk-file', type=str, default=None, help='Dump default_cards local (implique --bulk)')
+    parser.add_argument('--refresh-cache', action='store_true', help='Ignore le cache disque des sets Scryfall et le reconstruit')
+    parser.add_argument('--fuzzy-threshold', type=float, default=None, help=f'Confiance minimale du fuzzy local (défaut: {FUZZY_MIN_CONFIDENCE})')
+    add_profile_argument(parser)
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_arguments()
+    start_profiling(args.profile)
+
+    # Override des configs
+    if args.set:
+        TARGET_SET = args.set
+    if args.bulk or args.bulk_file:
+        USE_BULK_INDEX = True
+    if args.bulk_file:
+        BULK_FILE = args.bulk_file
+    if args.fuzzy_threshold is not None:
+        FUZZY_MIN_CONFIDENCE = args.fuzzy_threshold
+    if args.refresh_cache:
+        REFRESH_CACHE = True
+
     # On utilise la variable TARGET_SET définie plus haut
     target_set = TARGET_SET.upper()
     
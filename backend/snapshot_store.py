@@ -0,0 +1,348 @@
+"""
+Snapshots locaux en colonnes des trophy decks et des card_stats, par set/format.
+
+Un dossier par set/format dans SNAPSHOT_DIR : un fichier binaire par colonne (array natif,
+sans en-tête) et un manifest.json (dictionnaires, types et longueurs des colonnes).
+- Decks encodés en CSR : deck_offsets[i]:deck_offsets[i+1] délimite les cartes du deck i
+  dans deck_cards (IDs du dictionnaire de cartes) et deck_quantities
+- trophy_time en microsecondes UTC (NO_TIME si absent), wins/losses (-1 si absent)
+- card_stats (tous les filter_context) alignées sur le même dictionnaire de cartes
+- card_list (métadonnées texte, quelques centaines de lignes) dans le manifest
+
+Chargement par mmap : aucune colonne n'est lue ni décodée avant d'être utilisée.
+Mise à jour incrémentale : seuls les decks scrapés depuis le dernier snapshot (scraped_at)
+sont téléchargés ; card_stats et card_list, petites, sont relues entièrement.
+Les fichiers sont dans l'ordre d'octets de la machine : un snapshot est un cache local.
+
+Usage:
+    python backend/snapshot_store.py                    # Met à jour les snapshots des TARGET_SET_CODES
+    python backend/snapshot_store.py --sets ECL --full  # Reconstruit entièrement
+
+    snapshot = load_snapshot("ECL", "PremierDraft")
+    decks = snapshot.deck_rows()   # Lignes au format trophy_decks, sans réseau
+"""
+
+import requests
+import os
+import json
+import mmap
+import argparse
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from supabase_fetch import fetch_all
+from profiling import phase, add_profile_argument, start_profiling
+from trophy_rollups import parse_trophy_time
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+
+# Sets et formats à synchroniser
+TARGET_SET_CODES = ["ECL"]
+TARGET_FORMATS = ["PremierDraft", "TradDraft"]
+
+# Reconstruit les snapshots au lieu de ne télécharger que les nouveaux decks
+FULL_REFRESH = False
+
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR") or root_dir / ".cache" / "snapshots")
+
+# Incrémenter si le format des colonnes ou du manifest change (les anciens snapshots sont reconstruits)
+SNAPSHOT_VERSION = 1
+
+DECK_COLUMNS = ["aggregate_id", "archetype", "trophy_time", "cardlist", "wins", "losses", "scraped_at"]
+STATS_COLUMNS = ["card_name", "filter_context", "gih_wr", "alsa", "img_count"]
+CARD_LIST_COLUMNS = ["card_name", "colors", "card_cmc", "card_cost", "rarity", "card_type"] # Lues par calculate_archetypal_decks.py
+
+# Colonnes binaires : nom -> typecode array
+COLUMN_TYPES = {
+    "deck_offsets": "q", "deck_cards": "i", "deck_quantities": "i",
+    "archetype": "i", "trophy_time": "q", "wins": "i", "losses": "i",
+    "aggregate_id_offsets": "q", "aggregate_ids": "B",
+    "stat_card": "i", "stat_context": "i", "gih_wr": "d", "alsa": "d", "img_count": "q",
+}
+
+NO_TIME = -(1 << 63)   # trophy_time absent ou invalide
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# ==============================================================================
+# 2. ENCODAGE
+# ==============================================================================
+
+def time_to_micros(trophy_time):
+    """trophy_time ISO -> microsecondes UTC depuis 1970 (NO_TIME si absent ou invalide)"""
+    dt = parse_trophy_time(trophy_time)
+    if dt is None:
+        return NO_TIME
+    delta = dt - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+def micros_to_time(micros):
+    """Inverse de time_to_micros : trophy_time ISO UTC (None si NO_TIME)"""
+    if micros == NO_TIME:
+        return None
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat()
+
+def _nan_if_none(value):
+    return float('nan') if value is None else float(value)
+
+class SnapshotBuilder:
+    """Colonnes en cours de construction (snapshot existant éventuel + nouvelles lignes)"""
+
+    def __init__(self, base=None):
+        self.columns = {name: array(typecode) for name, typecode in COLUMN_TYPES.items()}
+        self.columns["deck_offsets"].append(0)
+        self.columns["aggregate_id_offsets"].append(0)
+        self.cards, self.archetypes, self.contexts = [], [], []
+        self.aggregate_ids = set()
+        if base is not None:
+            # Les colonnes decks du snapshot existant sont reprises telles quelles (IDs stables)
+            for name in ("deck_offsets", "deck_cards", "deck_quantities", "archetype", "trophy_time",
+                         "wins", "losses", "aggregate_id_offsets", "aggregate_ids"):
+                self.columns[name] = array(COLUMN_TYPES[name], base.columns[name].tobytes())
+            self.cards, self.archetypes = list(base.cards), list(base.archetypes)
+            self.aggregate_ids = set(base.aggregate_ids())
+        self._card_ids = {name: i for i, name in enumerate(self.cards)}
+        self._archetype_ids = {name: i for i, name in enumerate(self.archetypes)}
+
+    def card_id(self, name):
+        card_id = self._card_ids.get(name)
+        if card_id is None:
+            card_id = self._card_ids[name] = len(self.cards)
+            self.cards.append(name)
+        return card_id
+
+    def add_deck(self, row):
+        """Ajoute un deck (ligne trophy_decks), False s'il est déjà dans le snapshot"""
+        agg_id = row['aggregate_id']
+        if agg_id in self.aggregate_ids:
+            return False
+        self.aggregate_ids.add(agg_id)
+        cols = self.columns
+        for name, qty in (row.get('cardlist') or {}).items():
+            cols["deck_cards"].append(self.card_id(name))
+            cols["deck_quantities"].append(qty)
+        cols["deck_offsets"].append(len(cols["deck_cards"]))
+
+        archetype = row.get('archetype') or ""
+        arch_id = self._archetype_ids.get(archetype)
+        if arch_id is None:
+            arch_id = self._archetype_ids[archetype] = len(self.archetypes)
+            self.archetypes.append(archetype)
+        cols["archetype"].append(arch_id)
+        cols["trophy_time"].append(time_to_micros(row.get('trophy_time')))
+        cols["wins"].append(-1 if row.get('wins') is None else row['wins'])
+        cols["losses"].append(-1 if row.get('losses') is None else row['losses'])
+        cols["aggregate_ids"].frombytes(agg_id.encode())
+        cols["aggregate_id_offsets"].append(len(cols["aggregate_ids"]))
+        return True
+
+    def set_card_stats(self, rows):
+        """Remplace les card_stats (toutes les lignes du set/format, tous les filter_context)"""
+        contexts = {}
+        for name in ("stat_card", "stat_context", "gih_wr", "alsa", "img_count"):
+            self.columns[name] = array(COLUMN_TYPES[name])
+        cols = self.columns
+        for row in rows:
+            context = contexts.setdefault(row['filter_context'], len(contexts))
+            cols["stat_card"].append(self.card_id(row['card_name']))
+            cols["stat_context"].append(context)
+            cols["gih_wr"].append(_nan_if_none(row.get('gih_wr')))
+            cols["alsa"].append(_nan_if_none(row.get('alsa')))
+            cols["img_count"].append(row.get('img_count') or 0)
+        self.contexts = list(contexts)
+
+# ==============================================================================
+# 3. LECTURE (MMAP)
+# ==============================================================================
+
+def snapshot_path(set_code, fmt, snapshot_dir=None):
+    return Path(snapshot_dir or SNAPSHOT_DIR) / set_code.lower() / fmt
+
+def _map_column(path, typecode):
+    """Vue typée sur le fichier d'une colonne, projeté en mémoire (lecture seule)"""
+    if path.stat().st_size == 0:
+        return memoryview(array(typecode))
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    return view if typecode == "B" else view.cast(typecode)
+
+class Snapshot:
+    """Snapshot d'un set/format : colonnes projetées en mémoire, décodées à la demande"""
+
+    def __init__(self, path, manifest):
+        self.path = Path(path)
+        self.manifest = manifest
+        self.set_code = manifest["set_code"]
+        self.format = manifest["format"]
+        self.cards = manifest["cards"]            # ID de carte -> nom (tel qu'écrit dans la source)
+        self.archetypes = manifest["archetypes"]  # ID d'archétype -> nom
+        self.contexts = manifest["contexts"]      # ID de filter_context -> nom
+        self.columns = {name: _map_column(self.path / f"{name}.bin", typecode) for name, typecode in COLUMN_TYPES.items()}
+        self.n_decks = len(self.columns["deck_offsets"]) - 1
+
+    def __len__(self):
+        return self.n_decks
+
+    def aggregate_ids(self):
+        blob, offsets = self.columns["aggregate_ids"], self.columns["aggregate_id_offsets"]
+        return [bytes(blob[offsets[i]:offsets[i + 1]]).decode() for i in range(self.n_decks)]
+
+    def deck_card_ids(self, i):
+        """(IDs de cartes, quantités) du deck i, sans copie"""
+        lo, hi = self.columns["deck_offsets"][i], self.columns["deck_offsets"][i + 1]
+        return self.columns["deck_cards"][lo:hi], self.columns["deck_quantities"][lo:hi]
+
+    @phase("parse")
+    def deck_rows(self):
+        """Decks au format des lignes trophy_decks (aggregate_id, archetype, trophy_time, cardlist, wins, losses)"""
+        cols = self.columns
+        offsets, cards, quantities = cols["deck_offsets"].tolist(), cols["deck_cards"].tolist(), cols["deck_quantities"].tolist()
+        name_of, archetypes = self.cards.__getitem__, self.archetypes
+        rows = []
+        for i, (agg_id, arch, micros, wins, losses) in enumerate(zip(
+            self.aggregate_ids(), cols["archetype"].tolist(), cols["trophy_time"].tolist(), cols["wins"].tolist(), cols["losses"].tolist()
+        )):
+            lo, hi = offsets[i], offsets[i + 1]
+            rows.append({
+                "aggregate_id": agg_id,
+                "archetype": archetypes[arch],
+                "trophy_time": micros_to_time(micros),
+                "cardlist": dict(zip(map(name_of, cards[lo:hi]), quantities[lo:hi])),
+                "wins": None if wins < 0 else wins,
+                "losses": None if losses < 0 else losses,
+            })
+        return rows
+
+    def card_stats_rows(self, context="Global"):
+        """Lignes card_stats d'un filter_context (None : tous)"""
+        cols = self.columns
+        rows = []
+        for card, ctx, gih_wr, alsa, img_count in zip(cols["stat_card"], cols["stat_context"], cols["gih_wr"], cols["alsa"], cols["img_count"]):
+            if context is not None and self.contexts[ctx] != context: continue
+            rows.append({
+                "card_name": self.cards[card], "filter_context": self.contexts[ctx],
+                "gih_wr": None if gih_wr != gih_wr else gih_wr, # NaN -> None
+                "alsa": None if alsa != alsa else alsa,
+                "img_count": img_count,
+            })
+        return rows
+
+    def card_list_rows(self):
+        return self.manifest["card_list"]
+
+def load_snapshot(set_code, fmt, snapshot_dir=None):
+    """Snapshot d'un set/format, None s'il est absent, incomplet ou d'une autre version"""
+    path = snapshot_path(set_code, fmt, snapshot_dir)
+    try:
+        with open(path / "manifest.json", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != SNAPSHOT_VERSION:
+            return None
+        snapshot = Snapshot(path, manifest)
+    except (OSError, ValueError):
+        return None
+    # Garde-fou : colonnes de la longueur annoncée par le manifest (écriture interrompue)
+    if any(len(snapshot.columns[name]) != length for name, length in manifest["lengths"].items()):
+        return None
+    return snapshot
+
+# ==============================================================================
+# 4. ÉCRITURE ET MISE À JOUR
+# ==============================================================================
+
+def save_snapshot(set_code, fmt, builder, watermark, card_list, snapshot_dir=None):
+    """Écrit les colonnes (fichiers temporaires puis remplacement), le manifest en dernier"""
+    path = snapshot_path(set_code, fmt, snapshot_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    for name, column in builder.columns.items():
+        tmp_path = path / f"{name}.bin.tmp"
+        with open(tmp_path, "wb") as f:
+            column.tofile(f)
+        os.replace(tmp_path, path / f"{name}.bin")
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "set_code": set_code,
+        "format": fmt,
+        "synced_at": datetime.now(timezone.utc).isoformat(),
+        "watermark": watermark,
+        "cards": builder.cards,
+        "archetypes": builder.archetypes,
+        "contexts": builder.contexts,
+        "card_list": card_list,
+        "lengths": {name: len(column) for name, column in builder.columns.items()},
+    }
+    tmp_path = path / "manifest.json.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path / "manifest.json")
+
+def refresh_snapshot(set_code, fmt, full=False, snapshot_dir=None):
+    """
+    Met à jour le snapshot d'un set/format depuis Supabase : nouveaux decks (scraped_at >= dernier
+    scraped_at connu) ajoutés aux colonnes existantes, card_stats et card_list relues entièrement.
+    Retourne le snapshot à jour.
+    """
+    base = None if full else load_snapshot(set_code, fmt, snapshot_dir)
+    filters = f"set_code=eq.{set_code}&format=eq.{fmt}"
+    if base is not None and base.manifest.get("watermark"):
+        # gte : les decks scrapés à la même seconde que le dernier connu sont dédoublonnés par aggregate_id
+        filters += f"&scraped_at=gte.{requests.utils.quote(base.manifest['watermark'], safe='')}"
+
+    print(f"🗄️ Snapshot {set_code} ({fmt}) : {'mise à jour' if base is not None else 'construction complète'}...")
+    rows = fetch_all("trophy_decks", filters, columns=DECK_COLUMNS, key="aggregate_id", parallel=True)
+
+    builder = SnapshotBuilder(base)
+    added = sum(builder.add_deck(row) for row in rows)
+    watermark = max((row['scraped_at'] for row in rows if row.get('scraped_at')), default=None)
+    if base is not None and base.manifest.get("watermark"):
+        watermark = max(watermark or "", base.manifest["watermark"])
+
+    builder.set_card_stats(fetch_all(
+        "card_stats", f"set_code=eq.{set_code}&format=eq.{fmt}", columns=STATS_COLUMNS, key=("card_name", "filter_context")
+    ))
+    card_list = fetch_all("card_list", f"set_code=eq.{set_code}", columns=CARD_LIST_COLUMNS, key="card_name")
+
+    base = None # Libère les projections de l'ancien snapshot avant de remplacer ses fichiers
+    save_snapshot(set_code, fmt, builder, watermark, card_list, snapshot_dir)
+    snapshot = load_snapshot(set_code, fmt, snapshot_dir)
+    print(f"   ✅ {snapshot.n_decks} decks (+{added}), {len(snapshot.cards)} cartes, {len(builder.columns['stat_card'])} lignes card_stats")
+    return snapshot
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+
+def parse_arguments():
+    """Parse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Refresh local columnar snapshots of trophy decks and card stats')
+    parser.add_argument('--sets', '-s', type=str, nargs='+', default=None, help='Codes des sets (ex: --sets FDN DSK)')
+    parser.add_argument('--formats', '-f', type=str, nargs='+', default=None, help='Formats (ex: --formats PremierDraft TradDraft)')
+    parser.add_argument('--full', action='store_true', help='Reconstruit les snapshots au lieu de les compléter')
+    parser.add_argument('--dir', type=str, default=None, help=f'Dossier des snapshots (défaut: {SNAPSHOT_DIR})')
+    add_profile_argument(parser)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    start_profiling(args.profile)
+
+    # Override des configs
+    if args.sets:
+        TARGET_SET_CODES = list(args.sets)
+    if args.formats:
+        TARGET_FORMATS = list(args.formats)
+    if args.full:
+        FULL_REFRESH = True
+    if args.dir:
+        SNAPSHOT_DIR = Path(args.dir)
+
+    for set_code in TARGET_SET_CODES:
+        for fmt in TARGET_FORMATS:
+            refresh_snapshot(set_code, fmt, FULL_REFRESH)
+
+    print("\n🏁 Snapshots à jour.")
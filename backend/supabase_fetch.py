@@ -0,0 +1,191 @@
+"""
+Lecture paginée des tables Supabase (PostgREST), partagée par les scripts backend.
+
+- Pagination keyset sur une clé unique (ex: aggregate_id, ou (card_a, card_b)) :
+  chaque page reprend après la dernière clé lue, Postgres n'a pas à re-parcourir
+  les lignes déjà chargées comme avec limit/offset.
+- Mode parallèle (clé simple) : une passe keyset légère sur la seule colonne clé donne les
+  bornes des pages, chaque plage de clés est lue par un worker dès que sa borne est connue.
+- Une page en erreur est retentée, puis FetchError est levée : jamais de données partielles.
+- Projection obligatoire : il faut lister les colonnes, `select=*` est refusé.
+
+Usage:
+    from supabase_fetch import fetch_all
+    rows = fetch_all("trophy_decks", "set_code=eq.ECL&format=eq.PremierDraft",
+                     columns=["aggregate_id", "cardlist"], key="aggregate_id")
+"""
+
+import requests
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from pathlib import Path
+from profiling import phase
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+
+PAGE_SIZE = 1000
+MAX_PARALLEL_PAGES = 4
+MAX_RETRIES = 3     # Nouvelles tentatives d'une page en erreur
+RETRY_DELAY = 1.0   # Secondes, doublées à chaque tentative
+
+# --- ENVIRONNEMENT ---
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+env_path = root_dir / '.env'
+load_dotenv(dotenv_path=env_path)
+
+SUPABASE_URL = os.getenv("SUPABASE_URL") or os.getenv("VITE_SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY") or os.getenv("VITE_SUPABASE_KEY")
+
+HEADERS_SUPABASE = {
+    "apikey": SUPABASE_KEY,
+    "Authorization": f"Bearer {SUPABASE_KEY}",
+    "Content-Type": "application/json",
+}
+
+# ==============================================================================
+# 2. HELPERS
+# ==============================================================================
+
+def _normalize_columns(columns, keys):
+    """Liste des colonnes à sélectionner (clés incluses). Refuse select=*."""
+    if isinstance(columns, str):
+        columns = [c.strip() for c in columns.split(',') if c.strip()]
+    columns = list(columns or [])
+    if not columns or '*' in columns:
+        raise ValueError("fetch_all: projection obligatoire, lister les colonnes au lieu de select=*")
+    extra = [k for k in keys if k not in columns]
+    return columns + extra, extra
+
+def _quote_value(value):
+    """Valeur entre guillemets pour les filtres logiques PostgREST (noms avec virgules, parenthèses...)"""
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+def _keyset_filter(keys, last_row):
+    """Filtre "après la dernière ligne" pour une clé simple ou composite"""
+    if len(keys) == 1:
+        return f"{keys[0]}=gt.{requests.utils.quote(str(last_row[keys[0]]), safe='')}"
+
+    # (k1, k2, ...) > (v1, v2, ...) développé en or(k1.gt.v1, and(k1.eq.v1, k2.gt.v2), ...)
+    clauses = []
+    for i, key in enumerate(keys):
+        equals = [f"{k}.eq.{_quote_value(last_row[k])}" for k in keys[:i]]
+        greater = f"{key}.gt.{_quote_value(last_row[key])}"
+        clauses.append(f"and({','.join(equals + [greater])})" if equals else greater)
+    return "or=" + requests.utils.quote(f"({','.join(clauses)})", safe='(),.')
+
+def _base_url(table, filters, select, keys):
+    order = ",".join(f"{k}.asc" for k in keys)
+    parts = [p for p in (filters, f"select={select}", f"order={order}") if p]
+    return f"{SUPABASE_URL}/rest/v1/{table}?{'&'.join(parts)}"
+
+class FetchError(Exception):
+    """Page illisible malgré les nouvelles tentatives : la lecture est abandonnée plutôt que tronquée"""
+
+def _get_page(url, table, headers, retries=MAX_RETRIES):
+    """GET d'une page (liste de lignes). Erreurs réseau / 5xx / 429 retentées, puis FetchError."""
+    error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(RETRY_DELAY * 2 ** (attempt - 1))
+        try:
+            resp = requests.get(url, headers=headers)
+            if resp.status_code in (200, 206):
+                return resp.json()
+            error = f"HTTP {resp.status_code}: {resp.text[:200]}"
+            if resp.status_code < 500 and resp.status_code != 429:
+                break # Requête invalide : inutile de réessayer
+        except Exception as e:
+            error = str(e)
+        print(f"   ⚠️ Erreur {table} (tentative {attempt + 1}/{retries + 1}): {error}")
+    raise FetchError(f"{table}: {error}")
+
+# ==============================================================================
+# 3. PAGINATION
+# ==============================================================================
+
+@phase("fetch")
+def fetch_all(table, filters="", columns=None, key="id", page_size=PAGE_SIZE, parallel=False, max_workers=MAX_PARALLEL_PAGES, headers=None):
+    """
+    Récupère toutes les lignes d'une table.
+    - filters: filtres PostgREST (ex: "set_code=eq.ECL&format=eq.PremierDraft")
+    - columns: colonnes à sélectionner (liste ou "a,b,c"), obligatoire
+    - key: colonne(s) formant une clé unique pour les filtres donnés (str ou tuple)
+    - parallel: plages de clés récupérées en parallèle (clé simple uniquement, sinon lecture séquentielle)
+    Lève FetchError si une page reste en erreur.
+    """
+    keys = (key,) if isinstance(key, str) else tuple(key)
+    columns, extra = _normalize_columns(columns, keys)
+    select = ",".join(columns)
+    headers = headers or HEADERS_SUPABASE
+    base_url = _base_url(table, filters, select, keys)
+
+    if parallel and len(keys) == 1:
+        key_url = _base_url(table, filters, keys[0], keys)
+        rows = _fetch_parallel(base_url, key_url, table, keys[0], page_size, max_workers, headers)
+    else:
+        rows = _fetch_keyset(base_url, table, keys, page_size, headers)
+
+    # Les colonnes de clé ajoutées pour la pagination ne sont pas renvoyées
+    if extra:
+        for row in rows:
+            for k in extra:
+                row.pop(k, None)
+    return rows
+
+def _fetch_keyset(base_url, table, keys, page_size, headers, last_row=None, upper=None, progress=True):
+    """Pages keyset successives après last_row ; upper : dernière clé de la plage (clé simple), None = jusqu'à la fin"""
+    all_data = []
+    bound = f"&{keys[0]}=lte.{requests.utils.quote(str(upper), safe='')}" if upper is not None else ""
+
+    while True:
+        url = f"{base_url}&limit={page_size}{bound}"
+        if last_row is not None:
+            url += "&" + _keyset_filter(keys, last_row)
+
+        data = _get_page(url, table, headers)
+        all_data.extend(data)
+        if len(data) < page_size:
+            break  # Dernière page
+
+        last_row = data[-1]
+        if progress:
+            print(f"   📄 {len(all_data)} lignes chargées...")
+
+    return all_data
+
+def _fetch_parallel(base_url, key_url, table, key, page_size, max_workers, headers):
+    # 1. Passe keyset sur la colonne clé seule : la dernière clé de chaque page borne une plage
+    # 2. Chaque plage ]borne précédente, borne] est lue par un worker dès que sa borne est connue ;
+    #    la dernière plage est ouverte (lignes ajoutées entre-temps comprises)
+    def fetch_range(lower, upper):
+        last_row = {key: lower} if lower is not None else None
+        return _fetch_keyset(base_url, table, (key,), page_size, headers, last_row, upper, progress=False)
+
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        lower = None
+        while True:
+            url = f"{key_url}&limit={page_size}"
+            if lower is not None:
+                url += "&" + _keyset_filter((key,), {key: lower})
+            page = _get_page(url, table, headers)
+            if len(page) < page_size:
+                futures.append(pool.submit(fetch_range, lower, None))
+                break
+            upper = page[-1][key]
+            futures.append(pool.submit(fetch_range, lower, upper))
+            lower = upper
+
+        all_data = []
+        for future in futures:
+            all_data.extend(future.result()) # Réassemblées dans l'ordre des clés ; FetchError propagée
+
+    if len(futures) > 1:
+        print(f"   📄 {len(all_data)} lignes chargées ({len(futures)} plages)")
+    return all_data
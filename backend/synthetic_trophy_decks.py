@@ -0,0 +1,242 @@
+"""
+Générateur seedé de données de trophy decks synthétiques, au format des tables Supabase.
+
+Produit un set complet et reproductible (même seed = mêmes données) :
+- card_list + stats Global (alsa, gih_wr) : pool de cartes avec raretés, types, coûts et couleurs
+- trophy_decks : decklists biaisées par archétype (paires de couleurs), trophy_time étalés sur N jours
+- synergy_scores : lifts plus élevés entre cartes d'un même archétype
+
+Sert de fixture hors-ligne pour benchmark_analytics.py (pas d'accès Supabase nécessaire).
+
+Usage:
+    python backend/synthetic_trophy_decks.py --decks 10000 --seed 1 --out /tmp/ecl_synthetic.json
+"""
+
+import json
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+from itertools import combinations
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+
+SET_CODE = "SYN"
+COLORS = "WUBRG"
+BASIC_BY_COLOR = {"W": "Plains", "U": "Island", "B": "Swamp", "R": "Mountain", "G": "Forest"}
+
+# Composition d'un set de draft classique : (rareté, nombre de cartes mono-couleur par couleur)
+RARITY_SLOTS = [("common", 20), ("uncommon", 14), ("rare", 10), ("mythic", 4)]
+GOLD_UNCOMMONS_PER_PAIR = 1     # Signpost uncommon de chaque paire de couleurs
+NONBASIC_LANDS = 10             # Dual lands communes
+COLORLESS_ARTIFACTS = 8
+
+# Fréquence d'ouverture relative par rareté (les communes dominent les decks)
+RARITY_WEIGHT = {"common": 10, "uncommon": 3.5, "rare": 1, "mythic": 0.4}
+
+# Répartition des types pour les sorts colorés
+SPELL_TYPES = [("Creature — Human Soldier", 0.58), ("Instant", 0.15), ("Sorcery", 0.12), ("Enchantment", 0.10), ("Artifact", 0.05)]
+
+SIGNATURE_CARDS = 12            # Cartes "clés" sur-représentées dans chaque archétype
+SPLASH_RATE = 0.12              # Part des decks avec une carte de splash
+DAYS = 30                       # Étalement des trophy_time
+UNDATED_RATE = 0.01             # Part de decks sans trophy_time
+
+# Date de référence fixe : mêmes données (et mêmes poids Meta-Shift) d'un jour à l'autre
+REFERENCE_NOW = datetime(2025, 1, 31, 12, tzinfo=timezone.utc)
+
+# ==============================================================================
+# 2. POOL DE CARTES
+# ==============================================================================
+
+def _mana_cost(rng, colors, cmc):
+    """Coût de mana {N}{C}... cohérent avec les couleurs et le CMC"""
+    pips = list(colors)
+    if cmc >= 3 and len(colors) == 1 and rng.random() < 0.35:
+        pips.append(colors[0]) # Double pip
+    generic = max(cmc - len(pips), 0)
+    return (f"{{{generic}}}" if generic else "") + "".join(f"{{{c}}}" for c in pips)
+
+def _pick_type(rng):
+    x = rng.random()
+    for card_type, share in SPELL_TYPES:
+        if x < share: return card_type
+        x -= share
+    return SPELL_TYPES[0][0]
+
+def generate_card_pool(rng):
+    """
+    Pool de cartes façon set de draft : card_list + stats Global.
+    Retourne {card_name: ligne card_list enrichie de alsa/gih_wr} (format de get_cards_metadata).
+    """
+    cards = {}
+
+    def add(name, colors, cmc, rarity, card_type):
+        quality = rng.gauss(0, 1) + {"common": 0, "uncommon": 0.4, "rare": 0.9, "mythic": 1.2}[rarity]
+        cost = "" if "Land" in card_type else _mana_cost(rng, colors, cmc)
+        cards[name] = {
+            "card_name": name,
+            "colors": colors,
+            "card_cmc": cmc,
+            "card_cost": cost,
+            "rarity": rarity,
+            "card_type": card_type,
+            # Bonnes cartes : prises tôt (ALSA bas) et GIH WR élevé
+            "alsa": round(min(max(5.5 - quality * 1.4 + rng.gauss(0, 0.6), 1.0), 10.0), 2) if rng.random() < 0.95 else None,
+            "gih_wr": round(55 + quality * 3 + rng.gauss(0, 1.5), 2) if rng.random() < 0.95 else None,
+        }
+
+    for color in COLORS:
+        for rarity, count in RARITY_SLOTS:
+            for i in range(count):
+                cmc = min(max(int(round(rng.gauss(3, 1.4))), 1), 7)
+                add(f"{rarity.title()} {color} {i + 1}", color, cmc, rarity, _pick_type(rng))
+
+    for a, b in combinations(COLORS, 2):
+        for i in range(GOLD_UNCOMMONS_PER_PAIR):
+            add(f"Signpost {a}{b} {i + 1}", a + b, rng.randint(2, 5), "uncommon", "Creature — Spirit")
+
+    for i in range(COLORLESS_ARTIFACTS):
+        add(f"Relic {i + 1}", "", rng.randint(1, 5), rng.choice(["common", "uncommon"]), "Artifact")
+
+    pairs = list(combinations(COLORS, 2))
+    for i in range(NONBASIC_LANDS):
+        a, b = pairs[i % len(pairs)]
+        add(f"Dual Land {a}{b}", "", 0, "common", "Land")
+
+    for color, basic in BASIC_BY_COLOR.items():
+        cards[basic] = {
+            "card_name": basic, "colors": "", "card_cmc": 0, "card_cost": "",
+            "rarity": "common", "card_type": f"Basic Land — {basic}", "alsa": None, "gih_wr": None
+        }
+
+    return cards
+
+# ==============================================================================
+# 3. DECKS ET SYNERGIES
+# ==============================================================================
+
+def _weighted_sample(rng, items, weights, k):
+    """Tirage sans remise pondéré (clés exponentielles d'Efraimidis-Spirakis)"""
+    keyed = sorted(((rng.random() ** (1.0 / w), item) for item, w in zip(items, weights)), reverse=True)
+    return [item for _, item in keyed[:k]]
+
+def build_archetypes(rng, cards):
+    """Archétypes = paires de couleurs, chacun avec ses cartes jouables et ses cartes clés"""
+    archetypes = {}
+    for a, b in combinations(COLORS, 2):
+        playable = [
+            name for name, c in cards.items()
+            if "Land" not in (c['card_type'] or '') and set(c['colors']) <= {a, b}
+        ]
+        signature = rng.sample(playable, min(SIGNATURE_CARDS, len(playable)))
+        archetypes[a + b] = {"colors": a + b, "playable": playable, "signature": set(signature)}
+    return archetypes
+
+def generate_deck(rng, archetype, cards, splash_pool):
+    """Decklist 40 cartes : ~23 sorts biaisés par rareté et cartes clés, ~17 terrains"""
+    n_lands = rng.choice([16, 17, 17, 17, 18])
+    n_spells = 40 - n_lands
+
+    playable = archetype["playable"]
+    weights = [
+        RARITY_WEIGHT[cards[name]['rarity']] * (4 if name in archetype["signature"] else 1)
+        for name in playable
+    ]
+    spells = _weighted_sample(rng, playable, weights, n_spells)
+    if rng.random() < SPLASH_RATE and spells:
+        spells[-1] = rng.choice(splash_pool)
+
+    cardlist = {}
+    added = 0
+    for name in spells:
+        if added >= n_spells: break
+        # Doublons de communes fréquents en draft (ils prennent la place d'un autre sort)
+        qty = 2 if cards[name]['rarity'] == "common" and added + 2 <= n_spells and rng.random() < 0.15 else 1
+        cardlist[name] = cardlist.get(name, 0) + qty
+        added += qty
+
+    a, b = archetype["colors"]
+    dual = f"Dual Land {a}{b}"
+    if dual in cards and rng.random() < 0.5:
+        cardlist[dual] = 1
+        n_lands -= 1
+    first = n_lands // 2 + rng.randint(-1, 1)
+    cardlist[BASIC_BY_COLOR[a]] = cardlist.get(BASIC_BY_COLOR[a], 0) + first
+    cardlist[BASIC_BY_COLOR[b]] = cardlist.get(BASIC_BY_COLOR[b], 0) + n_lands - first
+    return cardlist
+
+def generate_trophy_decks(rng, cards, archetypes, n_decks, fmt="PremierDraft", now=None, days=DAYS):
+    """Lignes trophy_decks : archétypes de popularité inégale, volume croissant au fil des jours"""
+    now = now or datetime.now(timezone.utc)
+    names = list(archetypes)
+    popularity = [rng.uniform(0.4, 1.6) for _ in names]
+    splash_pool = [name for name, c in cards.items() if "Land" not in (c['card_type'] or '') and len(c['colors']) == 1]
+
+    decks = []
+    for i in range(n_decks):
+        arch = rng.choices(names, weights=popularity)[0]
+        # Plus de trophées en fin de période (le format gagne des joueurs)
+        age = days * (1 - rng.random() ** 0.7)
+        trophy_time = (now - timedelta(days=age)).isoformat().replace("+00:00", "Z")
+        if rng.random() < UNDATED_RATE:
+            trophy_time = None
+        decks.append({
+            "set_code": SET_CODE,
+            "format": fmt,
+            "archetype": arch,
+            "aggregate_id": f"syn{i:07d}",
+            "wins": 7,
+            "losses": rng.choice([0, 0, 1, 2]),
+            "trophy_time": trophy_time,
+            "cardlist": generate_deck(rng, archetypes[arch], cards, splash_pool),
+        })
+    return decks
+
+def generate_synergy_rows(rng, archetypes, fmt="PremierDraft", pairs_per_archetype=400):
+    """Lignes synergy_scores : lifts élevés entre cartes d'un même archétype, surtout les cartes clés"""
+    rows = {}
+    for arch in archetypes.values():
+        playable = arch["playable"]
+        for _ in range(pairs_per_archetype):
+            a, b = sorted(rng.sample(playable, 2))
+            boost = 1.5 if a in arch["signature"] or b in arch["signature"] else 1.0
+            rows[(a, b)] = {
+                "set_code": SET_CODE, "format": fmt, "card_a": a, "card_b": b,
+                "synergy_score": round(rng.uniform(1.2, 4.0) * boost, 4)
+            }
+    return list(rows.values())
+
+def generate_dataset(n_decks=1000, seed=1, fmt="PremierDraft", now=None):
+    """Set synthétique complet : {"cards", "trophy_decks", "synergy_scores"}"""
+    rng = random.Random(seed)
+    now = now or REFERENCE_NOW
+    cards = generate_card_pool(rng)
+    archetypes = build_archetypes(rng, cards)
+    return {
+        "cards": cards,
+        "trophy_decks": generate_trophy_decks(rng, cards, archetypes, n_decks, fmt, now),
+        "synergy_scores": generate_synergy_rows(rng, archetypes, fmt),
+    }
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+
+def parse_arguments():
+    """Parse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Generate a seeded synthetic trophy-deck dataset')
+    parser.add_argument('--decks', '-n', type=int, default=1000, help='Nombre de trophy decks (défaut: 1000)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed du générateur (défaut: 1)')
+    parser.add_argument('--format', type=str, default="PremierDraft", help='Format (défaut: PremierDraft)')
+    parser.add_argument('--out', '-o', type=str, required=True, help='Fichier JSON de sortie')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    dataset = generate_dataset(args.decks, args.seed, args.format)
+    with open(args.out, "w") as f:
+        json.dump(dataset, f)
+    print(f"✅ {len(dataset['cards'])} cartes, {len(dataset['trophy_decks'])} decks, "
+          f"{len(dataset['synergy_scores'])} synergies -> {args.out}")
@@ -0,0 +1,20 @@
+"""
+Fixtures partagées des tests backend : les scripts sont des modules à plat dans backend/.
+
+Usage:
+    python -m pytest backend/tests -q
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from synthetic_trophy_decks import generate_dataset
+
+@pytest.fixture(scope="session")
+def dataset():
+    """Set synthétique seedé (mêmes données à chaque run)"""
+    return generate_dataset(1000, seed=1)
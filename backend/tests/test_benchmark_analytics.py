@@ -0,0 +1,28 @@
+import benchmark_analytics as bench
+from test_calculate_archetypal_decks import build_skeletons
+
+def test_benchmark_outputs_on_seeded_set():
+    cases, _ = bench.build_cases(1000, seed=1)
+    summaries = {}
+    for name, fn in cases.items():
+        _, _, output = bench.measure(fn, repeat=1)
+        summary, errors = bench.check_output(name, output)
+        assert not errors, (name, errors)
+        summaries[name] = summary
+
+    assert summaries["featurize_decks"] == {"decks": 1000}
+    assert summaries["build_archetype_skeleton"]["with_synergy"] > 0
+
+    # Même seed, mêmes sorties
+    cases, _ = bench.build_cases(1000, seed=1)
+    for name, fn in cases.items():
+        _, _, output = bench.measure(fn, repeat=1)
+        assert bench.check_output(name, output)[0] == summaries[name], name
+
+def test_skeleton_counts_are_stable(dataset):
+    skeletons = build_skeletons(dataset)
+    assert len(skeletons) == 10 and all(skeletons)
+    assert [len(s["deck_list"]) for s in skeletons] == [40] * 10
+    assert [(s["archetype_name"], s["sample_size"]) for s in skeletons] == [
+        (s["archetype_name"], s["sample_size"]) for s in build_skeletons(dataset)
+    ]
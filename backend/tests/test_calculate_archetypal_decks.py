@@ -0,0 +1,140 @@
+import contextlib
+import io
+from datetime import timedelta
+
+import pytest
+
+import calculate_archetypal_decks as cad
+from synthetic_trophy_decks import REFERENCE_NOW, SET_CODE
+
+def build_skeletons(dataset):
+    """Squelettes de tous les archétypes du set synthétique (sans découpage en variantes)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctx = cad.FormatContext(dataset["cards"])
+        features = cad.featurize_decks(dataset["trophy_decks"], ctx, now=REFERENCE_NOW)
+        synergy_index = cad.build_synergy_index(dataset["synergy_scores"], ctx)
+        by_arch = {}
+        for f in features:
+            by_arch.setdefault(f.deck['archetype'], []).append(f)
+        return [
+            cad.build_archetype_skeleton(arch, decks, ctx, synergy_index, SET_CODE, "PremierDraft", now=REFERENCE_NOW)
+            for arch, decks in sorted(by_arch.items())
+        ]
+
+def test_importance_uses_synergy(dataset):
+    for skeleton in build_skeletons(dataset):
+        assert any(card["synergy_score"] > 0 for card in skeleton["importance_cards"]), skeleton["archetype_name"]
+
+def test_unsplit_archetype_skips_search_when_stable(dataset, monkeypatch):
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctx = cad.FormatContext(dataset["cards"])
+        features = cad.featurize_decks(dataset["trophy_decks"], ctx, now=REFERENCE_NOW)
+    decks = [f for f in features if f.deck['archetype'] == "WU"]
+    assert len(decks) >= cad.MIN_DECKS_FOR_CLUSTERING
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        groups, centroids, searched = cad.cluster_decks(decks, ctx)
+    assert len(groups) == len(centroids) == 1
+    assert searched == len(decks)
+
+    def no_search(*args):
+        raise AssertionError("recherche complète relancée")
+    monkeypatch.setattr(cad, "pairwise_jaccard_distances", no_search)
+
+    # Quelques decks de plus : centroïde repris, recherche sautée
+    grown = decks + decks[:len(decks) // 20]
+    with contextlib.redirect_stdout(io.StringIO()):
+        groups, new_centroids, new_searched = cad.cluster_decks(grown, ctx, centroids, searched)
+    assert groups == [grown] and new_searched == searched
+    assert len(new_centroids) == 1
+
+    # Au-delà de MAX_UNSPLIT_CHANGE, la recherche est relancée
+    grown = decks + decks[:len(decks) // 5]
+    with pytest.raises(AssertionError, match="recherche complète"), contextlib.redirect_stdout(io.StringIO()):
+        cad.cluster_decks(grown, ctx, centroids, searched)
+
+def test_missing_rollup_tables_fall_back_to_decks(dataset, monkeypatch):
+    def missing_table(*args, **kwargs):
+        raise cad.FetchError('trophy_card_daily: HTTP 404 relation "trophy_card_daily" does not exist')
+    monkeypatch.setattr(cad, "get_daily_rollups", missing_table)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctx = cad.FormatContext(dataset["cards"])
+        features = cad.featurize_decks(dataset["trophy_decks"], ctx, now=REFERENCE_NOW)
+        rollups = cad.load_daily_rollups(SET_CODE, "PremierDraft", features)
+    assert rollups == cad.rollups_from_decks(dataset["trophy_decks"])
+
+def test_shared_pool_matches_sequential_across_days(dataset):
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctx = cad.FormatContext(dataset["cards"])
+        features = cad.featurize_decks(dataset["trophy_decks"], ctx, now=REFERENCE_NOW)
+        synergy_index = cad.build_synergy_index(dataset["synergy_scores"], ctx)
+    jobs = [(arch, [f for f in features if f.deck['archetype'] == arch][:30], None, None, None) for arch in ("WU", "BR")]
+
+    def importance(results):
+        return [[sk["importance_cards"] for sk in skeletons] for skeletons in results]
+
+    # Jour sans synergies datées, jour avec d'autres synergies, puis retour à celles de l'initialisation
+    pool = cad.create_archetype_pool(ctx, synergy_index, SET_CODE, "PremierDraft", 2)
+    try:
+        for day_synergies in (synergy_index, {}, synergy_index):
+            with contextlib.redirect_stdout(io.StringIO()):
+                pooled = cad.run_archetype_jobs(jobs, ctx, day_synergies, SET_CODE, "PremierDraft", now=REFERENCE_NOW, pool=pool)
+                sequential = cad.run_archetype_jobs(jobs, ctx, day_synergies, SET_CODE, "PremierDraft", workers=1, now=REFERENCE_NOW)
+            assert importance(pooled) == importance(sequential)
+    finally:
+        pool.executor.shutdown()
+
+def test_fingerprint_uses_trending_day_window(dataset):
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctx = cad.FormatContext(dataset["cards"])
+        features = cad.featurize_decks(dataset["trophy_decks"], ctx, now=REFERENCE_NOW)
+    deck = features[0]
+    cutoff_day = REFERENCE_NOW - timedelta(days=7)
+
+    # Deux heures du jour limite : toutes deux dans la fenêtre récente du trending
+    early = deck._replace(time=cutoff_day.replace(hour=1))
+    late = deck._replace(time=cutoff_day.replace(hour=23))
+    assert cad.archetype_fingerprint([early], 1, 1, now=REFERENCE_NOW) == cad.archetype_fingerprint([late], 1, 1, now=REFERENCE_NOW)
+
+    before = deck._replace(time=cutoff_day - timedelta(days=1))
+    assert cad.archetype_fingerprint([before], 1, 1, now=REFERENCE_NOW) != cad.archetype_fingerprint([late], 1, 1, now=REFERENCE_NOW)
+
+def test_vecmat_profile_matches_per_card_loops(dataset):
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctx = cad.FormatContext(dataset["cards"])
+        features = cad.featurize_decks(dataset["trophy_decks"], ctx, now=REFERENCE_NOW)
+    decks = [f for f in features if f.deck['archetype'] == "WU"]
+    n_known = ctx.n_known
+
+    # Anciennes boucles par deck et par carte
+    weights_by_id = {}
+    for f in decks:
+        for card_id, qty in zip(f.card_ids, f.quantities):
+            if card_id < n_known:
+                weights_by_id[card_id] = weights_by_id.get(card_id, 0) + f.weight * qty
+    full = [f for f in decks if f.total_cards >= 35]
+    total_weight = sum(f.weight for f in full)
+    curve = [sum(f.curve[i] * f.weight for f in full) for i in range(8)]
+    creatures = sum(f.creatures * f.weight for f in full)
+    lands = sum(f.lands * f.weight for f in full)
+
+    card_rows = [(f.card_ids, f.quantities) for f in decks]
+    sparse = cad.sparse_vecmat([f.weight for f in decks], card_rows)
+    assert {card_id: w for card_id, w in sparse.items() if card_id < n_known} == weights_by_id
+
+    full_weights = [f.weight if f.total_cards >= 35 else 0 for f in decks]
+    profile = cad.dense_vecmat(full_weights, [f.curve + (f.creatures, f.lands) for f in decks], 10)
+    assert profile[:8] == curve and profile[8] == creatures and profile[9] == lands
+    assert sum(full_weights) == total_weight
+
+    # Les moyennes du squelette sont celles des anciennes boucles
+    with contextlib.redirect_stdout(io.StringIO()):
+        skeleton = cad.build_archetype_skeleton("WU", decks, ctx, {}, SET_CODE, "PremierDraft", now=REFERENCE_NOW)
+    assert skeleton["avg_mana_curve"] == {str(i): round(curve[i] / total_weight, 1) for i in range(8)}
+
+def test_vecmat_helpers_skip_zero_weights():
+    rows = [((3, 1), (2, 1)), ((1, 5), (1, 4)), ((7,), (9,))]
+    assert cad.sparse_vecmat([1, 2, 0], rows) == {3: 2, 1: 3, 5: 8}
+    assert list(cad.sparse_vecmat([1, 2, 0], rows)) == [3, 1, 5]  # ordre de première apparition
+    assert cad.dense_vecmat([0.5, 0, 2], [(2, 4), (100, 100), (1, 0)], 2) == [3.0, 2.0]
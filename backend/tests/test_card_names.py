@@ -0,0 +1,30 @@
+from card_names import CardNameResolver, is_basic_land
+
+def test_aliases_resolve_to_canonical_name():
+    resolver = CardNameResolver(["Æther Vial", "Fire // Ice"])
+    assert resolver.resolve("Aether Vial") == resolver.resolve("Æther Vial") == 0
+    assert resolver.resolve("Fire") == resolver.resolve("fire // ice") == 1
+    assert resolver.canonical("Fire") == "Fire // Ice"
+    assert resolver.canonical("Unknown Card") == "Unknown Card"
+    assert resolver.resolve("Unknown Card") is None
+    assert "Fire" in resolver and "Ice" not in resolver
+
+def test_full_name_beats_front_face_in_any_order():
+    for names in (["Fire // Ice", "Fire"], ["Fire", "Fire // Ice"]):
+        resolver = CardNameResolver(names)
+        assert resolver.canonical("Fire") == "Fire"
+        assert resolver.canonical("Fire // Ice") == "Fire // Ice"
+
+def test_intern_appends_unknown_names():
+    resolver = CardNameResolver(["Bolt"])
+    assert resolver.intern("bolt") == 0
+    assert resolver.intern("Bear") == 1
+    assert resolver.intern("Bear") == 1
+    assert resolver.names == ["Bolt", "Bear"]
+    assert len(resolver) == 2
+
+def test_is_basic_land():
+    assert is_basic_land("Island")
+    assert is_basic_land("Snow-Covered Forest")
+    assert is_basic_land("Wastes")
+    assert not is_basic_land("Island Sanctuary")
@@ -0,0 +1,46 @@
+import contextlib
+import io
+import random
+
+import etl_script_synergy as synergy
+
+def lift_scores(decks, card_names=()):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return synergy.calculate_lift_scores(decks, card_names)
+
+def split_card_decks():
+    """40 decks Fire/Ice + Bolt, la moitié avec l'écriture face avant "Fire" """
+    decks = []
+    for i in range(40):
+        fire = "Fire" if i % 2 else "Fire // Ice"
+        decks.append({"cardlist": {fire: 1, "Bolt": 1, "Island": 8}})
+        decks.append({"cardlist": {"Bear": 1, "Forest": 9}})
+    return decks
+
+def test_spellings_merge_regardless_of_deck_order():
+    decks = split_card_decks()
+    expected = lift_scores(decks)
+    assert set(expected) == {("Bolt", "Fire // Ice")}
+
+    reversed_decks = decks[::-1]
+    assert lift_scores(reversed_decks) == expected
+    shuffled = list(decks)
+    random.Random(3).shuffle(shuffled)
+    assert lift_scores(shuffled) == expected
+
+def test_card_list_names_are_canonical():
+    decks = [{"cardlist": {"Aether Vial": 1, "Bolt": 1}} for _ in range(30)] + [{"cardlist": {"Bear": 1}}] * 30
+    assert set(lift_scores(decks, ["Æther Vial", "Bolt", "Bear"])) == {("Bolt", "Æther Vial")}
+
+def test_lift_scores_on_synthetic_set(dataset):
+    synergies = lift_scores(dataset["trophy_decks"], dataset["cards"])
+    assert synergies
+    assert all(data["lift"] >= synergy.MIN_LIFT_SCORE for data in synergies.values())
+    assert all(card_a < card_b for card_a, card_b in synergies)
+
+def test_basic_lands_in_card_list_are_ignored():
+    decks = ([{"cardlist": {"Bolt": 1, "Bear": 1, "Island": 8, "Forest": 8}}] * 30
+             + [{"cardlist": {"Elf": 1, "Forest": 9}}] * 30)
+    expected = lift_scores(decks)
+    assert set(expected) == {("Bear", "Bolt")}
+    assert lift_scores(decks, ["Bolt", "Bear", "Island", "Forest", "Elf"]) == expected
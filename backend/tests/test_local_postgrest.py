@@ -0,0 +1,79 @@
+from urllib.parse import parse_qsl
+
+import pytest
+
+from local_postgrest import QueryError, Store, parse_condition, parse_filters, parse_logic, parse_order, parse_prefer, split_top_level
+
+def test_split_top_level():
+    assert split_top_level('a.eq.1,and(b.gt.2,c.lt.3),d.eq."x,y"') == ['a.eq.1', 'and(b.gt.2,c.lt.3)', 'd.eq."x,y"']
+    assert split_top_level('"a\\",b",c') == ['"a\\",b"', 'c']
+
+def test_parse_condition():
+    assert parse_condition("set_code", "eq.ECL") == ("cmp", "set_code", "=", "ECL")
+    assert parse_condition("synergy_score", "gt.0") == ("cmp", "synergy_score", ">", "0")
+    assert parse_condition("card_name", 'in.("Fire // Ice","A, B",Bolt)') == ("in", "card_name", ["Fire // Ice", "A, B", "Bolt"])
+    assert parse_condition("arena_id", "is.null") == ("is", "arena_id", "null")
+    # Valeur avec des points : seul le premier sépare l'opérateur
+    assert parse_condition("trophy_time", "gte.2025-01-20T00:00:00.5Z") == ("cmp", "trophy_time", ">=", "2025-01-20T00:00:00.5Z")
+    # Chevauchement de tableau (lsh_bands=ov.{...} de find_similar_decks)
+    assert parse_condition("lsh_bands", 'ov.{"0:ab12","1:cd34"}') == ("ov", "lsh_bands", ["0:ab12", "1:cd34"])
+    with pytest.raises(QueryError):
+        parse_condition("name", "like.*Bolt*")
+
+def test_parse_logic_keyset_filter():
+    # Filtre keyset de supabase_fetch sur une clé composite
+    node = parse_logic("or", '(archetype.gt.WU,and(archetype.eq.WU,card_name.gt."Fire, Ice"))')
+    assert node == ("or", [
+        ("cmp", "archetype", ">", "WU"),
+        ("and", [("cmp", "archetype", "=", "WU"), ("cmp", "card_name", ">", "Fire, Ice")]),
+    ])
+    with pytest.raises(QueryError):
+        parse_logic("or", "archetype.gt.WU")
+
+def test_parse_filters_skips_reserved_params():
+    params = parse_qsl("select=a,b&set_code=eq.ECL&order=a.desc&limit=10&or=(a.eq.1,a.eq.2)")
+    assert parse_filters(params) == [
+        ("cmp", "set_code", "=", "ECL"),
+        ("or", [("cmp", "a", "=", "1"), ("cmp", "a", "=", "2")]),
+    ]
+
+def test_parse_order_and_prefer():
+    assert parse_order("archetype.asc,day.desc,card_name") == [("archetype", False), ("day", True), ("card_name", False)]
+    with pytest.raises(QueryError):
+        parse_order("day.sideways")
+    assert parse_prefer("resolution=merge-duplicates, count=exact") == {"resolution": "merge-duplicates", "count": "exact"}
+
+def test_store_applies_filters():
+    store = Store(":memory:")
+    store.upsert("synergy_scores", [
+        {"set_code": "ECL", "format": "PremierDraft", "card_a": a, "card_b": b, "synergy_score": score}
+        for a, b, score in [("Bolt", "Fire // Ice", 3.5), ("Bear", "Bolt", 0.0), ("Bear", "Fire // Ice", 1.2)]
+    ], resolution="merge-duplicates")
+
+    def names(query):
+        rows, _ = store.select("synergy_scores", ["card_a", "card_b"], parse_filters(parse_qsl(query)), parse_order("card_a,card_b"))
+        return [(row["card_a"], row["card_b"]) for row in rows]
+
+    assert names("set_code=eq.ECL&synergy_score=gt.0") == [("Bear", "Fire // Ice"), ("Bolt", "Fire // Ice")]
+    assert names('card_b=in.("Fire // Ice")&or=(card_a.eq.Bolt,synergy_score.lt.1)') == [("Bolt", "Fire // Ice")]
+    assert names("or=(card_a.gt.Bear,and(card_a.eq.Bear,card_b.gt.Bolt))") == [("Bear", "Fire // Ice"), ("Bolt", "Fire // Ice")]
+
+    # Upsert sur la clé de la table : la ligne existante est mise à jour
+    store.upsert("synergy_scores", [{"set_code": "ECL", "format": "PremierDraft", "card_a": "Bear", "card_b": "Bolt", "synergy_score": 2.0}], resolution="merge-duplicates")
+    assert names("synergy_score=gt.0") == [("Bear", "Bolt"), ("Bear", "Fire // Ice"), ("Bolt", "Fire // Ice")]
+    assert store.table_counts() == {"synergy_scores": 3}
+
+def test_store_overlap_filter_on_json_lists():
+    store = Store(":memory:")
+    store.upsert("trophy_deck_minhash", [
+        {"set_code": "ECL", "format": "PremierDraft", "aggregate_id": deck, "lsh_bands": bands}
+        for deck, bands in [("d1", ["0:aa", "1:bb"]), ("d2", ["0:cc", "1:bb"]), ("d3", ["0:dd", "1:ee"])]
+    ], resolution="merge-duplicates")
+
+    def ids(query):
+        rows, _ = store.select("trophy_deck_minhash", ["aggregate_id"], parse_filters(parse_qsl(query)), parse_order("aggregate_id"))
+        return [row["aggregate_id"] for row in rows]
+
+    assert ids('set_code=eq.ECL&lsh_bands=ov.{"1:bb","9:zz"}') == ["d1", "d2"]
+    assert ids("lsh_bands=ov.{0:dd}") == ["d3"]
+    assert ids("lsh_bands=ov.{}") == []
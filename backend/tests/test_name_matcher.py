@@ -0,0 +1,41 @@
+import random
+
+from name_matcher import edit_distance, normalize_name, similarity
+
+def osa_distance(a, b):
+    """Référence O(n x m) : Levenshtein + transpositions de lettres voisines (optimal string alignment)"""
+    d = [[i + j if i * j == 0 else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[len(a)][len(b)]
+
+def test_edit_distance_known_cases():
+    assert edit_distance("", "") == 0
+    assert edit_distance("", "abc") == 3
+    assert edit_distance("abc", "") == 3
+    assert edit_distance("alpha", "alpha") == 0
+    assert edit_distance("alpah", "alpha") == 1 # Transposition
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("llanowar elves", "llanowar elf") == 3
+
+def test_edit_distance_matches_reference():
+    rng = random.Random(7)
+    for _ in range(2000):
+        a = "".join(rng.choice("abcd ") for _ in range(rng.randint(0, 12)))
+        b = "".join(rng.choice("abcd ") for _ in range(rng.randint(0, 12)))
+        assert edit_distance(a, b) == osa_distance(a, b), (a, b)
+
+def test_edit_distance_long_names():
+    # Plus de 64 caractères : les bitsets Python ne sont pas limités à un mot machine
+    a = "fblthp the lost " * 6
+    b = a.replace("lost", "lsot", 2)
+    assert edit_distance(a, b) == osa_distance(a, b) == 2
+
+def test_similarity():
+    assert similarity("", "") == 1.0
+    assert similarity(normalize_name("Æther-Vial"), "aether vial") == 1.0
+    assert similarity("abcd", "abce") == 0.75
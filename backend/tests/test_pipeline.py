@@ -0,0 +1,74 @@
+import contextlib
+import io
+
+import pytest
+
+import pipeline
+from pipeline import Stage
+
+def fake_stages(calls):
+    """DAG de pipeline.STAGES avec des étapes qui enregistrent leurs appels et leurs entrées"""
+    def runner(name):
+        def run(set_code, fmt, inputs):
+            calls.append(("run", name, sorted(inputs)))
+            return {"stage": name, "inputs": {dep: value["stage"] for dep, value in inputs.items()}}
+        return run
+
+    def loader(name):
+        def load(set_code, fmt):
+            calls.append(("load", name))
+            return {"stage": name, "inputs": {}}
+        return load
+
+    return {
+        name: Stage(stage.deps, runner(name), loader(name) if stage.load else None, stage.artifact)
+        for name, stage in pipeline.STAGES.items()
+    }
+
+def run(tmp_path, monkeypatch, skipped=frozenset()):
+    calls = []
+    monkeypatch.setattr(pipeline, "STAGES", fake_stages(calls))
+    with contextlib.redirect_stdout(io.StringIO()):
+        outputs = pipeline.run_pipeline("SYN", "PremierDraft", frozenset(skipped), artifacts_dir=tmp_path)
+    return outputs, calls
+
+def test_stage_order_follows_dependencies():
+    order = pipeline.stage_order()
+    for name, stage in pipeline.STAGES.items():
+        assert all(order.index(dep) < order.index(name) for dep in stage.deps)
+    assert pipeline.ancestors("skeletons") == {"decks", "metadata", "synergy"}
+    assert pipeline.ancestors("synergy") == {"decks", "metadata"}
+    assert pipeline.ancestors("decks") == set()
+
+def test_full_run_passes_outputs_in_memory(tmp_path, monkeypatch):
+    outputs, calls = run(tmp_path, monkeypatch)
+    assert [c[1] for c in calls] == pipeline.stage_order()
+    assert all(c[0] == "run" for c in calls)
+    assert outputs["skeletons"]["inputs"] == {"decks": "decks", "metadata": "metadata", "synergy": "synergy"}
+    # Artefacts écrits pour les étapes qui en ont
+    for name, stage in pipeline.STAGES.items():
+        assert pipeline.artifact_path("SYN", "PremierDraft", name, tmp_path).exists() == stage.artifact
+
+def test_from_reuses_artifacts_of_ancestors(tmp_path, monkeypatch):
+    first, _ = run(tmp_path, monkeypatch)
+    outputs, calls = run(tmp_path, monkeypatch, pipeline.ancestors("synergy"))
+    assert calls == [("run", "synergy", ["decks", "metadata"]), ("run", "skeletons", ["decks", "metadata", "synergy"])]
+    assert outputs["decks"] == first["decks"] and outputs["metadata"] == first["metadata"]
+
+def test_skip_without_artifact_reads_database(tmp_path, monkeypatch):
+    outputs, calls = run(tmp_path, monkeypatch, {"synergy"})
+    assert ("load", "synergy") in calls and ("run", "synergy", ["decks", "metadata"]) not in calls
+    assert outputs["skeletons"]["inputs"]["synergy"] == "synergy"
+
+def test_skipped_stage_not_needed_is_not_loaded(tmp_path, monkeypatch):
+    outputs, calls = run(tmp_path, monkeypatch, {"skeletons"})
+    assert "skeletons" not in outputs
+    assert sorted(c[1] for c in calls) == ["decks", "metadata", "synergy"]
+
+def test_skipped_stage_without_artifact_or_loader_fails(tmp_path, monkeypatch):
+    calls = []
+    stages = fake_stages(calls)
+    stages["extra"] = Stage(("skeletons",), stages["skeletons"].run, None, False)
+    monkeypatch.setattr(pipeline, "STAGES", stages)
+    with pytest.raises(ValueError), contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run_pipeline("SYN", "PremierDraft", frozenset({"skeletons"}), artifacts_dir=tmp_path)
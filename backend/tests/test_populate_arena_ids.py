@@ -0,0 +1,35 @@
+import os
+
+# populate_arena_ids quitte à l'import sans configuration Supabase
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+from populate_arena_ids import reconcile_arena_ids
+
+CARD_LIST = {"Fire // Ice": None, "Bolt": 123, "Bear": 5, "Andúril, Flame of the West": None, "Lonely": None}
+
+def test_only_changed_arena_ids_are_written():
+    cards_17lands = [
+        {"name": "Fire", "mtga_id": 1},                          # face avant -> "Fire // Ice"
+        {"name": "Bolt", "mtga_id": 123},                        # déjà correct
+        {"name": "Bear", "mtga_id": 6},                          # modifié
+        {"name": "Anduril, Flame of the West", "mtga_id": 7},    # sans accent
+        {"name": "Ghost", "mtga_id": 9},                         # absent de card_list
+        {"name": "Ghost", "mtga_id": 9},
+        {"name": "Nameless", "mtga_id": None},                   # ignorés
+        {"name": "", "mtga_id": 3},
+    ]
+    changes, unmatched_17lands, unmatched_card_list = reconcile_arena_ids("ECL", cards_17lands, CARD_LIST)
+    assert sorted(changes, key=lambda c: c["card_name"]) == [
+        {"card_name": "Andúril, Flame of the West", "set_code": "ECL", "arena_id": 7},
+        {"card_name": "Bear", "set_code": "ECL", "arena_id": 6},
+        {"card_name": "Fire // Ice", "set_code": "ECL", "arena_id": 1},
+    ]
+    assert unmatched_17lands == ["Ghost"]
+    assert unmatched_card_list == ["Lonely"]
+
+def test_up_to_date_card_list_writes_nothing():
+    cards_17lands = [{"name": "Bolt", "mtga_id": 123}, {"name": "Bear", "mtga_id": 5}]
+    changes, unmatched_17lands, unmatched_card_list = reconcile_arena_ids("ECL", cards_17lands, CARD_LIST)
+    assert changes == [] and unmatched_17lands == []
+    assert unmatched_card_list == ["Andúril, Flame of the West", "Fire // Ice", "Lonely"]
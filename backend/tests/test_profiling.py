@@ -0,0 +1,41 @@
+import argparse
+import importlib
+import sys
+
+import profiling
+
+def test_import_leaves_argv_alone(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["script.py", "--profile", "--sets", "ECL"])
+    importlib.reload(profiling)
+    assert sys.argv == ["script.py", "--profile", "--sets", "ECL"]
+    assert not profiling.ENABLED
+
+def test_profile_argument():
+    parser = argparse.ArgumentParser()
+    profiling.add_profile_argument(parser)
+    assert parser.parse_args([]).profile is None
+    assert parser.parse_args(["--profile"]).profile == "deterministic"
+    assert parser.parse_args(["--profile=sample"]).profile == "sample"
+
+def test_worker_timings_are_merged(monkeypatch):
+    monkeypatch.setattr(profiling, "_timings", {})
+    monkeypatch.setattr(profiling, "_worker_timings", {})
+    monkeypatch.setattr(profiling, "ENABLED", False)
+
+    @profiling.phase("compute")
+    def work():
+        return 42
+
+    assert work() == 42
+    assert profiling._timings == {}
+
+    profiling.enable_worker_timings()
+    work()
+    work()
+    timings = profiling.collect_worker_timings()
+    assert timings[("compute", "work")][0] == 2
+    assert profiling._timings == {}
+
+    profiling.merge_worker_timings(timings)
+    profiling.merge_worker_timings(timings)
+    assert profiling._worker_timings[("compute", "work")][0] == 4
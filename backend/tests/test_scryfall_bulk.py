@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+from scryfall_bulk import iter_json_array
+
+CARDS = [
+    {"name": "Fire // Ice", "oracle_text": "Fire deals 2 damage divided as you choose [among one or two targets]."},
+    {"name": "Bolt", "prices": {"usd": "0.10"}, "keywords": []},
+    {"name": "Quote \" and } brace", "cmc": 1.0, "colors": ["R"]},
+]
+
+def chunked(text, size):
+    return (text[i:i + size] for i in range(0, len(text), size))
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 100000])
+def test_objects_split_across_chunks(size):
+    text = json.dumps(CARDS, indent=2)
+    assert list(iter_json_array(chunked(text, size))) == CARDS
+
+def test_empty_array():
+    assert list(iter_json_array(["[", "  ", "]"])) == []
+    assert list(iter_json_array([])) == []
+
+def test_truncated_array_raises():
+    text = json.dumps(CARDS)
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(chunked(text[:-20], 5)))
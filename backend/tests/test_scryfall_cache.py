@@ -0,0 +1,86 @@
+import contextlib
+import io
+from datetime import date, timedelta
+
+from scryfall_cache import RELEASED_TTL_SECONDS, TTL_SECONDS, SetCache, ttl_seconds
+
+SET_INFO = {"code": "syn", "card_count": 2, "released_at": date.today().isoformat()}
+CARDS = [{"name": "Bolt", "set": "syn", "cmc": 1.0, "prices": {"usd": "0.10"}}, {"name": "Bear", "set": "syn", "cmc": 2.0}]
+
+class FakeClient:
+    """get_if_changed / search de ScryfallClient, avec les appels enregistrés"""
+
+    def __init__(self, status=200, set_info=SET_INFO, etag="e1", cards=CARDS):
+        self.status, self.set_info, self.etag, self.cards = status, set_info, etag, cards
+        self.calls = []
+
+    def get_if_changed(self, url, etag=None):
+        self.calls.append(("sets", etag))
+        if self.status is None:
+            return None, None, etag
+        return self.status, self.set_info if self.status == 200 else None, self.etag
+
+    def search(self, query):
+        self.calls.append(("search", query))
+        yield self.cards
+
+def cached_cards(tmp_path, client, expire=False):
+    cache = SetCache("SYN", client=client, cache_dir=tmp_path)
+    if expire:
+        cache.entry["checked_at"] -= TTL_SECONDS + 1
+    with contextlib.redirect_stdout(io.StringIO()):
+        cards = cache.cards()
+    cache.save()
+    return cards
+
+def test_fresh_entry_makes_no_request(tmp_path):
+    first = FakeClient()
+    cards = cached_cards(tmp_path, first)
+    assert [c["name"] for c in cards] == ["Bear", "Bolt"]
+    assert "prices" not in cards[1]  # slim_card
+    assert first.calls == [("sets", None), ("search", "set:syn")]
+
+    again = FakeClient()
+    assert cached_cards(tmp_path, again) == cards
+    assert again.calls == []
+
+def test_expired_entry_revalidated_with_etag(tmp_path):
+    cards = cached_cards(tmp_path, FakeClient())
+
+    not_modified = FakeClient(status=304)
+    assert cached_cards(tmp_path, not_modified, expire=True) == cards
+    assert not_modified.calls == [("sets", "e1")]
+    # checked_at remis à jour : l'entrée est de nouveau fraîche
+    assert cached_cards(tmp_path, FakeClient()) == cards
+
+    # 200 sans changement de signature (ETag différent) : pas de nouvelle recherche
+    same_signature = FakeClient(etag="e2")
+    assert cached_cards(tmp_path, same_signature, expire=True) == cards
+    assert same_signature.calls == [("sets", "e1")]
+
+def test_changed_set_is_searched_again(tmp_path):
+    cached_cards(tmp_path, FakeClient())
+    cache = SetCache("SYN", client=FakeClient(), cache_dir=tmp_path)
+    cache.add_extra({"name": "Guest", "set": "spg"}, requested_name="guest")
+    cache.save()
+
+    grown = FakeClient(set_info={**SET_INFO, "card_count": 3}, etag="e2", cards=CARDS + [{"name": "Elf", "set": "syn"}])
+    cards = cached_cards(tmp_path, grown, expire=True)
+    assert [c["name"] for c in cards] == ["Bear", "Bolt", "Elf"]
+    assert grown.calls == [("sets", "e1"), ("search", "set:syn")]
+
+    cache = SetCache("SYN", cache_dir=tmp_path)
+    assert cache.entry["etag"] == "e2" and cache.entry["signature"]["card_count"] == 3
+    assert [c["name"] for c in cache.extra_cards()] == ["Guest"] and cache.aliases() == {"guest": "Guest"}
+
+def test_unreachable_scryfall_keeps_expired_entry(tmp_path):
+    cards = cached_cards(tmp_path, FakeClient())
+    down = FakeClient(status=None)
+    assert cached_cards(tmp_path, down, expire=True) == cards
+    assert down.calls == [("sets", "e1")]
+
+def test_released_sets_have_longer_ttl():
+    old = (date.today() - timedelta(days=90)).isoformat()
+    assert ttl_seconds({"signature": {"released_at": old}}) == RELEASED_TTL_SECONDS
+    assert ttl_seconds({"signature": {"released_at": date.today().isoformat()}}) == TTL_SECONDS
+    assert ttl_seconds({}) == TTL_SECONDS
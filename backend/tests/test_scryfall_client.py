@@ -0,0 +1,82 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import scryfall_client
+from scryfall_client import API_URL, SEARCH_PAGE_SIZE, ScryfallClient, TokenBucket
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+def test_token_bucket_spaces_requests(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scryfall_client, "time", SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+
+    bucket = TokenBucket(rate=10, capacity=1)
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.sleeps == [0.1, 0.1, 0.1]
+
+    # Après une pause, pas plus de `capacity` requêtes sans attente
+    bucket = TokenBucket(rate=10, capacity=3)
+    clock.now += 60
+    clock.sleeps.clear()
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.sleeps == [0.1, 0.1]
+
+def test_token_bucket_serves_threads_in_turn():
+    bucket = TokenBucket(rate=50, capacity=1)
+    times = []
+    def worker():
+        bucket.acquire()
+        times.append(time.monotonic())
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    times.sort()
+    assert times[-1] - times[0] >= 5 / 50 - 0.01
+
+def fake_search(client, pages, calls):
+    """request() servi depuis {page: réponse} ; next_page = URL complète"""
+    def request(method, url, params=None, **kwargs):
+        key = url if url != f"{API_URL}/cards/search" else params.get("page", 1)
+        calls.append(key)
+        return pages.get(key)
+    client.request = request
+
+def cards(start, n):
+    return [{"name": f"Card {i}"} for i in range(start, start + n)]
+
+def test_search_merges_pages_and_follows_next_page():
+    # total_cards sous-estimé : 3 pages annoncées, une 4e atteinte via next_page
+    pages = {
+        1: {"data": cards(0, SEARCH_PAGE_SIZE), "has_more": True, "total_cards": 3 * SEARCH_PAGE_SIZE},
+        2: {"data": cards(SEARCH_PAGE_SIZE, SEARCH_PAGE_SIZE), "has_more": True},
+        3: {"data": cards(2 * SEARCH_PAGE_SIZE, SEARCH_PAGE_SIZE), "has_more": True, "next_page": "https://next/4"},
+        "https://next/4": {"data": cards(3 * SEARCH_PAGE_SIZE, 10), "has_more": False},
+    }
+    calls = []
+    with ScryfallClient(max_workers=2) as client:
+        fake_search(client, pages, calls)
+        names = [card["name"] for page in client.search("set:syn") for card in page]
+    assert sorted(names, key=lambda n: int(n.split()[1])) == [f"Card {i}" for i in range(3 * SEARCH_PAGE_SIZE + 10)]
+    assert sorted(calls, key=str) == sorted([1, 2, 3, "https://next/4"], key=str)
+
+def test_search_single_page_and_failed_first_page():
+    calls = []
+    with ScryfallClient() as client:
+        fake_search(client, {1: {"data": cards(0, 3), "has_more": False, "total_cards": 3}}, calls)
+        assert [len(page) for page in client.search("set:syn")] == [3]
+        fake_search(client, {}, calls)
+        assert list(client.search("set:syn")) == []
+    assert calls == [1, 1]
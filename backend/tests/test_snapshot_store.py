@@ -0,0 +1,95 @@
+import contextlib
+import io
+from urllib.parse import unquote
+
+import snapshot_store
+from snapshot_store import SnapshotBuilder, load_snapshot, save_snapshot, snapshot_path
+from trophy_rollups import parse_trophy_time
+
+STATS = [
+    {"card_name": "Bolt", "filter_context": "Global", "gih_wr": 0.58, "alsa": 2.1, "img_count": 1200},
+    {"card_name": "Bear", "filter_context": "Global", "gih_wr": None, "alsa": None, "img_count": None},
+    {"card_name": "Bolt", "filter_context": "WU", "gih_wr": 0.61, "alsa": 2.0, "img_count": 300},
+]
+
+def comparable(rows):
+    """Lignes trophy_decks ramenées aux champs du snapshot (trophy_time comparé en datetime)"""
+    return [
+        (r["aggregate_id"], r["archetype"], parse_trophy_time(r.get("trophy_time")), r["cardlist"], r.get("wins"), r.get("losses"))
+        for r in rows
+    ]
+
+def test_round_trip(dataset, tmp_path):
+    decks = dataset["trophy_decks"][:200]
+    decks[1] = {**decks[1], "trophy_time": None, "wins": None, "losses": None}
+    builder = SnapshotBuilder()
+    assert all(builder.add_deck(row) for row in decks)
+    assert not builder.add_deck(decks[0])  # doublon ignoré
+    builder.set_card_stats(STATS)
+    save_snapshot("SYN", "PremierDraft", builder, "2025-01-31T00:00:00+00:00", [{"card_name": "Bolt"}], tmp_path)
+
+    snapshot = load_snapshot("SYN", "PremierDraft", tmp_path)
+    assert len(snapshot) == len(decks)
+    assert comparable(snapshot.deck_rows()) == comparable(decks)
+    assert snapshot.card_stats_rows() == [
+        {"card_name": "Bolt", "filter_context": "Global", "gih_wr": 0.58, "alsa": 2.1, "img_count": 1200},
+        {"card_name": "Bear", "filter_context": "Global", "gih_wr": None, "alsa": None, "img_count": 0},
+    ]
+    assert len(snapshot.card_stats_rows(None)) == 3
+    assert snapshot.card_list_rows() == [{"card_name": "Bolt"}]
+
+def test_incomplete_snapshot_is_ignored(dataset, tmp_path):
+    builder = SnapshotBuilder()
+    for row in dataset["trophy_decks"][:10]:
+        builder.add_deck(row)
+    save_snapshot("SYN", "PremierDraft", builder, None, [], tmp_path)
+    assert load_snapshot("SYN", "PremierDraft", tmp_path) is not None
+
+    # Colonne tronquée (écriture interrompue) : snapshot à reconstruire
+    column = snapshot_path("SYN", "PremierDraft", tmp_path) / "deck_cards.bin"
+    column.write_bytes(column.read_bytes()[:-4])
+    assert load_snapshot("SYN", "PremierDraft", tmp_path) is None
+    assert load_snapshot("SYN", "TradDraft", tmp_path) is None
+
+def fake_fetch_all(tables, calls):
+    """fetch_all servi depuis {table: lignes}, avec le filtre scraped_at=gte.<watermark> appliqué"""
+    def fetch_all(table, filters, columns=None, key=None, parallel=False):
+        calls.append((table, filters))
+        rows = tables[table]
+        for part in filters.split("&"):
+            if part.startswith("scraped_at=gte."):
+                watermark = unquote(part[len("scraped_at=gte."):])
+                rows = [r for r in rows if r["scraped_at"] >= watermark]
+        return list(rows)
+    return fetch_all
+
+def test_incremental_refresh_uses_watermark(dataset, tmp_path, monkeypatch):
+    decks = [
+        {**row, "scraped_at": f"2025-01-{10 + i // 100:02d}T00:00:00+00:00"}
+        for i, row in enumerate(dataset["trophy_decks"][:300])
+    ]
+    tables = {"trophy_decks": decks[:150], "card_stats": STATS, "card_list": []}
+    calls = []
+    monkeypatch.setattr(snapshot_store, "fetch_all", fake_fetch_all(tables, calls))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        first = snapshot_store.refresh_snapshot("SYN", "PremierDraft", snapshot_dir=tmp_path)
+    assert len(first) == 150 and first.manifest["watermark"] == "2025-01-11T00:00:00+00:00"
+    assert "scraped_at" not in calls[0][1]
+    cards_before = list(first.cards)
+    first = None
+
+    # Nouveaux decks : seuls ceux scrapés depuis le watermark sont téléchargés (gte : doublons dédoublonnés)
+    tables["trophy_decks"] = decks
+    calls.clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        second = snapshot_store.refresh_snapshot("SYN", "PremierDraft", snapshot_dir=tmp_path)
+    assert "scraped_at=gte.2025-01-11T00%3A00%3A00%2B00%3A00" in calls[0][1]
+    assert len(second) == 300 and second.manifest["watermark"] == "2025-01-12T00:00:00+00:00"
+    assert second.cards[:len(cards_before)] == cards_before  # IDs de cartes stables
+    assert comparable(second.deck_rows()) == comparable(decks)
+
+    # Rien de nouveau : le watermark ne recule pas
+    with contextlib.redirect_stdout(io.StringIO()):
+        third = snapshot_store.refresh_snapshot("SYN", "PremierDraft", snapshot_dir=tmp_path)
+    assert len(third) == 300 and third.manifest["watermark"] == "2025-01-12T00:00:00+00:00"
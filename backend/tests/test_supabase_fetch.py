@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+import requests
+
+import supabase_fetch
+from local_postgrest import Store, make_server
+
+@pytest.fixture
+def server(monkeypatch):
+    """Serveur PostgREST local avec 2 500 decks, le temps d'un test"""
+    store = Store()
+    store.upsert("trophy_decks", [
+        {"aggregate_id": f"d{i:05d}", "set_code": "SYN", "cardlist": {"Bolt": i % 3 + 1}} for i in range(2500)
+    ], "aggregate_id", "merge-duplicates")
+    server = make_server(store, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(supabase_fetch, "SUPABASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(supabase_fetch, "RETRY_DELAY", 0)
+    yield store
+    server.shutdown()
+    server.server_close()
+
+def fetch(**kwargs):
+    return supabase_fetch.fetch_all("trophy_decks", "set_code=eq.SYN", columns=["aggregate_id", "cardlist"],
+                                    key="aggregate_id", page_size=1000, **kwargs)
+
+def test_parallel_matches_keyset(server):
+    rows = fetch()
+    assert len(rows) == 2500
+    assert fetch(parallel=True) == rows
+    assert [row["aggregate_id"] for row in rows] == sorted(row["aggregate_id"] for row in rows)
+
+def test_parallel_uses_key_ranges(server, monkeypatch):
+    urls = []
+    real_get = requests.get
+    monkeypatch.setattr(requests, "get", lambda url, **kw: urls.append(url) or real_get(url, **kw))
+    fetch(parallel=True)
+    assert not any("offset=" in url for url in urls)
+
+def test_failed_page_is_retried(server, monkeypatch):
+    real_get = requests.get
+    failures = []
+    def flaky_get(url, **kw):
+        if "aggregate_id=lte." in url and not failures:
+            failures.append(url)
+            raise requests.ConnectionError("reset")
+        return real_get(url, **kw)
+    monkeypatch.setattr(requests, "get", flaky_get)
+    assert len(fetch(parallel=True)) == 2500
+    assert failures
+
+def test_persistent_failure_raises(server, monkeypatch):
+    real_get = requests.get
+    def broken_get(url, **kw):
+        if "aggregate_id=gt." in url:
+            raise requests.ConnectionError("reset")
+        return real_get(url, **kw)
+    monkeypatch.setattr(requests, "get", broken_get)
+    with pytest.raises(supabase_fetch.FetchError):
+        fetch()
+    with pytest.raises(supabase_fetch.FetchError):
+        fetch(parallel=True)
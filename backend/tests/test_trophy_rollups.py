@@ -0,0 +1,70 @@
+import contextlib
+import io
+from datetime import datetime, timezone
+
+import calculate_archetypal_decks as cad
+from synthetic_trophy_decks import REFERENCE_NOW, SET_CODE
+from trophy_rollups import UNDATED_DAY, parse_trophy_time, rollup_frequencies, rollups_from_decks, trophy_day
+
+def test_parse_trophy_time_normalizes_to_utc():
+    utc = datetime(2025, 1, 15, 10, 30, tzinfo=timezone.utc)
+    assert parse_trophy_time("2025-01-15T10:30:00Z") == utc
+    assert parse_trophy_time("2025-01-15T10:30:00") == utc
+    assert parse_trophy_time("2025-01-15T12:30:00+02:00").tzinfo == timezone.utc
+    assert parse_trophy_time("not a date") is None
+    assert parse_trophy_time(None) is None
+
+def test_trophy_day():
+    assert trophy_day("2025-01-15T23:30:00-02:00") == "2025-01-16"
+    assert trophy_day("") == UNDATED_DAY
+
+def test_rollup_frequencies_match_per_deck_weights(dataset):
+    decks = [d for d in dataset["trophy_decks"] if d["archetype"] == "WU"]
+    freq = rollup_frequencies(rollups_from_decks(decks)["WU"], REFERENCE_NOW, cad.get_trophy_weight)
+
+    weights = {}
+    for deck in decks:
+        w = cad.get_trophy_weight(parse_trophy_time(deck["trophy_time"]), REFERENCE_NOW)
+        for name, qty in deck["cardlist"].items():
+            weights[name] = weights.get(name, 0) + w * qty
+
+    assert freq["n_decks"] == len(decks)
+    assert freq["weights"].keys() == weights.keys()
+    assert all(abs(freq["weights"][name] - w) < 1e-9 for name, w in weights.items())
+
+def test_rollup_skeleton_matches_per_deck_skeleton(dataset):
+    rollups = rollups_from_decks(dataset["trophy_decks"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctx = cad.FormatContext(dataset["cards"])
+        features = cad.featurize_decks(dataset["trophy_decks"], ctx, now=REFERENCE_NOW)
+        synergy_index = cad.build_synergy_index(dataset["synergy_scores"], ctx)
+        for arch in ("WU", "BR"):
+            decks = [f for f in features if f.deck["archetype"] == arch]
+            frequencies = rollup_frequencies(rollups[arch], REFERENCE_NOW, cad.get_trophy_weight)
+            from_decks, from_rollups = (
+                cad.build_archetype_skeleton(arch, decks, ctx, synergy_index, SET_CODE, "PremierDraft", frequencies=freq, now=REFERENCE_NOW)
+                for freq in (None, frequencies)
+            )
+            for key in ("deck_list", "trending_cards", "importance_cards"):
+                assert from_rollups[key] == from_decks[key], (arch, key)
+
+def test_rollup_frequencies_windows():
+    decks = [
+        {"archetype": "WU", "trophy_time": "2025-01-30T08:00:00Z", "cardlist": {"Bolt": 2}},
+        {"archetype": "WU", "trophy_time": "2025-01-10T20:00:00Z", "cardlist": {"Bolt": 1, "Bear": 1}},
+        {"archetype": "WU", "trophy_time": "2025-02-03T10:00:00Z", "cardlist": {"Bear": 1}}, # Après la date as-of
+        {"archetype": "WU", "trophy_time": None, "cardlist": {"Bear": 1}},
+    ]
+    rollup = rollups_from_decks(decks)["WU"]
+
+    freq = rollup_frequencies(rollup, REFERENCE_NOW, cad.get_trophy_weight)
+    assert freq["n_decks"] == 3
+    assert (freq["n_recent"], freq["n_old"]) == (1, 2)
+    assert freq["recent"] == {"Bolt": 1}
+    assert freq["old"] == {"Bolt": 1, "Bear": 2}
+    assert freq["weights"] == {"Bolt": 1.0 * 2 + 0.5 * 1, "Bear": 0.5 + 0.5}
+    assert freq["total_weight"] == 1.0 + 0.5 + 0.5
+
+    dated = rollup_frequencies(rollup, REFERENCE_NOW, cad.get_trophy_weight, include_undated=False)
+    assert dated["n_decks"] == 2
+    assert dated["weights"] == {"Bolt": 2.5, "Bear": 0.5}
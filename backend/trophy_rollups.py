@@ -0,0 +1,334 @@
+"""
+Rollups quotidiens des trophy decks, par (set, format, archétype, jour, carte).
+
+- trophy_card_daily      : nombre de decks contenant la carte et nombre de copies
+- trophy_archetype_daily : nombre de decks de l'archétype ce jour-là
+
+Les fréquences fenêtrées ou pondérées par ancienneté (poids Meta-Shift, trending)
+se calculent alors en O(jours x cartes) au lieu de re-parcourir tous les decks.
+
+Mise à jour incrémentale : les jours touchés par une ingestion sont recalculés
+depuis trophy_decks (idempotent, rejouable sans double comptage).
+
+Usage:
+    python backend/trophy_rollups.py                 # Recalcule les RECENT_DAYS derniers jours
+    python backend/trophy_rollups.py --full          # Reconstruit tout l'historique
+    python backend/trophy_rollups.py --since 2025-01-20
+"""
+
+import requests
+import os
+import argparse
+from datetime import datetime, date, time, timedelta, timezone
+from dotenv import load_dotenv
+from pathlib import Path
+from supabase_fetch import fetch_all
+from profiling import phase, add_profile_argument, start_profiling
+
+# ==============================================================================
+# 1. CONFIGURATION
+# ==============================================================================
+
+# Sets et formats à traiter
+TARGET_SET_CODES = ["ECL"]  # [] pour tous les sets actifs
+TARGET_FORMATS = ["PremierDraft", "TradDraft"]
+
+# Nombre de jours recalculés par défaut (ingestion des dernières 24h = 2 jours calendaires)
+RECENT_DAYS = 2
+
+# Reconstruit tout l'historique (suppression puis recalcul)
+FULL_REBUILD = False
+
+# Jour utilisé pour les decks sans trophy_time exploitable
+UNDATED_DAY = "1970-01-01"
+
+# --- ENVIRONNEMENT ---
+current_dir = Path(__file__).parent
+root_dir = current_dir.parent
+env_path = root_dir / '.env'
+load_dotenv(dotenv_path=env_path)
+
+SUPABASE_URL = os.getenv("SUPABASE_URL") or os.getenv("VITE_SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY") or os.getenv("VITE_SUPABASE_KEY")
+
+HEADERS_SUPABASE = {
+    "apikey": SUPABASE_KEY,
+    "Authorization": f"Bearer {SUPABASE_KEY}",
+    "Content-Type": "application/json",
+    "Prefer": "resolution=merge-duplicates"
+}
+
+# ==============================================================================
+# 2. AGRÉGATION
+# ==============================================================================
+
+def parse_trophy_time(trophy_time):
+    """Parse le timestamp ISO d'un trophy deck en datetime UTC (None si absent ou invalide)"""
+    if not trophy_time:
+        return None
+    try:
+        # Format: "2024-01-15T10:30:00Z" ou "2024-01-15T10:30:00" ou avec offset
+        if trophy_time.endswith('Z'):
+            trophy_time = trophy_time[:-1] + '+00:00'
+        dt = datetime.fromisoformat(trophy_time)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+def trophy_day(trophy_time):
+    """Jour UTC (YYYY-MM-DD) d'un trophy_time ISO, UNDATED_DAY si absent ou invalide"""
+    dt = parse_trophy_time(trophy_time)
+    return dt.date().isoformat() if dt else UNDATED_DAY
+
+@phase("compute")
+def aggregate_daily(decks):
+    """
+    Agrège des lignes trophy_decks par (archétype, jour).
+    Retourne {(archétype, jour): [nombre de decks, {carte: [decks, copies]}]}
+    """
+    aggregates = {}
+    for deck in decks:
+        key = (deck['archetype'], trophy_day(deck.get('trophy_time')))
+        entry = aggregates.get(key)
+        if entry is None:
+            entry = aggregates[key] = [0, {}]
+        entry[0] += 1
+        cards = entry[1]
+        for name, qty in (deck.get('cardlist') or {}).items():
+            counts = cards.get(name)
+            if counts is None:
+                cards[name] = [1, qty]
+            else:
+                counts[0] += 1
+                counts[1] += qty
+    return aggregates
+
+def day_datetime(day):
+    """Milieu de journée UTC d'un jour de rollup (None pour les decks non datés)"""
+    if day == UNDATED_DAY:
+        return None
+    return datetime.combine(date.fromisoformat(day), time(12), tzinfo=timezone.utc)
+
+def rollup_frequencies(rollup, now, weight_fn, recent_days=7, include_undated=True):
+    """
+    Fréquences d'un archétype à partir de ses rollups, en O(jours x cartes).
+    - weight_fn(dt, now) : poids Meta-Shift (dt = milieu de journée) ; il ne doit dépendre que du jour
+      de dt pour que les poids des rollups soient exactement ceux des decks (get_trophy_weight)
+    - récent = jours dans les `recent_days` derniers jours (fenêtre du trending, au jour près)
+    - les jours postérieurs à `now` sont ignorés (calcul "as-of")
+    """
+    cutoff = (now - timedelta(days=recent_days)).date()
+    freq = {
+        "n_decks": 0, "total_weight": 0.0, "weights": {},
+        "n_recent": 0, "n_old": 0, "recent": {}, "old": {}
+    }
+
+    for day, deck_count in rollup["decks"].items():
+        dt = day_datetime(day)
+        if dt is None and not include_undated: continue
+        if dt is not None:
+            if dt.date() > now.date(): continue # Jour postérieur à la date de calcul
+            dt = min(dt, now) # Jour en cours : pas de date dans le futur
+        w = weight_fn(dt, now)
+        is_recent = dt is not None and dt.date() >= cutoff
+
+        freq["n_decks"] += deck_count
+        freq["total_weight"] += w * deck_count
+        freq["n_recent" if is_recent else "n_old"] += deck_count
+
+        weights = freq["weights"]
+        presence = freq["recent" if is_recent else "old"]
+        for card, (decks_with_card, copies) in rollup["cards"].get(day, {}).items():
+            weights[card] = weights.get(card, 0) + w * copies
+            presence[card] = presence.get(card, 0) + decks_with_card
+
+    return freq
+
+def rollups_from_decks(decks):
+    """Rollups au format de get_daily_rollups, calculés depuis des lignes trophy_decks déjà en mémoire"""
+    rollups = {}
+    for (archetype, day), (deck_count, cards) in aggregate_daily(decks).items():
+        arch = rollups.setdefault(archetype, {"decks": {}, "cards": {}})
+        arch["decks"][day] = deck_count
+        arch["cards"][day] = {name: tuple(counts) for name, counts in cards.items()}
+    return rollups
+
+# ==============================================================================
+# 3. FONCTIONS SUPABASE
+# ==============================================================================
+
+@phase("fetch")
+def get_active_sets():
+    """Récupère les sets actifs depuis Supabase"""
+    url = f"{SUPABASE_URL}/rest/v1/sets?active=eq.true&select=code"
+    try:
+        response = requests.get(url, headers=HEADERS_SUPABASE)
+        if response.status_code == 200:
+            return [s['code'] for s in response.json()]
+        return []
+    except Exception as e:
+        print(f"❌ Exception fetch sets: {e}")
+        return []
+
+def get_daily_rollups(set_code, fmt):
+    """Rollups d'un set/format : {archétype: {"decks": {jour: n}, "cards": {jour: {carte: (decks, copies)}}}}"""
+    filters = f"set_code=eq.{set_code}&format=eq.{fmt}"
+    deck_rows = fetch_all("trophy_archetype_daily", filters, columns=["archetype", "day", "deck_count"], key=("archetype", "day"))
+    card_rows = fetch_all(
+        "trophy_card_daily", filters,
+        columns=["archetype", "day", "card_name", "deck_count", "copy_count"], key=("archetype", "day", "card_name"), parallel=True
+    )
+
+    rollups = {}
+    for row in deck_rows:
+        arch = rollups.setdefault(row['archetype'], {"decks": {}, "cards": {}})
+        arch["decks"][row['day']] = row['deck_count']
+    for row in card_rows:
+        arch = rollups.setdefault(row['archetype'], {"decks": {}, "cards": {}})
+        arch["cards"].setdefault(row['day'], {})[row['card_name']] = (row['deck_count'], row['copy_count'])
+    return rollups
+
+@phase("upsert")
+def delete_rollups(set_code, fmt):
+    """Supprime les rollups d'un set/format avant reconstruction complète"""
+    for table in ("trophy_card_daily", "trophy_archetype_daily"):
+        url = f"{SUPABASE_URL}/rest/v1/{table}?set_code=eq.{set_code}&format=eq.{fmt}"
+        try:
+            response = requests.delete(url, headers=HEADERS_SUPABASE)
+            if response.status_code >= 400:
+                print(f"   ⚠️ Erreur suppression {table}: {response.text[:100]}")
+        except Exception as e:
+            print(f"   ⚠️ Exception delete {table}: {e}")
+
+@phase("upsert")
+def save_rollups(set_code, fmt, aggregates):
+    """Upsert des rollups (les jours recalculés remplacent les anciennes valeurs)"""
+    deck_rows = []
+    card_rows = []
+    for (archetype, day), (deck_count, cards) in aggregates.items():
+        deck_rows.append({"set_code": set_code, "format": fmt, "archetype": archetype, "day": day, "deck_count": deck_count})
+        for name, (decks_with_card, copies) in cards.items():
+            card_rows.append({
+                "set_code": set_code, "format": fmt, "archetype": archetype, "day": day,
+                "card_name": name, "deck_count": decks_with_card, "copy_count": copies
+            })
+
+    saved = 0
+    for table, rows, on_conflict in (
+        ("trophy_archetype_daily", deck_rows, "set_code,format,archetype,day"),
+        ("trophy_card_daily", card_rows, "set_code,format,archetype,day,card_name"),
+    ):
+        for i in range(0, len(rows), 500):
+            chunk = rows[i:i + 500]
+            api_url = f"{SUPABASE_URL}/rest/v1/{table}?on_conflict={on_conflict}"
+            try:
+                resp = requests.post(api_url, json=chunk, headers=HEADERS_SUPABASE)
+                if resp.status_code >= 400:
+                    print(f"      ❌ Erreur batch {table} {i}: {resp.text[:200]}")
+                elif table == "trophy_card_daily":
+                    saved += len(chunk)
+            except Exception as e:
+                print(f"      ❌ Exception POST {table}: {e}")
+    return saved
+
+def update_daily_rollups(set_code, fmt, since_day=None, decks=None):
+    """
+    Recalcule les rollups des jours >= since_day (YYYY-MM-DD) depuis trophy_decks.
+    since_day=None : reconstruction complète (decks non datés compris).
+    decks : lignes trophy_decks du set/format déjà en mémoire (pipeline.py), sinon relues en BDD.
+    """
+    filters = f"set_code=eq.{set_code}&format=eq.{fmt}"
+    if since_day:
+        filters += f"&trophy_time=gte.{since_day}T00:00:00Z"
+    else:
+        delete_rollups(set_code, fmt)
+
+    if decks is None:
+        decks = fetch_all(
+            "trophy_decks", filters,
+            columns=["archetype", "trophy_time", "cardlist"], key="aggregate_id", parallel=True
+        )
+    elif since_day:
+        decks = [deck for deck in decks if trophy_day(deck.get('trophy_time')) >= since_day]
+    aggregates = aggregate_daily(decks)
+    # Garde-fou (trophy_time avec un autre fuseau) : seuls les jours >= since_day, complets, sont réécrits
+    if since_day:
+        aggregates = {key: value for key, value in aggregates.items() if key[1] >= since_day}
+
+    saved = save_rollups(set_code, fmt, aggregates)
+    days = sorted({day for _, day in aggregates})
+    print(f"   📆 Rollups {fmt}: {len(decks)} decks, {len(days)} jours, {saved} lignes carte/jour")
+    return saved
+
+# ==============================================================================
+# MAIN
+# ==============================================================================
+
+def parse_arguments():
+    """Parse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Build daily card-count rollups from trophy decks')
+    parser.add_argument(
+        '--sets', '-s',
+        type=str,
+        nargs='+',
+        default=None,
+        help='Codes des sets (ex: --sets FDN DSK)'
+    )
+    parser.add_argument(
+        '--formats', '-f',
+        type=str,
+        nargs='+',
+        default=None,
+        help='Formats (ex: --formats PremierDraft TradDraft)'
+    )
+    parser.add_argument(
+        '--since',
+        type=str,
+        default=None,
+        help=f'Premier jour recalculé, YYYY-MM-DD (défaut: les {RECENT_DAYS} derniers jours)'
+    )
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='Reconstruit tout l\'historique des rollups'
+    )
+    add_profile_argument(parser)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    start_profiling(args.profile)
+
+    # Override des configs
+    if args.sets:
+        TARGET_SET_CODES = list(args.sets)
+    if args.formats:
+        TARGET_FORMATS = list(args.formats)
+    if args.full:
+        FULL_REBUILD = True
+
+    print("📆 Rollups quotidiens - Démarrage")
+    print(f"⏰ {datetime.now(timezone.utc).isoformat()}")
+
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print("❌ ERREUR: Variables d'environnement SUPABASE manquantes.")
+        exit(1)
+
+    sets_to_process = TARGET_SET_CODES or get_active_sets()
+    if not sets_to_process:
+        print("⚠️ Aucun set à traiter.")
+        exit(0)
+
+    since_day = None
+    if not FULL_REBUILD:
+        since_day = args.since or (datetime.now(timezone.utc).date() - timedelta(days=RECENT_DAYS - 1)).isoformat()
+    print(f"📋 Sets: {sets_to_process} | Formats: {TARGET_FORMATS} | Depuis: {since_day or 'début'}")
+
+    for set_code in sets_to_process:
+        print(f"\n🚀 Set {set_code}")
+        for fmt in TARGET_FORMATS:
+            update_daily_rollups(set_code, fmt, since_day)
+
+    print("\n🏁 Terminé.")
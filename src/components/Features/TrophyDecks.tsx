@@ -2,7 +2,8 @@ import React, { useState, useMemo } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { Trophy, Users, BarChart3, Clock, TrendingUp, Eye, Sparkles, ChevronDown, Star, HelpCircle, Copy, Check } from 'lucide-react';
 import { Tooltip } from '../Common/Tooltip';
-import { useSkeletons, ArchetypalSkeleton } from '../../queries/useSkeletons';
+import { useSkeletons, ArchetypalSkeleton, getVariantIndex } from '../../queries/useSkeletons';
+import { useSimilarDecks } from '../../queries/useSimilarDecks';
 import { ManaIcons } from '../Common';
 import { haptics } from '../../utils/haptics';
 import { getCardImage } from '../../utils/helpers';
@@ -35,7 +36,7 @@ export const TrophyDecks: React.FC<TrophyDecksProps> = ({ activeSet, activeForma
     const [selectedArch, setSelectedArch] = useState<string | null>(null);
     const [filter, setFilter] = useState<ArchFilter>('2 colors');
     const [showImportance, setShowImportance] = useState(false);
-    const [isAlt, setIsAlt] = useState(false);
+    const [variantIndex, setVariantIndex] = useState(0);
     const [showMethodology, setShowMethodology] = useState(false);
     const [copied, setCopied] = useState(false);
 
@@ -54,7 +55,7 @@ export const TrophyDecks: React.FC<TrophyDecksProps> = ({ activeSet, activeForma
     const filteredSkeletons = useMemo(() => {
         let base = [...skeletons];
         // Only show main skeletons in the selector grid
-        base = base.filter(s => !s.is_alternative);
+        base = base.filter(s => getVariantIndex(s) === 0);
 
         // Sort by sample_size (most represented first)
         base.sort((a, b) => (b.sample_size || 0) - (a.sample_size || 0));
@@ -67,16 +68,22 @@ export const TrophyDecks: React.FC<TrophyDecksProps> = ({ activeSet, activeForma
         return base;
     }, [skeletons, filter]);
 
-    const skeleton = useMemo(() =>
-        skeletons.find(s => s.archetype_name === selectedArch && (s.is_alternative || false) === isAlt),
-        [skeletons, selectedArch, isAlt]
+    // Main deck + variants of the selected archetype, ordered by variant_index
+    const variants = useMemo(() =>
+        skeletons
+            .filter(s => s.archetype_name === selectedArch)
+            .sort((a, b) => getVariantIndex(a) - getVariantIndex(b)),
+        [skeletons, selectedArch]
     );
 
-    const hasAlternative = useMemo(() =>
-        skeletons.some(s => s.archetype_name === selectedArch && s.is_alternative),
-        [skeletons, selectedArch]
+    const skeleton = useMemo(() =>
+        variants.find(s => getVariantIndex(s) === variantIndex) ?? variants[0],
+        [variants, variantIndex]
     );
 
+    // Trophy decks closest to the skeleton (precomputed MinHash/LSH neighbors)
+    const { data: similarDecks = [] } = useSimilarDecks(skeleton?.representative_deck_id ?? '', activeFormat, activeSet);
+
     const stats = useMemo(() => {
         if (!skeleton) return null;
 
@@ -142,7 +149,7 @@ export const TrophyDecks: React.FC<TrophyDecksProps> = ({ activeSet, activeForma
         if (filteredSkeletons.length > 0) {
             if (!filteredSkeletons.some(s => s.archetype_name === selectedArch)) {
                 setSelectedArch(filteredSkeletons[0].archetype_name);
-                setIsAlt(false);
+                setVariantIndex(0);
             }
         }
     }, [filteredSkeletons, selectedArch]);
@@ -266,7 +273,7 @@ export const TrophyDecks: React.FC<TrophyDecksProps> = ({ activeSet, activeForma
                         {filteredSkeletons.map((s) => (
                             <button
                                 key={s.id}
-                                onClick={() => { haptics.light(); setSelectedArch(s.archetype_name); }}
+                                onClick={() => { haptics.light(); setSelectedArch(s.archetype_name); setVariantIndex(0); }}
                                 className={`flex flex-col items-center justify-center p-2.5 md:p-5 rounded-xl md:rounded-2xl border transition-all duration-300 group ${selectedArch === s.archetype_name
                                     ? 'bg-indigo-600 border-indigo-400 shadow-[0_0_25px_rgba(79,70,229,0.3)] scale-105 z-10'
                                     : 'bg-slate-900/40 border-slate-800/60 hover:border-slate-500 hover:bg-slate-800'
@@ -390,20 +397,21 @@ export const TrophyDecks: React.FC<TrophyDecksProps> = ({ activeSet, activeForma
                         <div className="space-y-12 px-2 md:px-0">
                             {/* SUB-ARCHETYPE SELECTOR + EXPORT */}
                             <div className="flex justify-center items-center gap-4 -mb-8">
-                                {hasAlternative && (
+                                {variants.length > 1 && (
                                     <div className="flex p-1 bg-slate-900/60 rounded-xl border border-slate-800/40 backdrop-blur-sm">
-                                        <button
-                                            onClick={() => { haptics.selection(); setIsAlt(false); }}
-                                            className={`px-4 py-1.5 rounded-lg text-[10px] font-bold uppercase tracking-widest transition-all ${!isAlt ? 'bg-indigo-600 text-white shadow-lg' : 'text-slate-500 hover:text-slate-300'}`}
-                                        >
-                                            Main Deck
-                                        </button>
-                                        <button
-                                            onClick={() => { haptics.selection(); setIsAlt(true); }}
-                                            className={`px-4 py-1.5 rounded-lg text-[10px] font-bold uppercase tracking-widest transition-all ${isAlt ? 'bg-indigo-600 text-white shadow-lg' : 'text-slate-500 hover:text-slate-300'}`}
-                                        >
-                                            Alternative
-                                        </button>
+                                        {variants.map(v => {
+                                            const index = getVariantIndex(v);
+                                            const isActive = skeleton && getVariantIndex(skeleton) === index;
+                                            return (
+                                                <button
+                                                    key={index}
+                                                    onClick={() => { haptics.selection(); setVariantIndex(index); }}
+                                                    className={`px-4 py-1.5 rounded-lg text-[10px] font-bold uppercase tracking-widest transition-all ${isActive ? 'bg-indigo-600 text-white shadow-lg' : 'text-slate-500 hover:text-slate-300'}`}
+                                                >
+                                                    {index === 0 ? 'Main Deck' : variants.length > 2 ? `Variant ${index}` : 'Alternative'}
+                                                </button>
+                                            );
+                                        })}
                                     </div>
                                 )}
                                 <button
@@ -552,6 +560,33 @@ export const TrophyDecks: React.FC<TrophyDecksProps> = ({ activeSet, activeForma
                                 </div>
                             </div>
 
+                            {/* Similar Trophy Decks */}
+                            {similarDecks.length > 0 && (
+                                <div className="bg-slate-900/30 backdrop-blur-xl border border-slate-800/40 p-5 rounded-2xl">
+                                    <div className="flex items-center gap-2 mb-4">
+                                        <Users size={14} className="text-sky-400" />
+                                        <h4 className="text-[10px] font-bold text-slate-400 uppercase tracking-wider">Similar Trophy Decks</h4>
+                                        <Tooltip content={<div className="text-center"><div>Trophy decks closest to this skeleton's most typical deck.</div><div className="text-slate-400 mt-1">Similarity: shared non-basic cards (Jaccard).</div></div>}>
+                                            <HelpCircle size={12} className="text-slate-600 hover:text-slate-400 cursor-help transition-colors" />
+                                        </Tooltip>
+                                    </div>
+                                    <div className="space-y-2">
+                                        {similarDecks.map(deck => (
+                                            <div key={deck.neighbor_id} className="flex items-center gap-3">
+                                                <span className="text-[10px] font-bold text-slate-600 w-4">{deck.rank}</span>
+                                                <div className="flex-1 min-w-0">
+                                                    <p className="text-xs font-semibold text-slate-200">
+                                                        {deck.wins ?? '?'}-{deck.losses ?? '?'}
+                                                        {deck.trophy_time && <span className="text-[9px] text-slate-500 font-normal ml-2">{new Date(deck.trophy_time).toLocaleDateString()}</span>}
+                                                    </p>
+                                                </div>
+                                                <span className="text-[10px] font-bold text-sky-400">{Math.round(deck.similarity * 100)}% similar</span>
+                                            </div>
+                                        ))}
+                                    </div>
+                                </div>
+                            )}
+
                             {/* Card Importance - Collapsible */}
                             {skeleton.importance_cards && skeleton.importance_cards.length > 0 && (
                                 <div className="bg-slate-900/30 backdrop-blur-xl border border-slate-800/40 rounded-2xl overflow-hidden">
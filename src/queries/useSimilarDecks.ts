@@ -0,0 +1,52 @@
+import { useQuery } from '@tanstack/react-query'
+import { supabase } from '../supabase'
+import { queryKeys } from './keys'
+
+export interface SimilarDeck {
+    rank: number
+    neighbor_id: string
+    similarity: number
+    wins?: number
+    losses?: number
+    trophy_time?: string
+}
+
+export function useSimilarDecks(
+    aggregateId: string,
+    activeFormat: string,
+    activeSet: string
+) {
+    return useQuery({
+        queryKey: queryKeys.similarDecks(activeSet, activeFormat, aggregateId),
+        queryFn: async (): Promise<SimilarDeck[]> => {
+            // Neighbors precomputed by backend/etl_script_similar_decks.py (MinHash/LSH)
+            const { data, error } = await supabase
+                .from('trophy_deck_neighbors')
+                .select('rank, neighbor_id, similarity')
+                .eq('set_code', activeSet)
+                .eq('format', activeFormat)
+                .eq('aggregate_id', aggregateId)
+                .order('rank')
+
+            if (error) {
+                console.error('Error fetching similar decks:', error)
+                return []
+            }
+            if (!data || data.length === 0) return []
+
+            // Result and date of each neighbor (trophy_decks)
+            const { data: decks, error: decksError } = await supabase
+                .from('trophy_decks')
+                .select('aggregate_id, wins, losses, trophy_time')
+                .in('aggregate_id', data.map(n => n.neighbor_id))
+
+            if (decksError) {
+                console.error('Error fetching similar deck details:', decksError)
+                return data
+            }
+            const byId = new Map((decks || []).map(d => [d.aggregate_id, d]))
+            return data.map(n => ({ ...n, ...byId.get(n.neighbor_id) }))
+        },
+        enabled: !!aggregateId && !!activeSet && !!activeFormat,
+    })
+}
@@ -51,8 +51,14 @@ export interface ArchetypalSkeleton {
     openness_score?: number
     importance_cards?: ImportanceCard[]
     is_alternative?: boolean
+    variant_index?: number // 0 = main deck, 1..3 = variants
+    representative_deck_id?: string | null // Closest trophy deck (key into trophy_deck_neighbors)
 }
 
+// Rows written before variant_index existed only had the alternative (variant 1)
+export const getVariantIndex = (skeleton: ArchetypalSkeleton): number =>
+    skeleton.variant_index ?? (skeleton.is_alternative ? 1 : 0)
+
 export function useSkeletons(activeSet: string, activeFormat: string) {
     return useQuery({
         queryKey: queryKeys.skeletons(activeSet, activeFormat),
@@ -64,6 +70,7 @@ export function useSkeletons(activeSet: string, activeFormat: string) {
                 .select('*')
                 .eq('set_code', activeSet)
                 .eq('format', activeFormat)
+                .order('variant_index', { ascending: true })
 
             if (error) throw error
             return data || []
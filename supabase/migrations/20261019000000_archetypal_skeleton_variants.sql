@@ -0,0 +1,32 @@
+-- Variantes d'archétype (calculate_archetypal_decks.py) : jusqu'à MAX_VARIANTS lignes par archétype,
+-- upsert sur (set_code, format, archetype_name, variant_index)
+
+alter table public.archetypal_skeletons
+    add column if not exists variant_index integer not null default 0,  -- 0 = principal, 1..3 = variantes
+    add column if not exists fingerprint text,                          -- empreinte des entrées (archétype inchangé = sauté)
+    add column if not exists centroid_cards jsonb;                      -- piliers de la variante (warm start du clustering)
+
+-- Lignes existantes : l'ancienne "alternative" devient la variante 1
+update public.archetypal_skeletons
+set variant_index = 1
+where is_alternative and variant_index = 0;
+
+-- Ancienne clé d'upsert (set_code, format, archetype_name, is_alternative)
+do $$
+declare
+    con record;
+begin
+    for con in
+        select distinct c.conname
+        from pg_constraint c
+        join pg_attribute a on a.attrelid = c.conrelid and a.attnum = any (c.conkey)
+        where c.conrelid = 'public.archetypal_skeletons'::regclass
+          and c.contype = 'u'
+          and a.attname = 'is_alternative'
+    loop
+        execute format('alter table public.archetypal_skeletons drop constraint %I', con.conname);
+    end loop;
+end $$;
+
+alter table public.archetypal_skeletons
+    add constraint archetypal_skeletons_variant_key unique (set_code, format, archetype_name, variant_index);
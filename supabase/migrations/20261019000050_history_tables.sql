@@ -0,0 +1,47 @@
+-- Historique "as-of" (--as-of / --history) : synergies et squelettes recalculés jour par jour
+-- etl_script_synergy.py upsert sur (set_code, format, card_a, card_b, as_of)
+-- calculate_archetypal_decks.py upsert sur (set_code, format, archetype_name, variant_index, as_of)
+-- Avant 20261019000100 et 20261019000200, qui ajoutent des colonnes à archetypal_skeletons_history
+
+create table if not exists public.synergy_scores_history (
+    set_code text not null,
+    format text not null,
+    card_a text not null,
+    card_b text not null,
+    synergy_score real,
+    lift_score real,
+    co_occurrence_count integer,
+    confidence_a_to_b real,
+    confidence_b_to_a real,
+    updated_at timestamptz not null default now(),
+    as_of date not null,          -- decks avec trophy_time <= ce jour
+    constraint synergy_scores_history_key unique (set_code, format, card_a, card_b, as_of)
+);
+
+create table if not exists public.archetypal_skeletons_history (
+    id uuid primary key default gen_random_uuid(),
+    set_code text not null,
+    format text not null,
+    archetype_name text not null,
+    is_alternative boolean not null default false,
+    variant_index integer not null default 0,  -- 0 = principal, 1..3 = variantes
+    avg_mana_curve jsonb,
+    avg_lands real,
+    creature_ratio real,
+    deck_list jsonb,
+    sample_size integer,
+    sleeper_cards jsonb,
+    trending_cards jsonb,
+    openness_score integer,
+    importance_cards jsonb,
+    updated_at timestamptz not null default now(),
+    as_of date not null,
+    constraint archetypal_skeletons_history_key unique (set_code, format, archetype_name, variant_index, as_of)
+);
+
+-- Lecture des synergies d'un jour (get_synergy_rows) et remplacement d'un jour de squelettes
+create index if not exists synergy_scores_history_as_of_idx
+    on public.synergy_scores_history (set_code, format, as_of);
+
+create index if not exists archetypal_skeletons_history_as_of_idx
+    on public.archetypal_skeletons_history (set_code, format, as_of);
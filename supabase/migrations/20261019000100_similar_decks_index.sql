@@ -0,0 +1,33 @@
+-- Decks similaires (etl_script_similar_decks.py) : signatures MinHash et voisins précalculés
+
+create table if not exists public.trophy_deck_minhash (
+    set_code text not null,
+    format text not null,
+    aggregate_id text not null,
+    signature int8[] not null,   -- NUM_PERM minima (MinHash)
+    lsh_bands text[] not null,   -- clés de bucket "bande:hash", une par bande
+    index_version text not null, -- signatures d'une autre version recalculées
+    constraint trophy_deck_minhash_key unique (set_code, format, aggregate_id)
+);
+
+-- Candidats de find_similar_decks : lsh_bands && '{...}' (sinon scan complet du set)
+create index if not exists trophy_deck_minhash_lsh_bands_idx
+    on public.trophy_deck_minhash using gin (lsh_bands);
+
+create table if not exists public.trophy_deck_neighbors (
+    set_code text not null,
+    format text not null,
+    aggregate_id text not null,
+    rank integer not null,       -- 1 = plus proche
+    neighbor_id text not null,
+    similarity real not null,    -- Jaccard exact (cartes hors terrains de base)
+    updated_at timestamptz not null default now(),
+    constraint trophy_deck_neighbors_key unique (set_code, format, aggregate_id, rank)
+);
+
+-- Point d'entrée du front vers les voisins : trophy deck le plus proche du squelette
+alter table public.archetypal_skeletons
+    add column if not exists representative_deck_id text;
+
+alter table if exists public.archetypal_skeletons_history
+    add column if not exists representative_deck_id text;
@@ -0,0 +1,9 @@
+-- Warm start des archétypes non découpés (calculate_archetypal_decks.py) : leur centroïde unique est
+-- stocké, et la recherche des variantes n'est relancée qu'au-delà de MAX_UNSPLIT_CHANGE de decks en plus ou en moins
+
+alter table public.archetypal_skeletons
+    add column if not exists searched_decks integer; -- nombre de decks lors de la dernière recherche complète
+
+alter table if exists public.archetypal_skeletons_history
+    add column if not exists centroid_cards jsonb,
+    add column if not exists searched_decks integer;
@@ -0,0 +1,30 @@
+-- Rollups quotidiens des trophy decks (trophy_rollups.py), lus par calculate_archetypal_decks.py
+-- upserts sur (set_code, format, archetype, day) et (set_code, format, archetype, day, card_name)
+
+create table if not exists public.trophy_archetype_daily (
+    set_code text not null,
+    format text not null,
+    archetype text not null,
+    day date not null,            -- jour UTC du trophy_time (1970-01-01 = deck non daté)
+    deck_count integer not null,  -- decks de l'archétype ce jour-là
+    constraint trophy_archetype_daily_key unique (set_code, format, archetype, day)
+);
+
+create table if not exists public.trophy_card_daily (
+    set_code text not null,
+    format text not null,
+    archetype text not null,
+    day date not null,
+    card_name text not null,
+    deck_count integer not null,  -- decks contenant la carte
+    copy_count integer not null,  -- copies cumulées
+    constraint trophy_card_daily_key unique (set_code, format, archetype, day, card_name)
+);
+
+-- Lecture par set/format (get_daily_rollups, pagination keyset) : couverte par les clés uniques ;
+-- suppression/recalcul des jours récents (update_daily_rollups)
+create index if not exists trophy_archetype_daily_day_idx
+    on public.trophy_archetype_daily (set_code, format, day);
+
+create index if not exists trophy_card_daily_day_idx
+    on public.trophy_card_daily (set_code, format, day);
@@ -0,0 +1,18 @@
+-- Métadonnées Scryfall (scryfall_enrichment.py) stockées une fois par (set, carte) dans card_list :
+-- les copies card_cmc / card_cost / card_type de card_stats ne sont plus rafraîchies.
+-- Les lecteurs SQL de card_stats lisent meta_cmc / meta_cost / meta_type via cette vue.
+
+create or replace view public.card_stats_with_metadata
+with (security_invoker = true) -- droits (RLS) de l'appelant sur card_stats et card_list
+as
+select s.*, l.card_cmc as meta_cmc, l.card_cost as meta_cost, l.card_type as meta_type
+from public.card_stats s
+left join lateral (
+    -- Noms 17lands = nom complet ou face avant ("A // B") ; correspondance exacte préférée
+    select c.card_cmc, c.card_cost, c.card_type
+    from public.card_list c
+    where c.set_code = s.set_code
+      and (c.card_name = s.card_name or split_part(c.card_name, ' // ', 1) = s.card_name)
+    order by (c.card_name = s.card_name) desc
+    limit 1
+) l on true;